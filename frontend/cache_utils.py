@@ -0,0 +1,80 @@
+"""
+Versioned cache namespaces shared by the frontend caches and indexes.
+
+Each namespace has a version token stored in Django's cache. Writers bump
+the version when the underlying data changes; readers compare the version
+they were built against and rebuild when it moved. Tokens are random, so an
+evicted or cleared key never collides with an old version.
+
+A bump only reaches the processes that share the cache backend, so
+settings.CACHES must point at a shared cache (Redis or the database) rather
+than the per-process local-memory default: otherwise a signal in one
+gunicorn worker, a management command or an import script would leave
+every other worker serving stale data until its entries expire.
+"""
+
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY_PREFIX = 'frontend:version:'
+
+
+def get_version(namespace):
+    """Return the current version token of a namespace, creating one if needed."""
+    key = f'{VERSION_KEY_PREFIX}{namespace}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(*namespaces):
+    """Invalidate every structure built from the given namespaces."""
+    for namespace in namespaces:
+        cache.set(f'{VERSION_KEY_PREFIX}{namespace}', uuid.uuid4().hex, timeout=None)
+
+
+def bump_version_on_commit(*namespaces):
+    """
+    Bump namespaces now and again once the current transaction commits.
+
+    The immediate bump lets the writing request see its own changes; the
+    second bump discards anything another worker rebuilt from the
+    pre-commit data in the meantime.
+    """
+    bump_version(*namespaces)
+    transaction.on_commit(lambda: bump_version(*namespaces))
+
+
+class VersionedLoader:
+    """
+    Process-local holder for a value that is expensive to build.
+
+    The value is built lazily on first access and rebuilt whenever the
+    namespace version changes. Builds are serialised per loader so that
+    concurrent requests do not rebuild the same structure twice.
+    """
+
+    def __init__(self, namespace, builder):
+        self.namespace = namespace
+        self.builder = builder
+        self._lock = threading.Lock()
+        self._version = None
+        self._value = None
+
+    def get(self):
+        version = get_version(self.namespace)
+        if self._version == version:
+            return self._value
+        with self._lock:
+            if self._version != version:
+                self._value = self.builder()
+                self._version = version
+        return self._value
+
+    def invalidate(self):
+        bump_version_on_commit(self.namespace)
@@ -0,0 +1,359 @@
+"""
+Process-local bitmap index of catalog facets for Products and Components.
+
+Every item gets a row position, and every facet value maps to a bitset of the
+positions that carry it. Python integers serve as the bitsets: AND/OR are
+single big-int operations and ``int.bit_count()`` gives per-facet counts, so
+filter combinations and sidebar counts are answered without multi-join SQL.
+Component attribute values get the same treatment, grouped per attribute,
+so the specification sidebar is answered without scanning ComponentAttributes.
+Category and subcategory postings also cover the items tagged anywhere
+below them in the taxonomy tree, so filtering on a category matches its
+subcategories and itemtypes.
+
+The index is built lazily on first use and rebuilt after the
+``catalog_index`` namespace is bumped by the model signals in
+``frontend.signals``.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from copy import copy
+
+from django.conf import settings
+from django.db.models import CharField, Value
+
+from toolanalysis.models import (
+    Products, Components, Brands, BatteryVoltages, BatteryPlatforms,
+    Categories, Subcategories, ItemTypes, Statuses, ProductLines, Features,
+    MotorTypes, ComponentFeatures, ComponentAttributes, Attributes
+)
+from .cache_utils import VersionedLoader, bump_version_on_commit
+from .taxonomy import HIERARCHY_KEYS, get_taxonomy
+
+CATALOG_INDEX_NAMESPACE = 'catalog_index'
+
+# Facet postings loaded from FK columns on the item table
+FK_FACETS = {
+    Products: {
+        'brands': 'brand_id',
+        'motor_types': 'motortype_id',
+        'listing_types': 'listingtype_id',
+        'statuses': 'status_id',
+    },
+    Components: {
+        'brands': 'brand_id',
+        'motor_types': 'motortype_id',
+        'listing_types': 'listingtype_id',
+    },
+}
+
+# Facet postings loaded from M2M through tables
+M2M_FACETS = {
+    Products: {
+        'voltages': 'batteryvoltages',
+        'platforms': 'batteryplatforms',
+        'categories': 'categories',
+        'subcategories': 'subcategories',
+        'itemtypes': 'itemtypes',
+        'feature_links': 'features',
+    },
+    Components: {
+        'voltages': 'batteryvoltages',
+        'platforms': 'batteryplatforms',
+        'categories': 'categories',
+        'subcategories': 'subcategories',
+        'itemtypes': 'itemtypes',
+        'product_lines': 'productlines',
+        'feature_links': 'features',
+    },
+}
+
+# Sidebar value models, loaded once per index build
+VALUE_MODELS = {
+    'brands': (Brands, ('name',)),
+    'voltages': (BatteryVoltages, ('value',)),
+    'platforms': (BatteryPlatforms, ('name',)),
+    'categories': (Categories, ('sortorder', 'name')),
+    'subcategories': (Subcategories, ('sortorder', 'name')),
+    'itemtypes': (ItemTypes, ('sortorder', 'name')),
+    'motor_types': (MotorTypes, ('sortorder', 'name')),
+    'statuses': (Statuses, ('name',)),
+    'product_lines': (ProductLines, ('name',)),
+    'features': (Features, ('sortorder', 'name')),
+}
+
+# Parsed filter keys answered by the index, mapped to their posting key
+INDEXED_FILTERS = {
+    'brand_ids': 'brands',
+    'voltage_ids': 'voltages',
+    'platform_ids': 'platforms',
+    'category_ids': 'categories',
+    'subcategory_ids': 'subcategories',
+    'itemtype_ids': 'itemtypes',
+    'motor_type_ids': 'motor_types',
+    'listing_type_ids': 'listing_types',
+    'status_ids': 'statuses',
+    'product_line_ids': 'product_lines',
+}
+
+
+class CatalogIndex:
+    """Bitmap postings for one catalog model."""
+
+    def __init__(self, model_class):
+        self.model_class = model_class
+        self.item_ids = []
+        self.positions = {}
+        self.postings = defaultdict(lambda: defaultdict(int))
+        self.attribute_postings = defaultdict(int)
+        # attribute id -> {value: bitmap}, and attribute id -> bitmap of any value
+        self.attribute_values = defaultdict(dict)
+        self.attribute_any = defaultdict(int)
+        # attribute id -> (sorted numeric values, matching positions)
+        self.attribute_numbers = {}
+        self.attributes = []
+        self.values = {}
+        self.facet_keys = set(FK_FACETS[model_class]) | set(M2M_FACETS[model_class])
+        if model_class == Components:
+            self.facet_keys.add('features')
+        self._build()
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    def _build(self):
+        model_class = self.model_class
+        fk_facets = FK_FACETS[model_class]
+        fk_keys = list(fk_facets)
+
+        rows = model_class.objects.order_by('pk').values_list('id', *fk_facets.values())
+        for position, row in enumerate(rows):
+            self.item_ids.append(row[0])
+            self.positions[row[0]] = position
+            bit = 1 << position
+            for key, value_id in zip(fk_keys, row[1:]):
+                if value_id is not None:
+                    self.postings[key][value_id] |= bit
+
+        parts = []
+        for key, relation in M2M_FACETS[model_class].items():
+            field = model_class._meta.get_field(relation)
+            source = f'{field.m2m_field_name()}_id'
+            target = f'{field.m2m_reverse_field_name()}_id'
+            parts.append(
+                field.remote_field.through.objects.order_by()
+                .annotate(facet=Value(key, output_field=CharField()))
+                .values_list(source, target, 'facet')
+            )
+        if model_class == Components:
+            # Sidebar features come from ComponentFeatures, filtering uses the M2M
+            parts.append(
+                ComponentFeatures.objects.order_by()
+                .annotate(facet=Value('features', output_field=CharField()))
+                .values_list('component_id', 'feature_id', 'facet')
+            )
+        for item_id, value_id, key in parts[0].union(*parts[1:], all=True):
+            position = self.positions.get(item_id)
+            if position is not None:
+                self.postings[key][value_id] |= 1 << position
+
+        self._expand_hierarchy()
+
+        if model_class == Components:
+            attribute_rows = ComponentAttributes.objects.order_by().values_list(
+                'component_id', 'attribute_id', 'value', 'numeric_value'
+            )
+            numbers = defaultdict(list)
+            for item_id, attribute_id, value, numeric_value in attribute_rows:
+                position = self.positions.get(item_id)
+                if position is not None:
+                    attribute_id = str(attribute_id)
+                    self.attribute_postings[(attribute_id, value)] |= 1 << position
+                    values = self.attribute_values[attribute_id]
+                    values[value] = values.get(value, 0) | 1 << position
+                    self.attribute_any[attribute_id] |= 1 << position
+                    if numeric_value is not None:
+                        numbers[attribute_id].append((numeric_value, position))
+            for attribute_id, pairs in numbers.items():
+                pairs.sort()
+                self.attribute_numbers[attribute_id] = (
+                    [number for number, _ in pairs], [position for _, position in pairs]
+                )
+            self.attributes = list(Attributes.objects.order_by('name').values('id', 'name', 'unit'))
+
+        for key, (value_model, ordering) in VALUE_MODELS.items():
+            if key in self.facet_keys:
+                self.values[key] = list(value_model.objects.order_by(*ordering))
+
+        self.all = (1 << len(self.item_ids)) - 1
+
+    def _expand_hierarchy(self):
+        """Post items tagged with a subcategory or itemtype under all its ancestors too."""
+        taxonomy = get_taxonomy()
+        direct = [(node_id, posting) for key in HIERARCHY_KEYS for node_id, posting in self.postings[key].items()]
+        for node_id, posting in direct:
+            for key, ancestor_ids in taxonomy.ancestor_closure(node_id).items():
+                for ancestor_id in ancestor_ids:
+                    self.postings[key][ancestor_id] |= posting
+
+    # ------------------------------------------------------------------
+    # Bitmap helpers
+    # ------------------------------------------------------------------
+
+    def union(self, key, value_ids):
+        """OR the postings of the given values of one facet."""
+        postings = self.postings.get(key, {})
+        bitmap = 0
+        for value_id in value_ids:
+            bitmap |= postings.get(value_id, 0)
+        return bitmap
+
+    def attribute_union(self, attribute_id, values):
+        """OR the postings of (attribute, value) pairs for one attribute."""
+        bitmap = 0
+        for value in values:
+            bitmap |= self.attribute_postings.get((str(attribute_id), value), 0)
+        return bitmap
+
+    def attribute_range(self, attribute_id, minimum=None, maximum=None):
+        """Return the bitmap of items with a numeric value of an attribute within the bounds."""
+        numbers, positions = self.attribute_numbers.get(str(attribute_id), ((), ()))
+        start = bisect_left(numbers, minimum) if minimum is not None else 0
+        end = bisect_right(numbers, maximum) if maximum is not None else len(numbers)
+        bitmap = 0
+        for position in positions[start:end]:
+            bitmap |= 1 << position
+        return bitmap
+
+    def bitmap_for_ids(self, item_ids):
+        bitmap = 0
+        for item_id in item_ids:
+            position = self.positions.get(item_id)
+            if position is not None:
+                bitmap |= 1 << position
+        return bitmap
+
+    def ids(self, bitmap):
+        """Return the item ids set in a bitmap, in row position order."""
+        item_ids = []
+        while bitmap:
+            low = bitmap & -bitmap
+            item_ids.append(self.item_ids[low.bit_length() - 1])
+            bitmap ^= low
+        return item_ids
+
+    def facet_counts(self, key, mask):
+        """Return {value_id: count} of items in ``mask`` for one facet."""
+        counts = {}
+        for value_id, posting in self.postings.get(key, {}).items():
+            count = (posting & mask).bit_count()
+            if count:
+                counts[value_id] = count
+        return counts
+
+    def options(self, key, counts, extra_ids=()):
+        """
+        Return the sidebar values of a facet that have a count, in sidebar
+        order, as copies annotated with ``item_count``.
+        """
+        options = []
+        for value in self.values.get(key, []):
+            if value.id in counts or value.id in extra_ids:
+                option = copy(value)
+                option.item_count = counts.get(value.id, 0)
+                options.append(option)
+        return options
+
+    def attribute_options(self, mask, selected=None):
+        """
+        Return the specification sidebar for the items in ``mask``.
+
+        One dict per attribute carried by a matching item, ordered by
+        attribute name, with its non-empty values sorted and their counts.
+        """
+        selected = selected or {}
+        options = []
+        for attribute in self.attributes:
+            attribute_id = str(attribute['id'])
+            if not self.attribute_any.get(attribute_id, 0) & mask:
+                continue
+            counts = {}
+            for value, posting in self.attribute_values[attribute_id].items():
+                count = (posting & mask).bit_count()
+                if count and value:
+                    counts[value] = count
+            options.append({
+                'id': attribute_id,
+                'name': attribute['name'],
+                'unit': attribute['unit'],
+                'values': sorted(counts),
+                'value_counts': counts,
+                'selected_values': selected.get(attribute_id, []),
+            })
+        return options
+
+    # ------------------------------------------------------------------
+    # Filters
+    # ------------------------------------------------------------------
+
+    def filter_bitmap(self, filters, exclude=()):
+        """
+        Return the bitmap of items matching every indexed filter.
+
+        Values within one facet are OR-ed, facets are AND-ed. Attribute
+        filters, numeric attribute ranges, legacy feature filters and
+        ``feature_ids`` (which require every selected feature) are included;
+        keys in ``exclude`` are skipped.
+        """
+        bitmap = self.all
+        for filter_key, key in INDEXED_FILTERS.items():
+            if filter_key in exclude or key not in self.facet_keys or not filters.get(filter_key):
+                continue
+            bitmap &= self.union(key, filters[filter_key])
+
+        if self.model_class == Components:
+            for attribute_id, values in (filters.get('attribute_filters') or {}).items():
+                bitmap &= self.attribute_union(attribute_id, values)
+            for attribute_id, bounds in (filters.get('attribute_ranges') or {}).items():
+                bitmap &= self.attribute_range(attribute_id, bounds.get('min'), bounds.get('max'))
+            for attribute_id, values in (filters.get('feature_filters') or {}).items():
+                bitmap &= self.attribute_union(attribute_id, [value.lower() for value in values])
+            for feature_id in filters.get('feature_ids') or []:
+                bitmap &= self.union('feature_links', [feature_id])
+        return bitmap
+
+    def has_indexed_filters(self, filters):
+        if any(
+            filters.get(filter_key) and key in self.facet_keys
+            for filter_key, key in INDEXED_FILTERS.items()
+        ):
+            return True
+        if self.model_class == Components:
+            return bool(
+                filters.get('attribute_filters')
+                or filters.get('attribute_ranges')
+                or filters.get('feature_filters')
+                or filters.get('feature_ids')
+            )
+        return False
+
+
+_loaders = {
+    model_class: VersionedLoader(CATALOG_INDEX_NAMESPACE, lambda model_class=model_class: CatalogIndex(model_class))
+    for model_class in (Products, Components)
+}
+
+
+def is_enabled():
+    return getattr(settings, 'CATALOG_FACET_INDEX_ENABLED', True)
+
+
+def get_catalog_index(model_class):
+    """Return the current index for a catalog model, building it if needed."""
+    return _loaders[model_class].get()
+
+
+def invalidate_catalog_index():
+    bump_version_on_commit(CATALOG_INDEX_NAMESPACE)
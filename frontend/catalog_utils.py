@@ -4,14 +4,14 @@ This module provides generic filtering, sorting, and pagination logic
 that works with both Products and Components models.
 """
 
-from django.core.paginator import Paginator
-from django.db.models import Q, Case, When, Value, F, FloatField
-from django.db.models.functions import Cast
+import functools
 import uuid
-from toolanalysis.models import (
-    Products, Components, Brands, BatteryVoltages, BatteryPlatforms,
-    Categories, Subcategories, ItemTypes, Statuses, ProductLines, Features, MotorTypes
-)
+
+from django.db.models import Q, F
+from . import catalog_index, facets, pagination, search_index
+from .taxonomy import HIERARCHY_KEYS, get_taxonomy
+from toolanalysis.attribute_values import parse_numeric_value
+from toolanalysis.models import Products, Components, ComponentAttributes
 
 
 def parse_filter_params(request):
@@ -26,6 +26,8 @@ def parse_filter_params(request):
         'sort_direction': request.GET.get('sort_direction', 'asc'),
         'page': int(request.GET.get('page', 1)),
         'page_size': int(request.GET.get('page_size', 12)),
+        # Present (even empty) only when the client opted into cursor pagination
+        'cursor': request.GET.get('cursor'),
         'release_date_from': request.GET.get('release_date_from', ''),
         'release_date_to': request.GET.get('release_date_to', ''),
     }
@@ -87,10 +89,17 @@ def parse_filter_params(request):
     
     # Parse attribute filters (for components)
     filters['attribute_filters'] = {}
+    filters['attribute_ranges'] = {}
     filters['feature_filters'] = {}
     filters['feature_ids'] = []
     for key, value in request.GET.items():
-        if key.startswith('attr_'):
+        if key.startswith('attr_') and key.endswith(('_min', '_max')):
+            # Numeric range on an attribute, e.g. attr_<id>_min=1200
+            attr_id, bound = key[len('attr_'):].rsplit('_', 1)
+            number = parse_numeric_value(value)
+            if number is not None and _convert_to_uuids([attr_id]):
+                filters['attribute_ranges'].setdefault(attr_id, {})[bound] = number
+        elif key.startswith('attr_'):
             attr_id = key.replace('attr_', '')
             attr_values = request.GET.getlist(key)
             if attr_values:
@@ -118,12 +127,8 @@ def _convert_to_uuids(id_list):
         return []
 
 
-def build_filter_query(model_class, filters):
-    """
-    Build filtered queryset based on filter parameters.
-    Works with both Products and Components models.
-    """
-    # Start with all items
+def _catalog_queryset(model_class):
+    """Base catalog queryset with the relations the item grid renders."""
     queryset = model_class.objects.select_related('brand', 'listingtype', 'motortype').prefetch_related(
         'batteryvoltages', 'batteryplatforms', 'itemtypes'
     )
@@ -136,16 +141,95 @@ def build_filter_query(model_class, filters):
     if model_class == Components:
         queryset = queryset.prefetch_related('productlines')
     
-    queryset = queryset.all()
+    return queryset.all()
+
+
+def has_sql_only_filters(model_class, filters):
+    """Return True if filters include ones the catalog index cannot answer."""
+    if filters.get('search') and not search_index.documents_enabled():
+        return True
+    if model_class == Products and (filters.get('release_date_from') or filters.get('release_date_to')):
+        return True
+    return False
+
+
+def build_sql_filter_query(model_class, filters):
+    """
+    Apply only the filters that always run in SQL (search and release dates).
+    Facet, attribute and feature filters are left to the caller.
+
+    Search is resolved to matching ids by the search document index when it
+    is enabled, and falls back to ``icontains`` over name, description and SKU.
+    """
+    queryset = _catalog_queryset(model_class)
     
     # Apply search filter
-    if filters.get('search'):
+    if filters.get('search') and search_index.documents_enabled():
+        queryset = queryset.filter(id__in=search_index.search_ids(model_class, filters['search']))
+    elif filters.get('search'):
         queryset = queryset.filter(
             Q(name__icontains=filters['search']) | 
             Q(description__icontains=filters['search']) |
             Q(sku__icontains=filters['search'])
         )
     
+    # Apply date range filters (Products only)
+    if model_class == Products:
+        if filters.get('release_date_from'):
+            queryset = queryset.filter(releasedate__gte=filters['release_date_from'])
+        if filters.get('release_date_to'):
+            queryset = queryset.filter(releasedate__lte=filters['release_date_to'])
+    
+    return queryset
+
+
+def index_filter_bitmap(model_class, filters, exclude=()):
+    """
+    Return the catalog index bitmap of items matching ``filters``.
+
+    Indexed filters are intersected in memory, search through the search
+    document index, and any remaining SQL-only filters through one id query.
+    Keys in ``exclude`` are skipped like in ``CatalogIndex.filter_bitmap``.
+    """
+    index = catalog_index.get_catalog_index(model_class)
+    bitmap = index.filter_bitmap(filters, exclude=exclude)
+    if filters.get('search') and search_index.documents_enabled():
+        bitmap &= index.bitmap_for_ids(search_index.search_ids(model_class, filters['search']))
+    if has_sql_only_filters(model_class, filters):
+        matching_ids = build_sql_filter_query(model_class, filters).order_by().values_list('id', flat=True)
+        bitmap &= index.bitmap_for_ids(matching_ids)
+    return bitmap
+
+
+def _hierarchy_matches(model_class, node_ids):
+    """Ids of the items tagged with any of the taxonomy nodes or their descendants, at any level."""
+    taxonomy = get_taxonomy()
+    closure = set()
+    for node_id in node_ids:
+        closure |= taxonomy.closure(node_id)
+    condition = Q()
+    for relation in HIERARCHY_KEYS:
+        condition |= Q(**{f'{relation}__id__in': closure})
+    return model_class.objects.filter(condition).values('id')
+
+
+def build_filter_query(model_class, filters):
+    """
+    Build filtered queryset based on filter parameters.
+    Works with both Products and Components models.
+
+    When the catalog index is enabled, facet, attribute and feature filters
+    are resolved to matching ids with bitmap intersections and applied as a
+    single primary key IN instead of one join per filter.
+    """
+    queryset = build_sql_filter_query(model_class, filters)
+    
+    if catalog_index.is_enabled():
+        index = catalog_index.get_catalog_index(model_class)
+        if index.has_indexed_filters(filters):
+            queryset = queryset.filter(id__in=index.ids(index.filter_bitmap(filters)))
+        return queryset
+    
     # Apply brand filter
     if filters.get('brand_ids'):
         queryset = queryset.filter(brand__id__in=filters['brand_ids'])
@@ -158,13 +242,10 @@ def build_filter_query(model_class, filters):
     if filters.get('platform_ids'):
         queryset = queryset.filter(batteryplatforms__id__in=filters['platform_ids'])
     
-    # Apply category filters
-    if filters.get('category_ids'):
-        queryset = queryset.filter(categories__id__in=filters['category_ids'])
-    if filters.get('subcategory_ids'):
-        queryset = queryset.filter(subcategories__id__in=filters['subcategory_ids'])
-    if filters.get('itemtype_ids'):
-        queryset = queryset.filter(itemtypes__id__in=filters['itemtype_ids'])
+    # Apply category filters, each matching items tagged anywhere below the selection
+    for filter_key in ('category_ids', 'subcategory_ids', 'itemtype_ids'):
+        if filters.get(filter_key):
+            queryset = queryset.filter(id__in=_hierarchy_matches(model_class, filters[filter_key]))
     
     # Apply status filter (Products only)
     if model_class == Products and filters.get('status_ids'):
@@ -182,13 +263,6 @@ def build_filter_query(model_class, filters):
     if filters.get('motor_type_ids'):
         queryset = queryset.filter(motortype__id__in=filters['motor_type_ids'])
     
-    # Apply date range filters (Products only)
-    if model_class == Products:
-        if filters.get('release_date_from'):
-            queryset = queryset.filter(releasedate__gte=filters['release_date_from'])
-        if filters.get('release_date_to'):
-            queryset = queryset.filter(releasedate__lte=filters['release_date_to'])
-    
     # Apply attribute filters (Components only)
     if model_class == Components:
         if filters.get('attribute_filters'):
@@ -198,6 +272,14 @@ def build_filter_query(model_class, filters):
                     componentattributes__value__in=attr_values
                 ).distinct()
         
+        for attr_id, bounds in (filters.get('attribute_ranges') or {}).items():
+            conditions = {'componentattributes__attribute_id': attr_id}
+            if 'min' in bounds:
+                conditions['componentattributes__numeric_value__gte'] = bounds['min']
+            if 'max' in bounds:
+                conditions['componentattributes__numeric_value__lte'] = bounds['max']
+            queryset = queryset.filter(**conditions).distinct()
+        
         if filters.get('feature_filters'):
             for feature_id, feature_values in filters['feature_filters'].items():
                 lowercase_values = [val.lower() for val in feature_values]
@@ -216,128 +298,105 @@ def build_filter_query(model_class, filters):
 
 
 def apply_sorting(queryset, sort, sort_direction, model_class):
-    """Apply sorting to queryset based on sort parameters."""
+    """
+    Apply sorting to queryset based on sort parameters.
+
+    Sort keys are read from the denormalized CatalogEntries row (one
+    one-to-one join) rather than through the category M2M tables, so no
+    DISTINCT is needed. ``id`` is the final tiebreaker to keep the order
+    stable between pages.
+    """
+    descending = sort_direction == 'desc'
+    
+    def _key(field):
+        expression = F(field)
+        return expression.desc(nulls_first=True) if descending else expression.asc(nulls_last=True)
+    
     if sort == 'brand':
-        if sort_direction == 'desc':
-            queryset = queryset.order_by('-brand__name', 'name')
-        else:
-            queryset = queryset.order_by('brand__name', 'name')
+        queryset = queryset.order_by(_key('catalog_entry__brand_name'), 'name', 'id')
     elif sort == 'release_date' and model_class == Products:
-        if sort_direction == 'desc':
-            queryset = queryset.order_by('-releasedate', 'name')
-        else:
-            queryset = queryset.order_by('releasedate', 'name')
+        queryset = queryset.order_by(_key('releasedate'), 'name', 'id')
     elif sort == 'fair_price' and model_class == Components:
-        # Extract fair_price from JSONField and handle nulls
-        queryset = queryset.annotate(
-            fair_price_value=Case(
-                When(fair_price_narrative__fair_price__isnull=False,
-                     then=Cast(F('fair_price_narrative__fair_price'), FloatField())),
-                default=Value(None),
-                output_field=FloatField()
-            )
-        )
-        if sort_direction == 'desc':
-            queryset = queryset.order_by(F('fair_price_value').desc(nulls_last=True), 'name')
-        else:
-            queryset = queryset.order_by(F('fair_price_value').asc(nulls_last=True), 'name')
+        fair_price = F('catalog_entry__fair_price')
+        ordering = fair_price.desc(nulls_last=True) if descending else fair_price.asc(nulls_last=True)
+        queryset = queryset.order_by(ordering, 'name', 'id')
     else:
         # Default: use category sortorder
-        if sort_direction == 'desc':
-            queryset = queryset.order_by('-categories__sortorder', '-subcategories__sortorder', '-itemtypes__sortorder', '-name').distinct()
-        else:
-            queryset = queryset.order_by('categories__sortorder', 'subcategories__sortorder', 'itemtypes__sortorder', 'name').distinct()
+        queryset = queryset.order_by(
+            _key('catalog_entry__category_sortorder'),
+            _key('catalog_entry__subcategory_sortorder'),
+            _key('catalog_entry__itemtype_sortorder'),
+            '-name' if descending else 'name',
+            '-id' if descending else 'id',
+        )
     
     return queryset
 
 
-def paginate_results(queryset, page, page_size):
-    """Paginate queryset and return page object."""
-    paginator = Paginator(queryset, page_size)
-    try:
-        page_obj = paginator.page(page)
-    except:
-        page_obj = paginator.page(1)
-    return page_obj
+def paginate_results(queryset, page, page_size, cursor=None):
+    """
+    Paginate queryset and return page object.
+
+    Numbered pages are used unless ``cursor`` is given, in which case the
+    page is fetched by keyset (see ``frontend.pagination``). Totals are
+    cached until the catalog changes.
+    """
+    return pagination.paginate(
+        queryset, page, page_size, cursor=cursor,
+        namespace=catalog_index.CATALOG_INDEX_NAMESPACE,
+    )
 
 
 def get_filter_options(filters, model_class):
     """
     Get available filter options based on current filters.
     Returns dynamic filter options that update based on selections.
+
+    Every facet excludes its own selection so the sidebar never narrows
+    itself; all facets are computed together by the facet engine. Each
+    returned option carries an ``item_count`` attribute.
     """
-    filter_options = {}
-    
-    # Build base querysets for each filter type (excluding that filter itself)
-    # This allows filters to update dynamically based on other selections
-    
-    # Get the correct field name for the model
-    model_field_name = 'products' if model_class == Products else 'components'
-    
-    # Brand filter options
-    brand_base = _build_base_queryset(model_class, filters, exclude=['brand_ids'])
-    filter_options['brands'] = Brands.objects.filter(
-        **{f'{model_field_name}__in': brand_base}
-    ).distinct().order_by('name')
-    
-    # Voltage filter options
-    voltage_base = _build_base_queryset(model_class, filters, exclude=['voltage_ids'])
-    filter_options['voltages'] = BatteryVoltages.objects.filter(
-        **{f'{model_field_name}__in': voltage_base}
-    ).distinct().order_by('value')
-    
-    # Platform filter options
-    platform_base = _build_base_queryset(model_class, filters, exclude=['platform_ids'])
-    filter_options['platforms'] = BatteryPlatforms.objects.filter(
-        **{f'{model_field_name}__in': platform_base}
-    ).distinct().order_by('name')
-    
-    # Category filter options (exclude category filters)
-    category_base = _build_base_queryset(model_class, filters, exclude=['category_ids'])
-    filter_options['categories'] = Categories.objects.filter(
-        **{f'{model_field_name}__in': category_base}
-    ).distinct().order_by('sortorder', 'name')
-    
-    # Subcategory filter options (exclude subcategory filters)
-    subcategory_base = _build_base_queryset(model_class, filters, exclude=['subcategory_ids'])
-    filter_options['subcategories'] = Subcategories.objects.filter(
-        **{f'{model_field_name}__in': subcategory_base}
-    ).distinct().order_by('sortorder', 'name')
-    
-    # Item type filter options (exclude itemtype filters)
-    itemtype_base = _build_base_queryset(model_class, filters, exclude=['itemtype_ids'])
-    filter_options['itemtypes'] = ItemTypes.objects.filter(
-        **{f'{model_field_name}__in': itemtype_base}
-    ).distinct().order_by('sortorder', 'name')
-    
-    # Motor type filter options (exclude motor_type filters)
-    motor_type_base = _build_base_queryset(model_class, filters, exclude=['motor_type_ids'])
-    filter_options['motor_types'] = MotorTypes.objects.filter(
-        **{f'{model_field_name}__in': motor_type_base}
-    ).distinct().order_by('sortorder', 'name')
-    
-    # Status filter options (Products only)
-    if model_class == Products:
-        status_base = _build_base_queryset(model_class, filters, exclude=['status_ids'])
-        filter_options['statuses'] = Statuses.objects.filter(
-            products__in=status_base
-        ).distinct().order_by('name')
-    
-    # Product line filter options (Components only)
-    if model_class == Components:
-        product_line_base = _build_base_queryset(model_class, filters, exclude=['product_line_ids'])
-        filter_options['product_lines'] = ProductLines.objects.filter(
-            components__in=product_line_base
-        ).distinct().order_by('name')
-        
-        # Features filter options (Components only)
-        features_base = _build_base_queryset(model_class, filters)
-        filter_options['features'] = Features.objects.filter(
-            Q(componentfeatures__component__in=features_base) |
-            Q(id__in=filters.get('feature_ids', []))
-        ).distinct().order_by('sortorder', 'name')
-    
-    return filter_options
+    return facets.compute_facets(model_class, filters)
+
+
+def get_attribute_options(filters):
+    """
+    Get the component specification sidebar for the current filters.
+
+    Returns one dict per attribute carried by a matching component (id,
+    name, unit, sorted non-empty values, selected values), ordered by
+    attribute name. With the catalog index enabled the values and their
+    counts come from its attribute postings instead of a DISTINCT scan of
+    ComponentAttributes.
+    """
+    selected = filters.get('attribute_filters') or {}
+    if catalog_index.is_enabled():
+        index = catalog_index.get_catalog_index(Components)
+        return index.attribute_options(index_filter_bitmap(Components, filters), selected)
+
+    attributes_with_values = ComponentAttributes.objects.filter(
+        component__in=build_filter_query(Components, filters)
+    ).values('attribute__id', 'attribute__name', 'attribute__unit', 'value').distinct().order_by('attribute__name', 'value')
+    
+    # Group attributes by attribute
+    attributes_dict = {}
+    for attr_data in attributes_with_values:
+        attr_id = str(attr_data['attribute__id'])
+        if attr_id not in attributes_dict:
+            attributes_dict[attr_id] = {
+                'id': attr_id,
+                'name': attr_data['attribute__name'],
+                'unit': attr_data['attribute__unit'],
+                'values': [],
+                'selected_values': selected.get(attr_id, [])
+            }
+        if attr_data['value']:
+            attributes_dict[attr_id]['values'].append(attr_data['value'])
+    
+    # Sort values for each attribute
+    for attr_data in attributes_dict.values():
+        attr_data['values'].sort()
+    return list(attributes_dict.values())
 
 
 def _build_base_queryset(model_class, filters, exclude=None):
@@ -360,43 +419,76 @@ def calculate_filter_counts(filters, filter_options):
     
     counts['brands'] = {
         'selected': len(filters.get('brand_ids', [])),
-        'total': filter_options['brands'].count()
+        'total': len(filter_options['brands'])
     }
     
     counts['voltages'] = {
         'selected': len(filters.get('voltage_ids', [])),
-        'total': filter_options['voltages'].count()
+        'total': len(filter_options['voltages'])
     }
     
     counts['platforms'] = {
         'selected': len(filters.get('platform_ids', [])),
-        'total': filter_options['platforms'].count()
+        'total': len(filter_options['platforms'])
     }
     
     if 'statuses' in filter_options:
         counts['statuses'] = {
             'selected': len(filters.get('status_ids', [])),
-            'total': filter_options['statuses'].count()
+            'total': len(filter_options['statuses'])
         }
     
     if 'product_lines' in filter_options:
         counts['product_lines'] = {
             'selected': len(filters.get('product_line_ids', [])),
-            'total': filter_options['product_lines'].count()
+            'total': len(filter_options['product_lines'])
         }
     
     if 'features' in filter_options:
         counts['features'] = {
             'selected': len(filters.get('feature_ids', [])),
-            'total': filter_options['features'].count()
+            'total': len(filter_options['features'])
         }
     
     if 'motor_types' in filter_options:
         counts['motor_types'] = {
             'selected': len(filters.get('motor_type_ids', [])),
-            'total': filter_options['motor_types'].count()
+            'total': len(filter_options['motor_types'])
         }
     
     return counts
 
 
+
+
+SIDEBAR_OPTION_KEYS = {
+    Products: ('brands', 'voltages', 'platforms', 'statuses', 'categories', 'subcategories', 'itemtypes'),
+    Components: (
+        'brands', 'voltages', 'platforms', 'product_lines', 'categories', 'subcategories',
+        'itemtypes', 'motor_types', 'features',
+    ),
+}
+
+
+def lazy_sidebar_context(filters, model_class):
+    """
+    Build the filter sidebar context without computing it yet.
+
+    Every value is a callable, which templates call on lookup, and the
+    facets, counts and component attributes are computed together on the
+    first one. A filter_sidebar fragment served from cache never looks them
+    up, so it costs no facet or attribute queries.
+    """
+    @functools.cache
+    def load():
+        filter_options = get_filter_options(filters, model_class)
+        sidebar = {key: filter_options.get(key, []) for key in SIDEBAR_OPTION_KEYS[model_class]}
+        sidebar['filter_counts'] = calculate_filter_counts(filters, filter_options)
+        if model_class is Components:
+            sidebar['attributes'] = get_attribute_options(filters)
+        return sidebar
+
+    keys = SIDEBAR_OPTION_KEYS[model_class] + ('filter_counts',)
+    if model_class is Components:
+        keys += ('attributes',)
+    return {key: functools.partial(lambda key: load()[key], key) for key in keys}
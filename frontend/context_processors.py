@@ -0,0 +1,14 @@
+"""
+Template context processors for the frontend app.
+"""
+
+from .models import SiteSettings
+
+
+def site_settings(request):
+    """Expose the cached site settings so views do not query them per request."""
+    settings = SiteSettings.get_settings()
+    return {
+        'site_settings': settings,
+        'show_fair_price': settings.show_fair_price_feature,
+    }
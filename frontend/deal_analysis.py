@@ -0,0 +1,192 @@
+"""
+Batched Deal Decoder analysis.
+
+Takes a whole basket (components, quantities and the bundle price the user
+was offered), prorates the bundle price onto the components and compares
+each component against every current kit deal containing it. Components
+and kit deals are loaded for the whole basket at once, so the number of
+queries does not grow with the basket size, the number of kits or the
+number of retailers. Used by the ``deal_decoder`` page and the
+``api_deal_analysis`` JSON endpoint.
+"""
+
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+
+from toolanalysis.models import Components
+from . import pricing_utils
+
+
+def parse_basket(component_ids, quantities, bundle_price_str):
+    """
+    Validate a submitted basket.
+
+    Returns:
+        tuple: (bundle_price or None, [int quantities], [error messages])
+    """
+    errors = []
+    bundle_price = None
+    if not component_ids or not all(component_ids):
+        errors.append("Please select at least one component.")
+    if not bundle_price_str:
+        errors.append("Please enter a bundle price.")
+
+    try:
+        bundle_price = Decimal(bundle_price_str)
+        if bundle_price <= 0:
+            errors.append("Bundle price must be greater than 0.")
+    except (InvalidOperation, ValueError):
+        errors.append("Please enter a valid bundle price.")
+
+    if len(component_ids) != len(quantities):
+        errors.append("Component and quantity counts do not match.")
+
+    parsed_quantities = []
+    for qty_str in quantities:
+        try:
+            qty = int(qty_str)
+            if qty <= 0:
+                errors.append("All quantities must be greater than 0.")
+            parsed_quantities.append(qty)
+        except (TypeError, ValueError):
+            errors.append("Please enter valid quantities.")
+
+    return bundle_price, parsed_quantities, errors
+
+
+def load_basket_components(component_ids):
+    """
+    Load the basket's components in submission order with one query.
+
+    Returns:
+        tuple: ([Components instances], [error messages])
+    """
+    try:
+        ids = [uuid.UUID(str(component_id)) for component_id in component_ids]
+        components = {
+            component.id: component
+            for component in Components.objects.filter(id__in=ids).select_related('brand')
+        }
+    except (ValueError, ValidationError) as e:
+        return [], [f"Error loading components: {str(e)}"]
+
+    if len(components) != len(ids) or len(set(ids)) != len(ids):
+        return [], ["One or more selected components were not found."]
+    return [components[component_id] for component_id in ids], []
+
+
+def analyze_basket(components, quantities, bundle_price):
+    """
+    Prorate the bundle price and compare every component with current kit deals.
+
+    Args:
+        components: Components instances, in basket order
+        quantities: int quantity per component
+        bundle_price: Decimal price the user was offered for the basket
+
+    Returns:
+        dict: {
+            'selected_components': [{'component', 'standalone_price', 'effective_price', 'weight', 'quantity'}],
+            'comparison_data': {component_id str: {'user_bundle_info': dict, 'comparisons': [dict]}},
+        }
+    """
+    weights = pricing_utils.calculate_proration_weights(
+        (component.id, quantity, component.standalone_price)
+        for component, quantity in zip(components, quantities)
+    )
+    prorated = pricing_utils.apply_proration_weights(weights, bundle_price)
+
+    selected_components = [
+        {
+            'component': component,
+            'standalone_price': component.standalone_price,
+            **prorated[component.id],
+        }
+        for component in components
+    ]
+
+    kit_pricing_by_component = pricing_utils.get_components_kit_pricing(components, sort='best_price')
+
+    comparison_data = {}
+    for bundle_info in selected_components:
+        component = bundle_info['component']
+        user_effective_price = bundle_info['effective_price']
+
+        # Kit deals arrive sorted by effective price (best deals first)
+        comparisons = []
+        for item in kit_pricing_by_component[component.id]:
+            product_effective_price = item['component_pricing']['effective_price']
+            if product_effective_price is None:
+                continue
+            price_difference = user_effective_price - product_effective_price
+            percentage_diff = None
+            if user_effective_price > 0:
+                percentage_diff = (price_difference / user_effective_price) * Decimal('100')
+
+            comparisons.append({
+                'product': item['product'],
+                'pricelisting': item['pricelisting'],
+                'product_component': item['product_component'],
+                'effective_price': product_effective_price,
+                'list_price': item['component_pricing']['list_price'],
+                'price_difference': price_difference,
+                'percentage_diff': percentage_diff,
+                'is_better': price_difference > 0,  # User pays more = product is better deal
+                'is_equal': abs(price_difference) < Decimal('0.01'),
+            })
+
+        # Keyed by string id for template access
+        comparison_data[str(component.id)] = {
+            'user_bundle_info': bundle_info,
+            'comparisons': comparisons,
+        }
+
+    return {
+        'selected_components': selected_components,
+        'comparison_data': comparison_data,
+    }
+
+
+def _price(value):
+    return str(value.quantize(Decimal('0.01'))) if value is not None else None
+
+
+def serialize_analysis(analysis, bundle_price):
+    """Return a JSON-safe version of an analyze_basket result."""
+    components = []
+    for bundle_info in analysis['selected_components']:
+        component = bundle_info['component']
+        comparisons = analysis['comparison_data'][str(component.id)]['comparisons']
+        components.append({
+            'id': str(component.id),
+            'name': component.name,
+            'brand': component.brand.name if component.brand else None,
+            'sku': component.sku,
+            'quantity': bundle_info['quantity'],
+            'standalone_price': _price(bundle_info['standalone_price']),
+            'effective_price': _price(bundle_info['effective_price']),
+            'weight': str(bundle_info['weight']),
+            'comparisons': [
+                {
+                    'product_id': str(item['product'].id),
+                    'product_name': item['product'].name,
+                    'url': f"/product/{item['product'].id}/",
+                    'retailer': item['pricelisting'].retailer.name if item['pricelisting'].retailer else None,
+                    'retailer_url': item['pricelisting'].url,
+                    'kit_price': _price(item['pricelisting'].price),
+                    'quantity': item['product_component'].quantity,
+                    'effective_price': _price(item['effective_price']),
+                    'price_difference': _price(item['price_difference']),
+                    'percentage_diff': _price(item['percentage_diff']),
+                    'is_better': item['is_better'],
+                    'is_equal': item['is_equal'],
+                }
+                for item in comparisons
+            ],
+        })
+    return {
+        'bundle_price': _price(bundle_price),
+        'components': components,
+    }
@@ -0,0 +1,727 @@
+"""
+Data loaders for the product and component detail pages.
+
+``load_product_detail`` fetches everything ``product_detail`` renders in a
+fixed number of queries: the product with its related rows prefetched, the
+designated attributes of every component itemtype in one query and the
+latest listings per retailer; breadcrumbs come from the in-memory taxonomy
+tree (``frontend.taxonomy``). The number of queries does not grow with the
+number of components or retailers, so large combo kits cost the same as a
+bare tool.
+
+``get_product_detail`` caches that context per product in Django's cache.
+The key carries two versions: one per product, bumped by the signal
+receivers in ``frontend.signals`` when the product, its components, their
+attributes or its listings change, and a shared one for lookup tables
+(brands, classes, itemtypes, retailers...) that many products display.
+A warm hit does not touch the database.
+
+``load_component_detail`` does the same for ``component_detail``: the
+component's attributes are read once and split into designated and
+additional ones in memory, and kit pricing comes from the per-component
+cache in ``pricing_utils``.
+
+``load_component_comparison`` builds the ``api_compare_components``
+payload for up to four components in a fixed number of queries, and
+``get_component_comparison`` caches it per id set, versioned like the
+product detail (one version per component plus a shared one).
+
+``load_quick_info`` builds the ``api_quick_info`` tooltip payloads of many
+products or components at once, and ``get_quick_info`` caches them per
+item, so a catalog page can fetch the tooltips of all its cards in one
+request and only the items missing from the cache are loaded.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+
+from toolanalysis.models import (
+    ComponentAttributes, ComponentFeatures, Components, ItemTypes, ProductComponents, Products,
+)
+from . import pricing_utils
+from .cache_utils import VERSION_KEY_PREFIX, bump_version_on_commit, get_version
+from .taxonomy import get_taxonomy
+from .templatetags.product_filters import format_attribute_value_helper
+
+PRODUCT_DETAIL_NAMESPACE = 'product_detail'
+PRODUCT_DETAIL_KEY_PREFIX = 'frontend:product_detail:'
+# Listings age out of the 60 day window without any write, so entries expire
+PRODUCT_DETAIL_TIMEOUT = 60 * 60 * 6
+
+COMPONENT_COMPARE_NAMESPACE = 'component_compare'
+COMPONENT_COMPARE_KEY_PREFIX = 'frontend:component_compare:'
+COMPONENT_COMPARE_TIMEOUT = 60 * 60 * 6
+
+QUICK_INFO_NAMESPACE = 'quick_info'
+QUICK_INFO_KEY_PREFIX = 'frontend:quick_info:'
+# Kit prices age out of the 60 day window without any write, so entries expire
+QUICK_INFO_TIMEOUT = 60 * 60 * 6
+QUICK_INFO_TYPES = ('product', 'component')
+QUICK_INFO_PRICE_LIMIT = 3
+# Enough for every card of a catalog page
+QUICK_INFO_BATCH_LIMIT = 100
+
+UNSORTED = 999999
+BATTERY_CLASSES = ('batteries', 'battery')
+CHARGER_CLASSES = ('chargers', 'charger')
+
+
+def product_detail_queryset():
+    """Products queryset with every relation the detail page touches prefetched."""
+    components = ProductComponents.objects.filter(component__isnull=False).select_related(
+        'component__brand', 'component__componentclass', 'component__motortype'
+    ).prefetch_related('component__componentattributes_set', 'component__itemtypes')
+    return Products.objects.select_related('brand', 'status').prefetch_related(
+        Prefetch('productcomponents_set', queryset=components),
+        'productimages_set',
+        'productaccessories_set',
+        'batteryvoltages',
+        'categories',
+        'subcategories',
+        'itemtypes',
+    )
+
+
+def get_itemtype_attributes(itemtype_ids):
+    """
+    Return the attributes designated for each itemtype, in one query.
+
+    Returns:
+        dict: {itemtype_id: [Attributes instances]}
+    """
+    rows = ItemTypes.attributes.through.objects.filter(
+        itemtypes_id__in=list(itemtype_ids)
+    ).select_related('attributes')
+    attributes = defaultdict(list)
+    for row in rows:
+        attributes[row.itemtypes_id].append(row.attributes)
+    return attributes
+
+
+def _attributes_for_itemtypes(itemtypes, itemtype_attributes):
+    """Distinct attributes of several itemtypes, ordered by name."""
+    attributes = {}
+    for itemtype in itemtypes:
+        for attribute in itemtype_attributes.get(itemtype.id, ()):
+            attributes[attribute.id] = attribute
+    return sorted(attributes.values(), key=lambda attribute: attribute.name or '')
+
+
+def _class_sortorder(componentclass, default=UNSORTED):
+    if componentclass is None or componentclass.sortorder is None:
+        return default
+    return componentclass.sortorder
+
+
+def _breadcrumb_links(item):
+    """Breadcrumb links from the first itemtype of a product or component."""
+    itemtypes = list(item.itemtypes.all())
+    return get_taxonomy().breadcrumb(itemtypes[0] if itemtypes else None)
+
+
+def _component_groups(product_components, component_prices):
+    """Group components by componentclass, batteries and chargers combined."""
+    component_groups = defaultdict(lambda: {
+        'components': [], 'total_quantity': 0, 'total_value': Decimal('0'),
+        'battery_count': 0, 'charger_count': 0,
+    })
+
+    for pc in product_components:
+        componentclass = pc.component.componentclass
+        if componentclass:
+            class_name_lower = componentclass.name.lower()
+            if class_name_lower in BATTERY_CLASSES + CHARGER_CLASSES:
+                group_name = 'Batteries & Chargers'
+                group_sortorder = _class_sortorder(componentclass, UNSORTED - 1)
+                if class_name_lower in BATTERY_CLASSES:
+                    component_groups[group_name]['battery_count'] += 1
+                else:
+                    component_groups[group_name]['charger_count'] += 1
+            else:
+                group_name = componentclass.name
+                group_sortorder = _class_sortorder(componentclass)
+        else:
+            group_name = 'Other'
+            group_sortorder = UNSORTED
+
+        group = component_groups[group_name]
+        group['components'].append(pc)
+        group['total_quantity'] += pc.quantity
+        price_info = component_prices.get(pc.component.id, {})
+        if price_info.get('ext_value'):
+            group['total_value'] += price_info['ext_value']
+        group['sortorder'] = group_sortorder
+
+    ordered_component_groups = []
+    for group_name, group_data in sorted(component_groups.items(), key=lambda x: (x[1]['sortorder'], x[0])):
+        group_components = group_data['components']
+        has_price = [component_prices.get(pc.component.id, {}).get('has_price', False) for pc in group_components]
+        ordered_component_groups.append((
+            group_name,
+            {
+                'components': group_components,
+                'component_count': len(group_components),
+                'total_quantity': group_data['total_quantity'],
+                'total_value': group_data['total_value'] if group_data['total_value'] > Decimal('0') else None,
+                'prices_complete': all(has_price),
+                'has_price_data': any(has_price),
+                'anchor': f"component-group-{group_name.lower().replace(' ', '-').replace('&', 'and')}",
+                'battery_count': group_data['battery_count'],
+                'charger_count': group_data['charger_count'],
+            }
+        ))
+
+    if not ordered_component_groups:
+        ordered_component_groups = [('Included Components', {
+            'components': [],
+            'component_count': 0,
+            'total_quantity': 0,
+            'total_value': None,
+            'prices_complete': False,
+            'has_price_data': False,
+            'anchor': 'component-breakdown',
+        })]
+    return ordered_component_groups
+
+
+def _componentclass_counts(product_components):
+    """Componentclass badge counts as {name: {'count', 'sortorder'}}, batteries and chargers apart."""
+    counts = defaultdict(lambda: {'count': 0, 'sortorder': UNSORTED})
+    for pc in product_components:
+        componentclass = pc.component.componentclass
+        if not componentclass:
+            continue
+        class_name_lower = componentclass.name.lower()
+        if class_name_lower in BATTERY_CLASSES:
+            key = 'Batteries'
+        elif class_name_lower in CHARGER_CLASSES:
+            key = 'Chargers'
+        else:
+            key = componentclass.name
+        counts[key]['count'] += 1
+        if counts[key]['sortorder'] == UNSORTED:
+            counts[key]['sortorder'] = _class_sortorder(componentclass)
+    return dict(counts)
+
+
+def load_product_detail(product_id):
+    """
+    Build the product detail context in a fixed number of queries.
+
+    Breadcrumb links are returned as catalog query strings (``breadcrumb_links``)
+    because absolute URLs depend on the request.
+
+    Returns:
+        dict: template context for frontend/product_detail.html
+    """
+    product = get_object_or_404(product_detail_queryset(), id=product_id)
+    product_components = list(product.productcomponents_set.all())
+
+    itemtype_attributes = get_itemtype_attributes({
+        itemtype.id for pc in product_components for itemtype in pc.component.itemtypes.all()
+    })
+
+    # Pricing computation (standalone_price only) and extended values
+    component_prices = {}
+    prices_complete = True
+    any_price_available = False
+    total_component_quantity = 0
+    for pc in product_components:
+        total_component_quantity += pc.quantity
+        pc.attribute_map = {
+            attr.attribute_id: attr.value
+            for attr in pc.component.componentattributes_set.all()
+        }
+        pc.component_attributes = _attributes_for_itemtypes(pc.component.itemtypes.all(), itemtype_attributes)
+
+        unit_price = pc.component.standalone_price
+        ext_value = None
+        if unit_price is not None:
+            ext_value = unit_price * pc.quantity
+            any_price_available = True
+        else:
+            prices_complete = False
+        component_prices[pc.component.id] = {
+            'price': unit_price,
+            'ext_value': ext_value,
+            'has_price': unit_price is not None,
+            'has_ext_value': ext_value is not None,
+        }
+
+    total_component_value = None
+    if prices_complete and any_price_available:
+        total_component_value = sum(
+            (component_prices[pc.component.id]['ext_value'] for pc in product_components),
+            Decimal('0')
+        )
+
+    # Sort components by componentclass (sortorder, then name), then component name
+    product_components.sort(key=lambda pc: (
+        _class_sortorder(pc.component.componentclass),
+        pc.component.componentclass.name if pc.component.componentclass else '',
+        (pc.component.name or '').lower()
+    ))
+
+    product_image_urls = []
+    if product.image:
+        product_image_urls.append(product.image)
+    product_image_urls.extend(image.image for image in product.productimages_set.all())
+
+    # Component summary rows (flat list, no grouping)
+    component_summary_rows = []
+    for pc in product_components:
+        component = pc.component
+        price_info = component_prices[component.id]
+        component_summary_rows.append({
+            'component_id': component.id,
+            'name': component.name,
+            'brand': component.brand.name if component.brand else '',
+            'sku': component.sku or '',
+            'quantity': pc.quantity,
+            'quantity_list': list(range(pc.quantity)) if pc.quantity and pc.quantity > 0 else [],
+            'image': component.image,
+            'unit_price': price_info['price'],
+            'ext_value': price_info['ext_value'],
+            'has_price': price_info['has_price'],
+            'has_ext_value': price_info['has_ext_value'],
+            'componentclass_name': component.componentclass.name if component.componentclass else None,
+            'componentclass_id': str(component.componentclass.id) if component.componentclass else None,
+            'retailer_pricing': {},
+        })
+
+    # Latest listing per retailer; proration weights come from the loaded components
+    latest_pricelistings = pricing_utils.get_latest_product_pricelistings(product, days=60)
+    weights = pricing_utils.calculate_proration_weights(
+        (pc.component.id, pc.quantity, pc.component.standalone_price) for pc in product_components
+    )
+
+    retailers_data = []
+    for retailer_id, pricelisting in latest_pricelistings.items():
+        retailer = pricelisting.retailer
+        retailer_key = str(retailer.id) if retailer else 'none'
+
+        # Compare kit price vs total component value
+        discount_info = {}
+        if total_component_value and total_component_value > Decimal('0') and pricelisting.price:
+            total_savings = total_component_value - pricelisting.price
+            if total_savings > Decimal('0'):
+                discount_info = {
+                    'has_discount': True,
+                    'percentage': (total_savings / total_component_value) * Decimal('100'),
+                    'savings': total_savings,
+                }
+
+        retailers_data.append({
+            'id': retailer_key,
+            'retailer': retailer,
+            'pricelisting': pricelisting,
+            'price': pricelisting.price,
+            'url': pricelisting.url,
+            'datepulled': pricelisting.datepulled,
+            'discount_info': discount_info,
+        })
+
+        prorated_prices = pricing_utils.apply_proration_weights(weights, pricelisting.price)
+        for row in component_summary_rows:
+            row['retailer_pricing'][retailer_key] = {
+                'effective_price': prorated_prices.get(row['component_id'], {}).get('effective_price'),
+            }
+
+    ordered_component_groups = _component_groups(product_components, component_prices)
+    componentclass_counts = _componentclass_counts(product_components)
+
+    try:
+        breadcrumb_links = _breadcrumb_links(product)
+    except Exception:
+        breadcrumb_links = []
+
+    return {
+        'product': product,
+        'ordered_component_groups': ordered_component_groups,
+        'component_products': {},
+        'current_filters': {'sort': 'name', 'sort_direction': 'asc'},
+        'component_prices': component_prices,
+        'prices_complete': prices_complete,
+        'total_component_value': total_component_value,
+        'total_component_quantity': total_component_quantity,
+        'component_count': len(product_components),
+        'component_group_count': len(ordered_component_groups),
+        'has_component_prices': any_price_available,
+        'show_total_component_value': prices_complete and total_component_value is not None,
+        'product_image_urls': product_image_urls,
+        'component_summary_rows': component_summary_rows,
+        'retailers_data': retailers_data,
+        'componentclass_counts': componentclass_counts,
+        'ordered_componentclass_counts': sorted(
+            componentclass_counts.items(), key=lambda x: (x[1]['sortorder'], x[0])
+        ),
+        'product_accessories': sorted(
+            product.productaccessories_set.all(), key=lambda accessory: accessory.name or ''
+        ),
+        'breadcrumb_links': breadcrumb_links,
+    }
+
+
+def component_detail_queryset():
+    """Components queryset with every relation the detail page touches prefetched."""
+    return Components.objects.select_related(
+        'brand', 'motortype', 'listingtype'
+    ).prefetch_related('itemtypes', 'batteryvoltages', 'batteryplatforms', 'productlines')
+
+
+def load_component_detail(component_id):
+    """
+    Build the component detail context in a fixed number of queries.
+
+    Attributes designated by the component's itemtypes are ``important``,
+    the rest ``additional``; both keep the attribute ordering.
+
+    Returns:
+        dict: template context for frontend/component_detail.html,
+              with ``breadcrumb_links`` as in load_product_detail
+    """
+    component = get_object_or_404(component_detail_queryset(), id=component_id)
+
+    itemtype_attributes = get_itemtype_attributes(itemtype.id for itemtype in component.itemtypes.all())
+    designated = {
+        attribute.id
+        for attributes in itemtype_attributes.values()
+        for attribute in attributes
+    }
+    important_attributes = []
+    additional_attributes = []
+    for component_attribute in ComponentAttributes.objects.filter(component=component).select_related('attribute'):
+        if component_attribute.attribute_id in designated:
+            important_attributes.append(component_attribute)
+        else:
+            additional_attributes.append(component_attribute)
+
+    try:
+        breadcrumb_links = _breadcrumb_links(component)
+    except Exception:
+        breadcrumb_links = []
+
+    return {
+        'component': component,
+        'important_attributes': important_attributes,
+        'additional_attributes': additional_attributes,
+        'component_features': list(
+            ComponentFeatures.objects.filter(component=component).select_related('feature')
+        ),
+        'product_components': list(
+            ProductComponents.objects.filter(component=component).select_related(
+                'product__brand'
+            ).prefetch_related('product__productimages_set')
+        ),
+        'kit_pricing_data': pricing_utils.get_cached_component_kit_pricing(component),
+        'breadcrumb_links': breadcrumb_links,
+    }
+
+
+def _product_namespace(product_id):
+    return f'{PRODUCT_DETAIL_NAMESPACE}:{product_id}'
+
+
+def get_product_detail(product_id):
+    """Cached load_product_detail, keyed by the product and shared versions."""
+    namespaces = [PRODUCT_DETAIL_NAMESPACE, _product_namespace(product_id)]
+    versions = cache.get_many([f'{VERSION_KEY_PREFIX}{namespace}' for namespace in namespaces])
+    if len(versions) == len(namespaces):
+        versions = [versions[f'{VERSION_KEY_PREFIX}{namespace}'] for namespace in namespaces]
+    else:
+        versions = [get_version(namespace) for namespace in namespaces]
+
+    key = f'{PRODUCT_DETAIL_KEY_PREFIX}{product_id}:{":".join(versions)}'
+    context = cache.get(key)
+    if context is None:
+        context = load_product_detail(product_id)
+        cache.set(key, context, PRODUCT_DETAIL_TIMEOUT)
+    return context
+
+
+def invalidate_product_detail(product_ids=None):
+    """Drop the cached detail of the given products, or of every product when None."""
+    if product_ids is None:
+        bump_version_on_commit(PRODUCT_DETAIL_NAMESPACE)
+    else:
+        namespaces = {_product_namespace(product_id) for product_id in product_ids if product_id}
+        if namespaces:
+            bump_version_on_commit(*namespaces)
+
+
+def _comparison_attributes(component_attributes, designated_ids):
+    """Split a component's attributes into ({name: cell} important, {name: cell} additional)."""
+    important = {}
+    additional = {}
+    for attr in component_attributes:
+        cells = important if attr.attribute_id in designated_ids else additional
+        cells[attr.attribute.name] = {
+            'value': format_attribute_value_helper(attr) if attr.value else 'N/A',
+            'unit': attr.attribute.unit or '',
+        }
+    return important, additional
+
+
+def _fair_price(component):
+    narrative = component.fair_price_narrative
+    if not isinstance(narrative, dict) or not narrative.get('fair_price'):
+        return None
+    return {
+        'price': narrative.get('fair_price'),
+        'reasoning': narrative.get('reasoning', ''),
+        'pros': narrative.get('pros', []),
+        'cons': narrative.get('cons', []),
+        'market_notes': narrative.get('market_notes', ''),
+    }
+
+
+def load_component_comparison(component_ids):
+    """
+    Build the comparison payload of the given components, in a fixed number of queries.
+
+    Attributes designated by a component's itemtypes are "important", the
+    others "additional". ``common_attributes`` lists the important names
+    and then the additional names, each sorted; ``all_attributes`` lists
+    every name once, typed and united from the first component (by name)
+    that has it.
+
+    Returns:
+        dict: {'components', 'common_attributes', 'all_attributes'}, or None if no component exists
+    """
+    components = list(
+        Components.objects.filter(id__in=list(component_ids)).select_related('brand').prefetch_related(
+            'batteryvoltages', 'batteryplatforms', 'categories', 'itemtypes', 'productlines',
+            Prefetch('componentattributes_set', queryset=ComponentAttributes.objects.select_related('attribute')),
+        ).order_by('name')
+    )
+    if not components:
+        return None
+
+    itemtype_attributes = get_itemtype_attributes(
+        {itemtype.id for component in components for itemtype in component.itemtypes.all()}
+    )
+
+    comparison = {'components': [], 'common_attributes': [], 'all_attributes': []}
+    first_seen = {}
+    for component in components:
+        designated_ids = {
+            attribute.id
+            for itemtype in component.itemtypes.all()
+            for attribute in itemtype_attributes.get(itemtype.id, ())
+        }
+        important, additional = _comparison_attributes(component.componentattributes_set.all(), designated_ids)
+        for attribute_type, cells in (('important', important), ('additional', additional)):
+            for name, cell in cells.items():
+                first_seen.setdefault(name, {'name': name, 'unit': cell['unit'], 'type': attribute_type})
+
+        comparison['components'].append({
+            'id': str(component.id),
+            'name': component.name,
+            'description': component.description or '',
+            'sku': component.sku or '',
+            'brand': component.brand.name if component.brand else '',
+            'image': component.image or '',
+            'voltage': [str(v.value) for v in component.batteryvoltages.all()],
+            'platform': [p.name for p in component.batteryplatforms.all()],
+            'product_lines': [pl.name for pl in component.productlines.all()],
+            'categories': [c.name for c in component.categories.all()],
+            'important_attributes': important,
+            'additional_attributes': additional,
+            'fair_price': _fair_price(component),
+        })
+
+    for attribute_type in ('important', 'additional'):
+        units = {}
+        for data in comparison['components']:
+            for name, cell in data[f'{attribute_type}_attributes'].items():
+                units.setdefault(name, cell['unit'])
+        comparison['common_attributes'].extend(
+            {'name': name, 'unit': units[name], 'type': attribute_type} for name in sorted(units)
+        )
+    comparison['all_attributes'] = [first_seen[name] for name in sorted(first_seen)]
+    return comparison
+
+
+def _component_compare_namespace(component_id):
+    return f'{COMPONENT_COMPARE_NAMESPACE}:{component_id}'
+
+
+def get_component_comparison(component_ids):
+    """Cached load_component_comparison, keyed by the id set and its versions."""
+    component_ids = sorted({str(component_id) for component_id in component_ids})
+    namespaces = [COMPONENT_COMPARE_NAMESPACE, *map(_component_compare_namespace, component_ids)]
+    versions = cache.get_many([f'{VERSION_KEY_PREFIX}{namespace}' for namespace in namespaces])
+    if len(versions) == len(namespaces):
+        versions = [versions[f'{VERSION_KEY_PREFIX}{namespace}'] for namespace in namespaces]
+    else:
+        versions = [get_version(namespace) for namespace in namespaces]
+
+    key = f'{COMPONENT_COMPARE_KEY_PREFIX}{",".join(component_ids)}:{":".join(versions)}'
+    comparison = cache.get(key)
+    if comparison is None:
+        comparison = load_component_comparison(component_ids)
+        cache.set(key, comparison, COMPONENT_COMPARE_TIMEOUT)
+    return comparison
+
+
+def invalidate_component_comparison(component_ids=None):
+    """Drop cached comparisons including the given components, or every comparison when None."""
+    if component_ids is None:
+        bump_version_on_commit(COMPONENT_COMPARE_NAMESPACE)
+    else:
+        namespaces = {_component_compare_namespace(component_id) for component_id in component_ids if component_id}
+        if namespaces:
+            bump_version_on_commit(*namespaces)
+
+
+def _product_quick_info(product):
+    return {
+        'name': product.name,
+        'brand': product.brand.name if product.brand else '',
+        'sku': product.sku or '',
+        'status': product.status.name if product.status else '',
+        'image': product.image or '',
+        'description': product.description or '',
+        'battery_platforms': [platform.name for platform in product.batteryplatforms.all()],
+        'components': [
+            {
+                'name': product_component.component.name,
+                'quantity': product_component.quantity,
+                'sku': product_component.component.sku or '',
+                'url': f'/components/{product_component.component.id}/',
+            }
+            for product_component in product.productcomponents_set.all()
+        ],
+        'url': f'/product/{product.id}/',
+    }
+
+
+def _component_quick_info(component, designated_ids, kit_pricing):
+    lowest_price_products = []
+    for item in kit_pricing:
+        product = item['product']
+        pricelisting = item['pricelisting']
+        retailer = pricelisting.retailer
+        lowest_price_products.append({
+            'name': product.name,
+            'url': f'/product/{product.id}/',
+            'effective_price': str(item['component_pricing']['effective_price']),
+            'kit_price': str(pricelisting.price),
+            'retailer': retailer.name if retailer else None,
+            'retailer_url': pricelisting.url if pricelisting.url else None,
+            'retailer_logo': retailer.logo if retailer and retailer.logo else None,
+            'image': product.image or '',
+        })
+
+    return {
+        'name': component.name,
+        'brand': component.brand.name if component.brand else '',
+        'sku': component.sku or '',
+        'image': component.image or '',
+        'description': component.description or '',
+        'motor_type': component.motortype.name if component.motortype else None,
+        'key_attributes': [
+            {
+                'name': attr.attribute.name,
+                'value': format_attribute_value_helper(attr) if attr.value else 'N/A',
+                'unit': attr.attribute.unit or '',
+            }
+            for attr in component.componentattributes_set.all()
+            if attr.attribute_id in designated_ids
+        ],
+        'features': [
+            {'name': comp_feature.feature.name, 'value': comp_feature.value or 'Yes'}
+            for comp_feature in component.componentfeatures_set.all()
+        ],
+        'lowest_price_products': lowest_price_products,
+        'url': f'/components/{component.id}/',
+    }
+
+
+def load_quick_info(item_type, item_ids):
+    """
+    Build the tooltip payloads of many products or components, in a fixed number of queries.
+
+    Components list the attributes designated by their itemtypes and their
+    three kits with the lowest effective price.
+
+    Returns:
+        dict: {item id (str): payload}; ids that do not exist are left out
+    """
+    item_ids = list(item_ids)
+    if item_type == 'product':
+        products = Products.objects.filter(id__in=item_ids).select_related('brand', 'status').prefetch_related(
+            'batteryplatforms', 'productcomponents_set__component'
+        )
+        return {str(product.id): _product_quick_info(product) for product in products}
+
+    components = list(
+        Components.objects.filter(id__in=item_ids).select_related('brand', 'motortype').prefetch_related(
+            'itemtypes',
+            Prefetch('componentattributes_set', queryset=ComponentAttributes.objects.select_related('attribute')),
+            Prefetch('componentfeatures_set', queryset=ComponentFeatures.objects.select_related('feature')),
+        )
+    )
+    itemtype_attributes = get_itemtype_attributes(
+        {itemtype.id for component in components for itemtype in component.itemtypes.all()}
+    )
+    kit_pricing = pricing_utils.get_components_kit_pricing(
+        components, sort='best_price', limit=QUICK_INFO_PRICE_LIMIT
+    )
+    payloads = {}
+    for component in components:
+        designated_ids = {
+            attribute.id
+            for itemtype in component.itemtypes.all()
+            for attribute in itemtype_attributes.get(itemtype.id, ())
+        }
+        payloads[str(component.id)] = _component_quick_info(component, designated_ids, kit_pricing[component.id])
+    return payloads
+
+
+def _quick_info_namespace(item_type, item_id):
+    return f'{QUICK_INFO_NAMESPACE}:{item_type}:{item_id}'
+
+
+def get_quick_info(item_type, item_ids):
+    """
+    Cached load_quick_info, one entry per item keyed by its version and the shared one.
+
+    Only the items missing from the cache are loaded, in a single batch.
+    """
+    item_ids = list(dict.fromkeys(str(item_id) for item_id in item_ids))
+    namespaces = [QUICK_INFO_NAMESPACE, *(_quick_info_namespace(item_type, item_id) for item_id in item_ids)]
+    versions = cache.get_many([f'{VERSION_KEY_PREFIX}{namespace}' for namespace in namespaces])
+    versions = [
+        versions.get(f'{VERSION_KEY_PREFIX}{namespace}') or get_version(namespace)
+        for namespace in namespaces
+    ]
+
+    shared_version, item_versions = versions[0], versions[1:]
+    keys = {
+        item_id: f'{QUICK_INFO_KEY_PREFIX}{item_type}:{item_id}:{shared_version}:{version}'
+        for item_id, version in zip(item_ids, item_versions)
+    }
+    found = cache.get_many(keys.values())
+    payloads = {item_id: found[key] for item_id, key in keys.items() if key in found}
+
+    missing = [item_id for item_id in item_ids if item_id not in payloads]
+    if missing:
+        loaded = load_quick_info(item_type, missing)
+        cache.set_many({keys[item_id]: payload for item_id, payload in loaded.items()}, QUICK_INFO_TIMEOUT)
+        payloads.update(loaded)
+    return {item_id: payloads[item_id] for item_id in item_ids if item_id in payloads}
+
+
+def invalidate_quick_info(item_type=None, item_ids=None):
+    """Drop the cached tooltips of the given products or components, or every tooltip when item_ids is None."""
+    if item_ids is None:
+        bump_version_on_commit(QUICK_INFO_NAMESPACE)
+    else:
+        namespaces = {_quick_info_namespace(item_type, item_id) for item_id in item_ids if item_id}
+        if namespaces:
+            bump_version_on_commit(*namespaces)
@@ -0,0 +1,240 @@
+"""
+Single-pass facet engine for the product and component catalogs.
+
+The catalog sidebar shows, for every facet (brand, voltage, platform, ...),
+the values that are still reachable given the *other* active filters, so a
+facet never narrows itself. Instead of building one filtered queryset per
+facet, this module loads every item/value membership for the candidate
+items and evaluates all facets in a single pass. Memberships come from the
+process-local bitmap index in ``catalog_index``, or from one grouped SQL
+statement when the index is disabled.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db.models import CharField, Value
+
+from toolanalysis.models import (
+    Products, Components, Brands, BatteryVoltages, BatteryPlatforms,
+    Categories, Subcategories, ItemTypes, Statuses, ProductLines, Features,
+    MotorTypes, ComponentFeatures
+)
+from . import catalog_index
+from .taxonomy import get_taxonomy
+
+
+class FacetSpec:
+    """Describes one sidebar facet and where its memberships live."""
+
+    def __init__(self, key, filter_key, value_model, ordering, column=None, relation=None):
+        self.key = key                  # filter_options key, e.g. 'brands'
+        self.filter_key = filter_key    # parsed filter key, e.g. 'brand_ids'
+        self.value_model = value_model  # model rendered in the sidebar
+        self.ordering = ordering        # sidebar ordering of the value model
+        self.column = column            # FK column on the item table
+        self.relation = relation        # M2M field name on the item model
+
+
+_COMMON_FACETS = [
+    FacetSpec('brands', 'brand_ids', Brands, ('name',), column='brand_id'),
+    FacetSpec('voltages', 'voltage_ids', BatteryVoltages, ('value',), relation='batteryvoltages'),
+    FacetSpec('platforms', 'platform_ids', BatteryPlatforms, ('name',), relation='batteryplatforms'),
+    FacetSpec('categories', 'category_ids', Categories, ('sortorder', 'name'), relation='categories'),
+    FacetSpec('subcategories', 'subcategory_ids', Subcategories, ('sortorder', 'name'), relation='subcategories'),
+    FacetSpec('itemtypes', 'itemtype_ids', ItemTypes, ('sortorder', 'name'), relation='itemtypes'),
+    FacetSpec('motor_types', 'motor_type_ids', MotorTypes, ('sortorder', 'name'), column='motortype_id'),
+]
+
+FACET_SPECS = {
+    Products: _COMMON_FACETS + [
+        FacetSpec('statuses', 'status_ids', Statuses, ('name',), column='status_id'),
+    ],
+    Components: _COMMON_FACETS + [
+        FacetSpec('product_lines', 'product_line_ids', ProductLines, ('name',), relation='productlines'),
+    ],
+}
+
+# Features are narrowed by every active filter (including their own), and the
+# currently selected features always stay visible so they can be unchecked.
+FEATURES_KEY = 'features'
+
+
+def facet_filter_keys(model_class):
+    """Return the parsed filter keys that are evaluated as facets for a model."""
+    return [spec.filter_key for spec in FACET_SPECS[model_class]]
+
+
+def compute_facets(model_class, filters):
+    """
+    Compute every facet's available values and per-value item counts.
+
+    Each facet is evaluated against the items matching all active filters
+    except that facet's own selection. Facet selections are answered by the
+    in-memory catalog index when it is enabled; search goes through the
+    search document index and release dates are applied in SQL.
+
+    Returns:
+        dict: {facet_key: [value model instances with an ``item_count`` attribute]}
+    """
+    if catalog_index.is_enabled():
+        return _compute_from_index(model_class, filters)
+    return _compute_from_sql(model_class, filters)
+
+
+def _compute_from_index(model_class, filters):
+    """Evaluate all facets with bitmap intersections over the catalog index."""
+    from .catalog_utils import index_filter_bitmap
+
+    index = catalog_index.get_catalog_index(model_class)
+    specs = FACET_SPECS[model_class]
+
+    base = index_filter_bitmap(model_class, filters, exclude=facet_filter_keys(model_class))
+
+    selections = {
+        spec.key: index.union(spec.key, filters[spec.filter_key])
+        for spec in specs
+        if filters.get(spec.filter_key)
+    }
+
+    facets = {}
+    for spec in specs:
+        mask = base
+        for key, selected in selections.items():
+            if key != spec.key:
+                mask &= selected
+        facets[spec.key] = index.options(spec.key, index.facet_counts(spec.key, mask))
+
+    if model_class == Components:
+        mask = base
+        for selected in selections.values():
+            mask &= selected
+        feature_counts = index.facet_counts(FEATURES_KEY, mask)
+        facets[FEATURES_KEY] = index.options(
+            FEATURES_KEY, feature_counts, extra_ids=set(filters.get('feature_ids') or [])
+        )
+
+    return facets
+
+
+def _compute_from_sql(model_class, filters):
+    """Evaluate all facets from one grouped membership query."""
+    # Imported here to avoid a circular import with catalog_utils
+    from .catalog_utils import build_filter_query
+
+    specs = FACET_SPECS[model_class]
+    base_filters = {k: v for k, v in filters.items() if k not in facet_filter_keys(model_class)}
+    base_queryset = build_filter_query(model_class, base_filters)
+
+    memberships = _load_memberships(model_class, specs, base_queryset)
+
+    selections = {
+        spec.key: set(filters.get(spec.filter_key) or [])
+        for spec in specs
+        if filters.get(spec.filter_key)
+    }
+    counts = _count_facets(specs, memberships, selections, model_class == Components)
+
+    facets = {}
+    for spec in specs:
+        facets[spec.key] = _hydrate(spec.value_model, spec.ordering, counts[spec.key])
+
+    if model_class == Components:
+        feature_counts = counts[FEATURES_KEY]
+        for feature_id in filters.get('feature_ids', []):
+            feature_counts.setdefault(feature_id, 0)
+        facets[FEATURES_KEY] = _hydrate(Features, ('sortorder', 'name'), feature_counts)
+
+    return facets
+
+
+def _load_memberships(model_class, specs, base_queryset):
+    """
+    Load {item_id: {facet_key: set(value_ids)}} for the candidate items.
+
+    FK facets come from the item rows themselves; all M2M facets are read in
+    one UNION ALL over the through tables.
+    """
+    fk_specs = [spec for spec in specs if spec.column]
+    memberships = defaultdict(lambda: defaultdict(set))
+
+    fk_columns = [spec.column for spec in fk_specs]
+    for row in base_queryset.order_by().values_list('id', *fk_columns).distinct():
+        item = memberships[row[0]]
+        for spec, value_id in zip(fk_specs, row[1:]):
+            if value_id is not None:
+                item[spec.key].add(value_id)
+
+    if not memberships:
+        return memberships
+
+    base_ids = base_queryset.order_by().values('id')
+    parts = []
+    for spec in specs:
+        if not spec.relation:
+            continue
+        field = model_class._meta.get_field(spec.relation)
+        through = field.remote_field.through
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+        parts.append(
+            through.objects.filter(**{f'{source}__in': base_ids})
+            .order_by()
+            .annotate(facet=Value(spec.key, output_field=CharField()))
+            .values_list(source, target, 'facet')
+        )
+    if model_class == Components:
+        parts.append(
+            ComponentFeatures.objects.filter(component_id__in=base_ids)
+            .order_by()
+            .annotate(facet=Value(FEATURES_KEY, output_field=CharField()))
+            .values_list('component_id', 'feature_id', 'facet')
+        )
+
+    if parts:
+        union = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+        for item_id, value_id, facet_key in union:
+            memberships[item_id][facet_key].add(value_id)
+
+    # Items count towards the categories and subcategories above their tags, as in the index
+    taxonomy = get_taxonomy()
+    for item in memberships.values():
+        taxonomy.expand_memberships(item)
+
+    return memberships
+
+
+def _count_facets(specs, memberships, selections, include_features):
+    """
+    Count facet values in one pass over the candidate items.
+
+    An item that satisfies every selection counts towards all facets. An item
+    that fails exactly one selection still counts towards that facet, which is
+    what "exclude this facet's own selection" means. Items failing two or more
+    selections are not reachable from any facet.
+    """
+    counts = {spec.key: Counter() for spec in specs}
+    if include_features:
+        counts[FEATURES_KEY] = Counter()
+
+    for item in memberships.values():
+        failing = [
+            key for key, selected in selections.items()
+            if not (item.get(key, frozenset()) & selected)
+        ]
+        if len(failing) > 1:
+            continue
+        keys = failing if failing else counts.keys()
+        for key in keys:
+            counts[key].update(item.get(key, ()))
+
+    return counts
+
+
+def _hydrate(value_model, ordering, value_counts):
+    """Fetch the value rows for a facet in sidebar order, annotated with counts."""
+    if not value_counts:
+        return []
+    values = list(value_model.objects.filter(id__in=list(value_counts)).order_by(*ordering))
+    for value in values:
+        value.item_count = value_counts[value.id]
+    return values
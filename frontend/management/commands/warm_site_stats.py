@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from frontend.site_stats import warm_site_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the cached home/about page statistics and home page sections (run after deploys)'
+
+    def handle(self, *args, **options):
+        values = warm_site_stats()
+        stats = values['stats']
+        self.stdout.write(self.style.SUCCESS(
+            f"Cached site statistics: {stats['total_products']} products, "
+            f"{stats['total_components']} components, {stats['total_brands']} brands, "
+            f"{stats['total_categories']} categories"
+        ))
@@ -2,6 +2,8 @@ from django.db import models
 from django.utils import timezone
 from django.utils.text import slugify
 
+from .cache_utils import VersionedLoader
+
 # Create your models here.
 
 class SiteSettings(models.Model):
@@ -29,10 +31,23 @@ class SiteSettings(models.Model):
     
     @classmethod
     def get_settings(cls):
-        """Get the site settings instance, creating it if it doesn't exist"""
+        """
+        Get the site settings instance, creating it if it doesn't exist.
+        
+        The instance is cached per process and reloaded after the
+        ``site_settings`` namespace is bumped on save (see frontend.signals).
+        """
+        return _site_settings_loader.get()
+
+    @classmethod
+    def load_settings(cls):
+        """Read the site settings instance from the database, creating it if needed."""
         settings, created = cls.objects.get_or_create(pk=1)
         return settings
 
+SITE_SETTINGS_NAMESPACE = 'site_settings'
+_site_settings_loader = VersionedLoader(SITE_SETTINGS_NAMESPACE, SiteSettings.load_settings)
+
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(unique=True, max_length=50)
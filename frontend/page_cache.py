@@ -0,0 +1,164 @@
+"""
+Full-page and fragment caching for anonymous GET traffic.
+
+``cache_public_page`` caches whole responses of the public catalog pages.
+Keys are built from the view name, the scheme, host and path and the
+normalized query string (parameters and multi-select values sorted,
+tracking parameters dropped), so ``?brand[]=a&category[]=b`` and ``?category[]=b&brand[]=a``
+share an entry.
+
+Every entry records the versions of its tags (``catalog``, ``articles``,
+``settings``) at render time. The signal receivers in ``frontend.signals``
+bump a tag when its models are written. An entry whose tags moved, or
+which is older than the view's timeout, is stale: for ``stale_timeout``
+more seconds it is still served while a single request (holding a short
+lock) re-renders it, so a burst of traffic after an import does not
+re-render the same page many times over.
+
+Requests carrying a session or messages cookie, non-GET requests and
+responses that are not plain 200s or that set cookies bypass the cache.
+The ``cachefragment`` template tag (``frontend.templatetags.page_cache``)
+caches heavy template blocks such as the filter sidebar with the same
+keys and tags. Everything goes through Django's default cache, so the
+local-memory and file backends work as well as Redis.
+"""
+
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .cache_utils import VERSION_KEY_PREFIX, bump_version_on_commit, get_version
+
+PAGE_KEY_PREFIX = 'frontend:page:'
+FRAGMENT_KEY_PREFIX = 'frontend:fragment:'
+TAG_NAMESPACE_PREFIX = 'page_tag:'
+REVALIDATE_LOCK_TIMEOUT = 30
+DEFAULT_STALE_TIMEOUT = 60 * 10
+
+# Query parameters that never change the rendered page
+IGNORED_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid')
+# Parameters that only move between result pages
+PAGING_PARAMS = ('page', 'page_size', 'cursor')
+
+CACHE_HEADER = 'X-Page-Cache'
+
+
+def is_enabled():
+    return getattr(settings, 'PAGE_CACHE_ENABLED', True)
+
+
+def normalized_query(query_dict, exclude=()):
+    """Return the query string with parameters and their values in a fixed order."""
+    items = []
+    for key in sorted(query_dict.keys()):
+        if key in IGNORED_PARAMS or key in exclude:
+            continue
+        for value in sorted(query_dict.getlist(key)):
+            items.append((key, value))
+    return urlencode(items)
+
+
+def tag_versions(tags):
+    """Return the current version token of each tag, in order."""
+    namespaces = [f'{TAG_NAMESPACE_PREFIX}{tag}' for tag in tags]
+    found = cache.get_many([f'{VERSION_KEY_PREFIX}{namespace}' for namespace in namespaces])
+    return tuple(
+        found.get(f'{VERSION_KEY_PREFIX}{namespace}') or get_version(namespace)
+        for namespace in namespaces
+    )
+
+
+def invalidate_tags(*tags):
+    """Mark every page and fragment rendered with any of the tags as stale."""
+    bump_version_on_commit(*(f'{TAG_NAMESPACE_PREFIX}{tag}' for tag in tags))
+
+
+def is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    cookies = request.COOKIES
+    return settings.SESSION_COOKIE_NAME not in cookies and 'messages' not in cookies
+
+
+def _digest(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def _page_key(view_name, request):
+    # Pages render absolute URLs (breadcrumbs), so each host and scheme gets its own entry
+    url = f'{request.scheme}://{request.get_host()}{request.path}?{normalized_query(request.GET)}'
+    return f'{PAGE_KEY_PREFIX}{view_name}:{_digest(url)}'
+
+
+def _cached_response(entry, state):
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for header, value in entry['headers']:
+        response[header] = value
+    response[CACHE_HEADER] = state
+    return response
+
+
+def cache_public_page(timeout, tags=('catalog',), stale_timeout=DEFAULT_STALE_TIMEOUT):
+    """
+    Cache an anonymous GET view for ``timeout`` seconds.
+
+    Args:
+        timeout: seconds an entry is served as fresh
+        tags: invalidation tags the page depends on
+        stale_timeout: seconds a stale entry may still be served while it is re-rendered
+    """
+    def decorator(view_func):
+        view_name = f'{view_func.__module__}.{view_func.__name__}'
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not is_enabled() or not is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            key = _page_key(view_name, request)
+            versions = tag_versions(tags)
+            entry = cache.get(key)
+            if entry is not None:
+                if entry['versions'] == versions and time.time() - entry['created'] < timeout:
+                    return _cached_response(entry, 'HIT')
+                # Stale: only the request that takes the lock re-renders
+                if not cache.add(f'{key}:lock', True, REVALIDATE_LOCK_TIMEOUT):
+                    return _cached_response(entry, 'STALE')
+
+            try:
+                response = view_func(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response = response.render()
+                if response.status_code == 200 and not response.streaming and not response.cookies:
+                    cache.set(key, {
+                        'content': response.content,
+                        'status': response.status_code,
+                        'headers': [
+                            (header, value) for header, value in response.items()
+                            if header.lower() in ('content-type', 'content-language', 'vary')
+                        ],
+                        'versions': versions,
+                        'created': time.time(),
+                    }, timeout + stale_timeout)
+                    response[CACHE_HEADER] = 'MISS'
+            finally:
+                if entry is not None:
+                    cache.delete(f'{key}:lock')
+            return response
+        return wrapper
+    return decorator
+
+
+def fragment_key(name, tags, vary_on, request=None):
+    """Cache key of a template fragment, including its tag versions and the request query."""
+    origin = query = ''
+    if request is not None:
+        origin = f'{request.scheme}://{request.get_host()}'
+        query = normalized_query(request.GET, exclude=PAGING_PARAMS)
+    parts = [name, *tag_versions(tags), origin, query, *(str(value) for value in vary_on)]
+    return f'{FRAGMENT_KEY_PREFIX}{name}:{_digest("|".join(parts))}'
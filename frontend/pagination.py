@@ -0,0 +1,291 @@
+"""
+Pagination helpers for the catalog, learning and JSON views.
+
+``CachedCountPaginator`` is a drop-in replacement for Django's Paginator
+whose total is cached, so paging through a filtered catalog does not rerun
+COUNT(*) over the same query on every request.
+
+``CursorPaginator`` is the opt-in keyset mode. Instead of an OFFSET, each
+page is fetched with a WHERE on the sort key of the boundary row of the
+previous page, so deep pages and infinite scroll cost the same as the first
+page. Cursors are opaque signed tokens carrying those boundary values; a
+cursor that is tampered with or was issued for another sort order simply
+yields the first page.
+"""
+
+import datetime
+import hashlib
+import uuid
+from decimal import Decimal
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+from django.utils.functional import cached_property
+
+from .cache_utils import get_version
+
+COUNT_CACHE_TIMEOUT = 300
+COUNT_KEY_PREFIX = 'frontend:count:'
+CURSOR_SALT = 'frontend.pagination.cursor'
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator whose ``count`` is cached per SQL query.
+
+    When ``namespace`` is given, its version is part of the cache key so the
+    count is recomputed as soon as the namespace is bumped; otherwise it is
+    only as fresh as ``timeout``.
+    """
+
+    def __init__(self, object_list, per_page, namespace=None, timeout=COUNT_CACHE_TIMEOUT, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.namespace = namespace
+        self.timeout = timeout
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return len(self.object_list)
+
+        sql, params = query.sql_with_params()
+        fingerprint = hashlib.md5(f'{self.object_list.db}:{sql}:{params!r}'.encode()).hexdigest()
+        version = get_version(self.namespace) if self.namespace else ''
+        key = f'{COUNT_KEY_PREFIX}{version}:{fingerprint}'
+
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, self.timeout)
+        return count
+
+
+def _ordering_keys(queryset):
+    """
+    Return the queryset ordering as ``[(field, descending, nulls_first)]``.
+
+    Orderings without an explicit NULL position get the PostgreSQL default
+    (NULLs sort as the largest value). The primary key is appended when it
+    is not already part of the ordering so every row has a unique position.
+    """
+    model = queryset.model
+    pk_name = model._meta.pk.name
+    ordering = list(queryset.query.order_by) or list(model._meta.ordering)
+
+    keys = []
+    for item in ordering:
+        if isinstance(item, str):
+            descending = item.startswith('-')
+            field = item.lstrip('-')
+            nulls_first = descending
+        elif isinstance(item, OrderBy) and isinstance(item.expression, F):
+            field = item.expression.name
+            descending = item.descending
+            if item.nulls_first or item.nulls_last:
+                nulls_first = bool(item.nulls_first)
+            else:
+                nulls_first = descending
+        elif isinstance(item, F):
+            field, descending, nulls_first = item.name, False, False
+        else:
+            raise ValueError(f'Cursor pagination cannot order by {item!r}')
+        if field == '?':
+            raise ValueError('Cursor pagination cannot use random ordering')
+        if field == 'pk':
+            field = pk_name
+        keys.append((field, descending, nulls_first))
+
+    if not any(field == pk_name for field, _, _ in keys):
+        keys.append((pk_name, False, False))
+    return keys
+
+
+def _order_expression(key):
+    field, descending, nulls_first = key
+    nulls = {'nulls_first': True} if nulls_first else {'nulls_last': True}
+    return F(field).desc(**nulls) if descending else F(field).asc(**nulls)
+
+
+def _reversed_key(key):
+    field, descending, nulls_first = key
+    return field, not descending, not nulls_first
+
+
+def _equal(field, value):
+    if value is None:
+        return Q(**{f'{field}__isnull': True})
+    return Q(**{field: value})
+
+
+def _after(key, value):
+    """Q matching rows that sort strictly after ``value`` on one key."""
+    field, descending, nulls_first = key
+    if value is None:
+        if nulls_first:
+            return Q(**{f'{field}__isnull': False})
+        return Q(pk__in=[])
+    condition = Q(**{f'{field}__{"lt" if descending else "gt"}': value})
+    if not nulls_first:
+        condition |= Q(**{f'{field}__isnull': True})
+    return condition
+
+
+def _keyset_filter(keys, values):
+    """Q matching rows that sort strictly after the row with ``values``."""
+    condition = Q(pk__in=[])
+    for position, key in enumerate(keys):
+        term = _after(key, values[position])
+        for (field, _, _), value in zip(keys[:position], values[:position]):
+            term &= _equal(field, value)
+        condition |= term
+    return condition
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+class CursorPage:
+    """A page of a CursorPaginator, template-compatible with Django's Page."""
+
+    is_cursor_page = True
+
+    def __init__(self, object_list, paginator, offset, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.offset = offset
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage offset={self.offset}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def number(self):
+        return self.offset // self.paginator.per_page + 1
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def start_index(self):
+        return self.offset + 1 if self.object_list else 0
+
+    def end_index(self):
+        return self.offset + len(self.object_list)
+
+    @cached_property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], self.offset + len(self.object_list), False)
+
+    @cached_property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        offset = max(self.offset - self.paginator.per_page, 0)
+        return self.paginator.encode_cursor(self.object_list[0], offset, True)
+
+
+class CursorPaginator:
+    """
+    Keyset paginator over an ordered queryset.
+
+    ``count`` and ``num_pages`` come from a CachedCountPaginator and are
+    only used for display; page navigation never depends on them.
+    """
+
+    def __init__(self, queryset, per_page, namespace=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.keys = _ordering_keys(queryset)
+        self.fingerprint = '|'.join(f'{f}:{int(d)}:{int(n)}' for f, d, n in self.keys)
+        self.count_paginator = CachedCountPaginator(queryset, per_page, namespace=namespace)
+
+    @property
+    def count(self):
+        return self.count_paginator.count
+
+    @property
+    def num_pages(self):
+        return self.count_paginator.num_pages
+
+    def encode_cursor(self, row, offset, reverse):
+        values = [_encode_value(getattr(row, f'cursor_key_{i}')) for i in range(len(self.keys))]
+        return signing.dumps({'k': self.fingerprint, 'v': values, 'o': offset, 'r': reverse}, salt=CURSOR_SALT)
+
+    def decode_cursor(self, cursor):
+        """Return the cursor payload, or None for an empty or unusable cursor."""
+        if not cursor:
+            return None
+        try:
+            state = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if not isinstance(state, dict) or state.get('k') != self.fingerprint:
+            return None
+        return state
+
+    def page(self, cursor=None):
+        state = self.decode_cursor(cursor)
+        keys = self.keys
+        queryset = self.queryset.annotate(
+            **{f'cursor_key_{i}': F(field) for i, (field, _, _) in enumerate(keys)}
+        )
+
+        offset, reverse = 0, False
+        if state is not None:
+            offset, reverse = state['o'], state['r']
+            if reverse:
+                keys = [_reversed_key(key) for key in keys]
+            queryset = queryset.filter(_keyset_filter(keys, state['v']))
+
+        rows = list(queryset.order_by(*(_order_expression(key) for key in keys))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if reverse:
+            rows.reverse()
+            return CursorPage(rows, self, offset, has_next=True, has_previous=has_more)
+        return CursorPage(rows, self, offset, has_next=has_more, has_previous=offset > 0)
+
+
+def paginate(queryset, page, page_size, cursor=None, namespace=None):
+    """
+    Return a page of ``queryset``.
+
+    ``cursor`` switches to keyset pagination: ``None`` keeps numbered pages,
+    while any string (including an empty one for the first page) returns a
+    CursorPage. Invalid page numbers fall back to the first page.
+    """
+    if cursor is not None:
+        return CursorPaginator(queryset, page_size, namespace=namespace).page(cursor)
+
+    paginator = CachedCountPaginator(queryset, page_size, namespace=namespace)
+    try:
+        return paginator.page(page)
+    except Exception:
+        return paginator.page(1)
@@ -1,10 +1,21 @@
 """
 Pricing calculation utilities for component pricing display system.
 """
+from django.core.cache import cache
 from django.utils import timezone
+from collections import defaultdict
 from datetime import timedelta
 from decimal import Decimal
-from toolanalysis.models import PriceListings, ProductComponents, Components, Products
+from django.db.models import Case, DecimalField, F, Value, When, Window
+from django.db.models.functions import Coalesce, Lower, RowNumber
+from toolanalysis.models import ComponentKitDeals, LatestPriceListings, ProductComponents, Components, Products
+from toolanalysis.proration import apply_proration_weights, calculate_proration_weights
+from .cache_utils import bump_version_on_commit, get_version
+
+KIT_PRICING_NAMESPACE = 'kit_pricing'
+KIT_PRICING_KEY_PREFIX = 'frontend:kit_pricing:'
+# Listings age out of the 60 day window without any write, so entries expire
+KIT_PRICING_TIMEOUT = 60 * 60 * 6
 
 
 def get_latest_product_pricelistings(product, days=60):
@@ -18,34 +29,90 @@ def get_latest_product_pricelistings(product, days=60):
     Returns:
         dict: {retailer_id: PriceListing instance} - one most recent per retailer
     """
+    return get_latest_pricelistings_for_products([product.id], days=days).get(product.id, {})
+
+
+def get_latest_pricelistings_for_products(product_ids, days=60):
+    """
+    Batch version of get_latest_product_pricelistings for many products.
+    
+    Reads the maintained LatestPriceListings table (one row per product and
+    retailer), so this is a single indexed lookup.
+    
+    Args:
+        product_ids: iterable of product ids
+        days: Maximum age of price listings in days (default: 60)
+    
+    Returns:
+        dict: {product_id: {retailer_id: PriceListing instance}}, newest first
+    """
     cutoff_date = timezone.now().date() - timedelta(days=days)
     
-    # Get all price listings within the date range
-    all_listings = PriceListings.objects.filter(
-        product=product,
+    latest_rows = LatestPriceListings.objects.filter(
+        product_id__in=list(product_ids),
         datepulled__gte=cutoff_date
-    ).select_related('retailer').order_by('-datepulled')
+    ).select_related('pricelisting__retailer').order_by('-datepulled')
     
-    # Get the most recent listing per retailer
-    latest_by_retailer = {}
-    for listing in all_listings:
-        retailer_id = listing.retailer.id if listing.retailer else None
-        if retailer_id not in latest_by_retailer:
-            latest_by_retailer[retailer_id] = listing
+    latest_by_product = defaultdict(dict)
+    for row in latest_rows:
+        latest_by_product[row.product_id][row.retailer_id] = row.pricelisting
     
-    return latest_by_retailer
+    return dict(latest_by_product)
+
+
+def get_product_proration_weights(product_ids):
+    """
+    Proration weights for many products from a single ProductComponents query.
+    
+    Returns:
+        dict: {product_id: calculate_proration_weights(...) result}
+    """
+    rows = ProductComponents.objects.filter(
+        product_id__in=list(product_ids),
+        component__isnull=False,
+    ).values_list('product_id', 'component_id', 'quantity', 'component__standalone_price')
+    
+    lines_by_product = defaultdict(list)
+    for product_id, component_id, quantity, standalone_price in rows:
+        lines_by_product[product_id].append((component_id, quantity, standalone_price))
+    
+    return {
+        product_id: calculate_proration_weights(lines)
+        for product_id, lines in lines_by_product.items()
+    }
+
+
+def prorate_listings(listings_by_product):
+    """
+    Prorate every listing price of many products in one pass.
+    
+    Weights are computed once per product (one ProductComponents query for
+    all products) and applied to each of its retailer listings.
+    
+    Args:
+        listings_by_product: {product_id: {retailer_id: PriceListing instance}}
+    
+    Returns:
+        dict: {product_id: {retailer_id: prorate_product_price_to_components(...) result}}
+    """
+    weights_by_product = get_product_proration_weights(listings_by_product.keys())
+    
+    result = {}
+    for product_id, listings in listings_by_product.items():
+        weights = weights_by_product.get(product_id, {})
+        result[product_id] = {
+            retailer_id: apply_proration_weights(weights, listing.price)
+            for retailer_id, listing in listings.items()
+        }
+    return result
 
 
 def prorate_product_price_to_components(product, product_price):
     """
     Calculate effective component prices using weighted proration based on standalone_price.
     
-    Algorithm:
-    1. Calculate total "value" weight: Sum of (component.standalone_price × quantity) 
-       for all components with standalone_price
-    2. For components with standalone_price: weight = (standalone_price × quantity) / total_weight
-    3. For components without standalone_price: equal share of remaining weight
-    4. Effective component price = product_price × weight / quantity
+    See calculate_proration_weights for the weighting; when prorating several
+    listings, use prorate_listings so the weights are only computed once.
     
     Args:
         product: Products model instance
@@ -54,144 +121,119 @@ def prorate_product_price_to_components(product, product_price):
     Returns:
         dict: {component_id: {'effective_price': Decimal, 'weight': Decimal, 'quantity': int}}
     """
-    product_components = ProductComponents.objects.filter(
-        product=product
-    ).select_related('component')
-    
-    # Step 1: Calculate total weight from components with standalone_price
-    total_weight = Decimal('0')
-    component_data = {}
-    
-    for pc in product_components:
-        component = pc.component
-        standalone_price = component.standalone_price
-        
-        if standalone_price is not None:
-            weighted_value = standalone_price * Decimal(pc.quantity)
-            total_weight += weighted_value
-            component_data[component.id] = {
-                'has_price': True,
-                'weighted_value': weighted_value,
-                'quantity': pc.quantity,
-            }
-        else:
-            component_data[component.id] = {
-                'has_price': False,
-                'weighted_value': Decimal('0'),
-                'quantity': pc.quantity,
-            }
-    
-    # Step 2 & 3: Calculate weights
-    components_without_price = [
-        comp_id for comp_id, data in component_data.items()
-        if not data['has_price']
-    ]
-    
-    # Allocate weights
-    if total_weight > 0:
-        # Components with price get weight proportional to their value
-        # These weights will sum to 1.0 if all components have prices
-        used_weight = Decimal('0')
-        for comp_id, data in component_data.items():
-            if data['has_price']:
-                weight = data['weighted_value'] / total_weight
-                component_data[comp_id]['weight'] = weight
-                used_weight += weight
-        
-        # If there are components without price, they share the remaining weight equally
-        if components_without_price:
-            remaining_weight = Decimal('1') - used_weight
-            if remaining_weight > 0:
-                weight_per_component = remaining_weight / Decimal(len(components_without_price))
-                for comp_id in components_without_price:
-                    component_data[comp_id]['weight'] = weight_per_component
-    else:
-        # No components have standalone_price - equal distribution
-        weight_per_component = Decimal('1') / Decimal(len(component_data)) if component_data else Decimal('0')
-        for comp_id in component_data:
-            component_data[comp_id]['weight'] = weight_per_component
+    weights = get_product_proration_weights([product.id]).get(product.id, {})
+    return apply_proration_weights(weights, product_price)
+
+
+# Kit deal orderings for get_components_kit_pricing; deals without an
+# effective price sort after every priced deal
+_EFFECTIVE_PRICE_LAST = Case(
+    When(effective_price__gt=0, then=F('effective_price')),
+    default=Value(Decimal('999999')),
+    output_field=DecimalField(max_digits=10, decimal_places=2),
+)
+KIT_DEAL_ORDERINGS = {
+    'best_price': (_EFFECTIVE_PRICE_LAST, 'product__name'),
+    'retailer': (Coalesce('retailer__name', Value('')), _EFFECTIVE_PRICE_LAST),
+    'product_name': (Lower('product__name'), _EFFECTIVE_PRICE_LAST),
+    None: ('product_id', '-datepulled'),
+}
+
+
+def get_kit_deals(component_ids, retailer_id=None, sort=None, days=60):
+    """
+    Queryset of current ComponentKitDeals for the given components.
     
-    # Step 4: Calculate effective component prices
-    result = {}
-    for comp_id, data in component_data.items():
-        weight = data.get('weight', Decimal('0'))
-        quantity = data['quantity']
-        
-        # Effective price = (product_price * weight) / quantity
-        if quantity > 0 and weight > 0:
-            effective_price = (product_price * weight) / Decimal(quantity)
-        else:
-            effective_price = Decimal('0')
-        
-        result[comp_id] = {
-            'effective_price': effective_price,
-            'weight': weight,
-            'quantity': quantity,
+    Args:
+        component_ids: iterable of component ids
+        retailer_id: only deals from this retailer
+        sort: 'best_price', 'retailer', 'product_name' or None
+        days: Maximum age of the kit listing in days (default: 60)
+    """
+    cutoff_date = timezone.now().date() - timedelta(days=days)
+    deals = ComponentKitDeals.objects.filter(
+        component_id__in=list(component_ids),
+        datepulled__gte=cutoff_date,
+    )
+    if retailer_id:
+        deals = deals.filter(retailer_id=retailer_id)
+    return deals.order_by(*KIT_DEAL_ORDERINGS.get(sort, KIT_DEAL_ORDERINGS[None]))
+
+
+def _kit_pricing_item(deal, component):
+    return {
+        'product': deal.product,
+        'product_component': deal.product_component,
+        'pricelisting': deal.pricelisting,
+        'component_pricing': {
+            'effective_price': deal.effective_price,
+            'list_price': component.standalone_price,
+            'discounts': {
+                'dollar_discount': deal.dollar_discount,
+                'percentage_discount': deal.percentage_discount,
+                'has_discount': deal.has_discount,
+            },
         }
-    
-    return result
+    }
+
 
+def _with_kit_relations(deals):
+    return deals.select_related(
+        'product', 'product_component', 'pricelisting__retailer'
+    ).prefetch_related('product__productimages_set')
 
-def calculate_component_discounts(component, list_price, effective_price):
+
+def get_components_kit_pricing(components, retailer_id=None, sort=None, limit=None):
     """
-    Calculate dollar and percentage discounts for a component.
+    Get kit pricing for many components at once.
+    
+    Reads the precomputed ComponentKitDeals table, so the query count does
+    not depend on the number of components, products or retailers.
     
     Args:
-        component: Components model instance
-        list_price: Decimal standalone price (list price)
-        effective_price: Decimal effective price from kit
+        components: iterable of Components model instances
+        retailer_id: only include listings from this retailer
+        sort: 'best_price', 'retailer', 'product_name' or None
+        limit: maximum number of results per component, applied in SQL
     
     Returns:
-        dict: {
-            'dollar_discount': Decimal or None,
-            'percentage_discount': Decimal or None,
-            'has_discount': bool
-        }
+        dict: {component_id: get_component_kit_pricing(...) result}
     """
-    if list_price is None or effective_price is None:
-        return {
-            'dollar_discount': None,
-            'percentage_discount': None,
-            'has_discount': False,
-        }
-    
-    if list_price <= Decimal('0') or effective_price <= Decimal('0'):
-        return {
-            'dollar_discount': None,
-            'percentage_discount': None,
-            'has_discount': False,
-        }
+    components = {component.id: component for component in components}
+    result = {component_id: [] for component_id in components}
     
-    dollar_discount = list_price - effective_price
+    deals = get_kit_deals(components, retailer_id=retailer_id, sort=sort)
+    if limit is not None:
+        deals = deals.annotate(component_rank=Window(
+            RowNumber(),
+            partition_by=F('component_id'),
+            order_by=KIT_DEAL_ORDERINGS.get(sort, KIT_DEAL_ORDERINGS[None]),
+        )).filter(component_rank__lte=limit)
+    deals = _with_kit_relations(deals)
+    for deal in deals:
+        result[deal.component_id].append(_kit_pricing_item(deal, components[deal.component_id]))
     
-    if dollar_discount > 0:
-        percentage_discount = (dollar_discount / list_price) * Decimal('100')
-        return {
-            'dollar_discount': dollar_discount,
-            'percentage_discount': percentage_discount,
-            'has_discount': True,
-        }
-    else:
-        return {
-            'dollar_discount': Decimal('0'),
-            'percentage_discount': Decimal('0'),
-            'has_discount': False,
-        }
+    return result
 
 
-def get_component_kit_pricing(component):
+def get_component_kit_pricing(component, retailer_id=None, sort=None, limit=None):
     """
     Get all products containing component with prorated prices.
     
+    Filtering, sorting and the limit are applied in SQL.
+    
     Args:
         component: Components model instance
+        retailer_id: only include listings from this retailer
+        sort: 'best_price', 'retailer', 'product_name' or None
+        limit: maximum number of results
     
     Returns:
         list: [
             {
                 'product': Products instance,
                 'product_component': ProductComponents instance,
-                'pricelistings': [PriceListing instances],
+                'pricelisting': PriceListing instance,
                 'component_pricing': {
                     'effective_price': Decimal,
                     'list_price': Decimal,
@@ -201,51 +243,41 @@ def get_component_kit_pricing(component):
             ...
         ]
     """
-    # Get all products containing this component
-    product_components = ProductComponents.objects.filter(
-        component=component
-    ).select_related('product').prefetch_related('product__productimages_set')
-    
-    result = []
-    
-    for pc in product_components:
-        product = pc.product
-        
-        # Get latest pricelistings for this product
-        latest_listings = get_latest_product_pricelistings(product, days=60)
-        
-        # Process each pricelisting
-        for retailer_id, pricelisting in latest_listings.items():
-            # Calculate prorated component prices
-            prorated_prices = prorate_product_price_to_components(
-                product, 
-                pricelisting.price
-            )
-            
-            # Get pricing data for this specific component
-            component_pricing_data = prorated_prices.get(component.id)
-            
-            if component_pricing_data:
-                effective_price = component_pricing_data['effective_price']
-                list_price = component.standalone_price
-                
-                # Calculate discounts
-                discounts = calculate_component_discounts(
-                    component,
-                    list_price,
-                    effective_price
-                )
-                
-                result.append({
-                    'product': product,
-                    'product_component': pc,
-                    'pricelisting': pricelisting,
-                    'component_pricing': {
-                        'effective_price': effective_price,
-                        'list_price': list_price,
-                        'discounts': discounts,
-                    }
-                })
+    deals = _with_kit_relations(get_kit_deals([component.id], retailer_id=retailer_id, sort=sort))
+    if limit is not None:
+        deals = deals[:limit]
+    return [_kit_pricing_item(deal, component) for deal in deals]
+
+
+def _kit_pricing_namespace(component_id):
+    return f'{KIT_PRICING_NAMESPACE}:{component_id}'
+
+
+def get_cached_component_kit_pricing(component, retailer_id=None, sort=None, limit=None):
+    """
+    get_component_kit_pricing served from Django's cache.
     
-    return result
+    Entries are versioned per component and invalidated by the signal
+    receivers in frontend.signals whenever a listing, the composition or
+    the standalone prices of a kit containing the component change.
+    """
+    versions = ':'.join([
+        get_version(KIT_PRICING_NAMESPACE),
+        get_version(_kit_pricing_namespace(component.id)),
+    ])
+    key = f'{KIT_PRICING_KEY_PREFIX}{component.id}:{versions}:{retailer_id}:{sort}:{limit}'
+    kit_pricing = cache.get(key)
+    if kit_pricing is None:
+        kit_pricing = get_component_kit_pricing(component, retailer_id=retailer_id, sort=sort, limit=limit)
+        cache.set(key, kit_pricing, KIT_PRICING_TIMEOUT)
+    return kit_pricing
 
+
+def invalidate_component_kit_pricing(component_ids=None):
+    """Drop the cached kit pricing of the given components, or of every component when None."""
+    if component_ids is None:
+        bump_version_on_commit(KIT_PRICING_NAMESPACE)
+    else:
+        namespaces = {_kit_pricing_namespace(component_id) for component_id in component_ids if component_id}
+        if namespaces:
+            bump_version_on_commit(*namespaces)
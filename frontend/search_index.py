@@ -0,0 +1,379 @@
+"""
+Process-local search indexes: typeahead suggestions and ranked catalog search.
+
+Typeahead used to run three leading-wildcard ``icontains`` scans (product
+name/SKU, component name/SKU, brand name) on every keystroke.
+``SearchIndex`` keeps every suggestion target in memory together with
+trigram postings of its normalized name and SKU. A query of three or more
+characters intersects the postings of its trigrams and verifies the
+substring on the few remaining candidates; shorter queries scan the
+entries directly. Matches are ranked: exact name or SKU first, then name
+or SKU prefixes, then word prefixes inside the name, then any other
+substring; shorter names win ties.
+
+``DocumentIndex`` holds a search document per Product or Component (name,
+SKU, brand, description, bullets and attribute values) as weighted token
+postings. Every query word must match a document word exactly or as a
+prefix; scores add up the weight of the best field each word hit. SKUs are
+also compared with separators removed and within one typo, so "276720" and
+"2767-02" both find "2767-20". It backs the global search page and the
+catalog ``search`` filter.
+
+Both are rebuilt after their namespace (``search_index``,
+``search_documents``) is bumped by the signal receivers in
+``frontend.signals``.
+"""
+
+import heapq
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+
+from toolanalysis.models import Brands, ComponentAttributes, Components, Products
+from .cache_utils import VersionedLoader, bump_version_on_commit
+
+SEARCH_INDEX_NAMESPACE = 'search_index'
+SEARCH_DOCUMENTS_NAMESPACE = 'search_documents'
+
+NGRAM_SIZE = 3
+
+# Suggestions returned per entry type, in response order
+SUGGESTION_LIMITS = (
+    ('Product', 5),
+    ('Component', 5),
+    ('Brand', 3),
+)
+
+# Results per page on the global search page
+SEARCH_PAGE_SIZE = 50
+
+# Rank tiers, lowest first
+EXACT_MATCH = 0
+PREFIX_MATCH = 1
+WORD_PREFIX_MATCH = 2
+SUBSTRING_MATCH = 3
+
+WORD_SEPARATORS = re.compile(r'[\s\-/_.,()]+')
+WORD = re.compile(r'[^\W_]+')
+
+# Weight of a query word found in each search document field
+DOCUMENT_FIELD_WEIGHTS = {
+    'name': 8,
+    'sku': 8,
+    'brand': 4,
+    'attributes': 2,
+    'bullets': 1,
+    'description': 1,
+}
+# Share of the field weight earned when a query word is only a prefix
+PREFIX_WEIGHT = 0.5
+# Bonuses added when the whole query is the SKU, the SKU within one typo,
+# or a substring of the name
+SKU_MATCH_BONUS = 20
+SKU_TYPO_BONUS = 10
+NAME_PHRASE_BONUS = 4
+# Shorter compact SKUs are too ambiguous to match within one typo
+MIN_TYPO_SKU_LENGTH = 5
+
+
+def normalize(text):
+    """Case-fold and collapse whitespace so lookups ignore case and spacing."""
+    return ' '.join((text or '').casefold().split())
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def tokenize(text):
+    return WORD.findall(normalize(text))
+
+
+def compact_sku(text):
+    """Normalized SKU without separators: "2767-20" and "2767 20" both become "276720"."""
+    return ''.join(tokenize(text))
+
+
+def _deletions(text):
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
+
+
+class SearchIndex:
+    """Suggestion entries for products, components and brands with trigram postings."""
+
+    def __init__(self):
+        self.entries = []
+        self.postings = defaultdict(set)
+        self._build()
+
+    def _build(self):
+        brand_names = dict(Brands.objects.values_list('id', 'name'))
+
+        for product_id, name, sku, brand_id in Products.objects.order_by('name').values_list(
+            'id', 'name', 'sku', 'brand_id'
+        ):
+            self._add('Product', f'/product/{product_id}/', name, sku, brand_names.get(brand_id, ''))
+
+        for component_id, name, sku, brand_id in Components.objects.order_by('name').values_list(
+            'id', 'name', 'sku', 'brand_id'
+        ):
+            self._add('Component', f'/components/{component_id}/', name, sku, brand_names.get(brand_id, ''))
+
+        for brand_id, name in sorted(brand_names.items(), key=lambda item: item[1] or ''):
+            self._add('Brand', f'/products/?brand={brand_id}', name, '', '')
+
+    def _add(self, entry_type, url, name, sku, brand):
+        position = len(self.entries)
+        name_key = normalize(name)
+        sku_key = normalize(sku)
+        self.entries.append({
+            'type': entry_type,
+            'name_key': name_key,
+            'sku_key': sku_key,
+            'words': tuple(word for word in WORD_SEPARATORS.split(name_key) if word),
+            'suggestion': {
+                'text': name,
+                'type': entry_type,
+                'url': url,
+                'brand': brand or '',
+                'sku': sku or '',
+            },
+        })
+        for gram in ngrams(name_key) | ngrams(sku_key):
+            self.postings[gram].add(position)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def candidates(self, query):
+        """Return the positions of entries whose name or SKU contains ``query``."""
+        if len(query) < NGRAM_SIZE:
+            positions = range(len(self.entries))
+        else:
+            postings = sorted((self.postings.get(gram, set()) for gram in ngrams(query)), key=len)
+            positions = set(postings[0]).intersection(*postings[1:]) if postings else set()
+        return [
+            position for position in positions
+            if query in self.entries[position]['name_key'] or query in self.entries[position]['sku_key']
+        ]
+
+    def rank(self, position, query):
+        """Sort key of a matching entry: rank tier, then name length, then name."""
+        entry = self.entries[position]
+        name_key, sku_key = entry['name_key'], entry['sku_key']
+        if query in (name_key, sku_key):
+            tier = EXACT_MATCH
+        elif name_key.startswith(query) or sku_key.startswith(query):
+            tier = PREFIX_MATCH
+        elif any(word.startswith(query) for word in entry['words']):
+            tier = WORD_PREFIX_MATCH
+        else:
+            tier = SUBSTRING_MATCH
+        return (tier, len(name_key), name_key)
+
+    def suggest(self, query, limits=SUGGESTION_LIMITS):
+        """
+        Return ranked suggestions for a typeahead query.
+
+        Returns:
+            list: suggestion dicts (text, type, url, brand, sku), grouped by type
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        by_type = defaultdict(list)
+        for position in self.candidates(query):
+            by_type[self.entries[position]['type']].append(position)
+
+        suggestions = []
+        for entry_type, limit in limits:
+            best = heapq.nsmallest(
+                limit, by_type.get(entry_type, ()), key=lambda position: self.rank(position, query)
+            )
+            suggestions.extend(dict(self.entries[position]['suggestion']) for position in best)
+        return suggestions
+
+
+class DocumentIndex:
+    """Weighted token postings over the search document of every Product or Component."""
+
+    def __init__(self, model_class):
+        self.model_class = model_class
+        self.item_ids = []
+        self.names = []
+        # word -> {position: weight of the best field containing it}
+        self.postings = defaultdict(dict)
+        # compact SKU, and each of its one-character deletions -> positions
+        self.skus = defaultdict(set)
+        self.sku_deletions = defaultdict(set)
+        self._build()
+        self.vocabulary = sorted(self.postings)
+
+    def _documents(self):
+        """Yield (item id, {field: text}) for every item."""
+        model_class = self.model_class
+        brand_names = dict(Brands.objects.values_list('id', 'name'))
+        columns = ['id', 'name', 'sku', 'brand_id', 'description']
+        if model_class == Products:
+            columns.append('bullets')
+
+        attribute_values = defaultdict(list)
+        if model_class == Components:
+            for component_id, value in ComponentAttributes.objects.order_by().values_list('component_id', 'value'):
+                if value:
+                    attribute_values[component_id].append(value)
+
+        for row in model_class.objects.order_by('pk').values(*columns):
+            yield row['id'], {
+                'name': row['name'],
+                'sku': row['sku'],
+                'brand': brand_names.get(row['brand_id']),
+                'attributes': ' '.join(attribute_values.get(row['id'], ())),
+                'bullets': row.get('bullets'),
+                'description': row['description'],
+            }
+
+    def _build(self):
+        for position, (item_id, document) in enumerate(self._documents()):
+            self.item_ids.append(item_id)
+            self.names.append(normalize(document['name']))
+            for field, weight in DOCUMENT_FIELD_WEIGHTS.items():
+                for word in set(tokenize(document[field])):
+                    postings = self.postings[word]
+                    if weight > postings.get(position, 0):
+                        postings[position] = weight
+            sku = compact_sku(document['sku'])
+            if sku:
+                self.skus[sku].add(position)
+                if len(sku) >= MIN_TYPO_SKU_LENGTH:
+                    for variant in _deletions(sku):
+                        self.sku_deletions[variant].add(position)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def word_scores(self, word):
+        """Return {position: score} of documents with the word, or a word it prefixes."""
+        scores = dict(self.postings.get(word, {}))
+        start = bisect_left(self.vocabulary, word)
+        for candidate in islice(self.vocabulary, start, None):
+            if not candidate.startswith(word):
+                break
+            if candidate == word:
+                continue
+            for position, weight in self.postings[candidate].items():
+                if weight * PREFIX_WEIGHT > scores.get(position, 0):
+                    scores[position] = weight * PREFIX_WEIGHT
+        return scores
+
+    def sku_matches(self, query):
+        """
+        Return (exact positions, within-one-typo positions) for a SKU-like query.
+
+        Typos are only considered when no SKU matches exactly. One-character
+        deletions of both sides are compared, which covers a missing, extra,
+        swapped or mistyped character.
+        """
+        sku = compact_sku(query)
+        if not sku:
+            return set(), set()
+        exact = set(self.skus.get(sku, ()))
+        typo = set()
+        if not exact and len(sku) >= MIN_TYPO_SKU_LENGTH and any(char.isdigit() for char in sku):
+            typo |= self.sku_deletions.get(sku, set())
+            for variant in _deletions(sku):
+                typo |= self.skus.get(variant, set())
+                typo |= self.sku_deletions.get(variant, set())
+        return exact, typo
+
+    def scores(self, query):
+        """Return {position: relevance score} of every matching document."""
+        scores = None
+        for word in dict.fromkeys(tokenize(query)):
+            word_scores = self.word_scores(word)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {position: score + word_scores[position]
+                          for position, score in scores.items() if position in word_scores}
+            if not scores:
+                break
+        scores = scores or {}
+
+        exact, typo = self.sku_matches(query)
+        for position in exact:
+            scores[position] = scores.get(position, 0) + SKU_MATCH_BONUS
+        for position in typo:
+            scores[position] = scores.get(position, 0) + SKU_TYPO_BONUS
+
+        phrase = normalize(query)
+        for position in scores:
+            if phrase in self.names[position]:
+                scores[position] += NAME_PHRASE_BONUS
+        return scores
+
+    def search(self, query):
+        """Return the ids of matching items, best match first (then by name)."""
+        scores = self.scores(query)
+        ranked = sorted(scores, key=lambda position: (-scores[position], self.names[position], position))
+        return [self.item_ids[position] for position in ranked]
+
+
+_loader = VersionedLoader(SEARCH_INDEX_NAMESPACE, SearchIndex)
+
+_document_loaders = {
+    model_class: VersionedLoader(
+        SEARCH_DOCUMENTS_NAMESPACE, lambda model_class=model_class: DocumentIndex(model_class)
+    )
+    for model_class in (Products, Components)
+}
+
+
+def is_enabled():
+    return getattr(settings, 'SEARCH_SUGGESTION_INDEX_ENABLED', True)
+
+
+def documents_enabled():
+    return getattr(settings, 'SEARCH_DOCUMENT_INDEX_ENABLED', True)
+
+
+def get_search_index():
+    """Return the current suggestion index, building it if needed."""
+    return _loader.get()
+
+
+def get_document_index(model_class):
+    """Return the current search document index of a catalog model, building it if needed."""
+    return _document_loaders[model_class].get()
+
+
+def search_ids(model_class, query):
+    """Return the ids of items matching a search query, most relevant first."""
+    return get_document_index(model_class).search(query)
+
+
+def search_page(model_class, query, page_number, page_size=SEARCH_PAGE_SIZE):
+    """
+    Return one page of search results, most relevant first.
+
+    Returns:
+        tuple: (model instances with their brand loaded, total number of matches)
+    """
+    item_ids = search_ids(model_class, query)
+    page_ids = item_ids[(page_number - 1) * page_size:page_number * page_size]
+    items = model_class.objects.select_related('brand').in_bulk(page_ids)
+    return [items[item_id] for item_id in page_ids if item_id in items], len(item_ids)
+
+
+def invalidate_search_index():
+    bump_version_on_commit(SEARCH_INDEX_NAMESPACE)
+
+
+def invalidate_search_documents():
+    bump_version_on_commit(SEARCH_DOCUMENTS_NAMESPACE)
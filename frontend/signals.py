@@ -0,0 +1,390 @@
+"""
+Model signal receivers that keep the frontend's derived data current.
+
+Receivers only bump cache namespace versions (see ``cache_utils``); the
+derived structures rebuild themselves lazily on next use.
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from toolanalysis.models import (
+    Products, Components, Brands, BatteryVoltages, BatteryPlatforms,
+    Categories, Subcategories, ItemTypes, Statuses, ProductLines, Features,
+    MotorTypes, ListingTypes, ComponentFeatures, ComponentAttributes,
+    Attributes, ComponentClasses, PriceListings, ProductAccessories,
+    ProductComponents, ProductImages, Retailers
+)
+from toolanalysis.sync_signals import (
+    attribute_values_refreshed, catalog_entries_refreshed, kit_deals_refreshed, latest_listings_refreshed,
+    standalone_prices_updated,
+)
+from .catalog_index import invalidate_catalog_index
+from .cache_utils import bump_version_on_commit
+from .models import SITE_SETTINGS_NAMESPACE, LearningArticle, SiteSettings, Tag
+from .page_cache import invalidate_tags
+from .detail_loaders import invalidate_component_comparison, invalidate_product_detail, invalidate_quick_info
+from .pricing_utils import invalidate_component_kit_pricing
+from .search_index import invalidate_search_documents, invalidate_search_index
+from .site_stats import invalidate_flagship_layout, invalidate_site_stats, is_flagship_component
+from .taxonomy import TAXONOMY_THROUGH_MODELS, invalidate_taxonomy
+
+
+def _on_save_and_delete(*model_classes):
+    """
+    Connect a receiver to post_save and post_delete of the given models only.
+
+    A receiver connected without a sender makes queryset delete() on every
+    model, the derived tables included, fetch its rows to send post_delete.
+    """
+    def decorator(func):
+        for model_class in model_classes:
+            post_save.connect(func, sender=model_class)
+            post_delete.connect(func, sender=model_class)
+        return func
+    return decorator
+
+
+def _m2m_through_models(*model_classes):
+    return [
+        field.remote_field.through
+        for model_class in model_classes
+        for field in model_class._meta.many_to_many
+    ]
+
+
+CATALOG_INDEX_MODELS = [
+    Products, Components, ComponentFeatures, ComponentAttributes,
+    Brands, BatteryVoltages, BatteryPlatforms, Categories, Subcategories,
+    ItemTypes, Statuses, ProductLines, Features, MotorTypes, ListingTypes,
+    Attributes,
+]
+# Taxonomy links decide which items a category or subcategory posting covers
+CATALOG_INDEX_THROUGH_MODELS = _m2m_through_models(Products, Components) + TAXONOMY_THROUGH_MODELS
+
+
+@_on_save_and_delete(*CATALOG_INDEX_MODELS)
+def invalidate_catalog_index_on_change(sender, **kwargs):
+    invalidate_catalog_index()
+
+
+@receiver(attribute_values_refreshed)
+def invalidate_catalog_index_on_attribute_refresh(sender, **kwargs):
+    invalidate_catalog_index()
+
+
+@receiver(m2m_changed)
+def invalidate_catalog_index_on_m2m_change(sender, action, **kwargs):
+    if sender in CATALOG_INDEX_THROUGH_MODELS and action.startswith('post_'):
+        invalidate_catalog_index()
+
+
+# Tables whose names and SKUs feed the search suggestions
+SEARCH_INDEX_MODELS = [Products, Components, Brands]
+# Tables whose text feeds the search documents
+SEARCH_DOCUMENT_MODELS = [Products, Components, Brands, ComponentAttributes]
+
+
+# Item fields read by the suggestions and the search documents
+SEARCH_ITEM_FIELDS = {'name', 'sku', 'brand', 'brand_id', 'description', 'bullets'}
+
+
+@_on_save_and_delete(*SEARCH_INDEX_MODELS, *SEARCH_DOCUMENT_MODELS)
+def invalidate_search_index_on_change(sender, update_fields=None, **kwargs):
+    # Saves limited to other fields (e.g. batch edits of is_featured) leave the text alone
+    if sender in (Products, Components) and update_fields is not None and not SEARCH_ITEM_FIELDS & set(update_fields):
+        return
+    if sender in SEARCH_INDEX_MODELS:
+        invalidate_search_index()
+    if sender in SEARCH_DOCUMENT_MODELS:
+        invalidate_search_documents()
+
+
+@receiver(attribute_values_refreshed)
+def invalidate_search_documents_on_attribute_refresh(sender, **kwargs):
+    invalidate_search_documents()
+
+
+# Rows that belong to one product, through their product_id
+PRODUCT_DETAIL_PRODUCT_MODELS = [ProductComponents, PriceListings, ProductImages, ProductAccessories]
+# Lookup rows displayed on many product pages
+PRODUCT_DETAIL_SHARED_MODELS = [
+    Brands, Statuses, MotorTypes, ComponentClasses, Retailers, Attributes,
+    Categories, Subcategories, ItemTypes, BatteryVoltages,
+]
+PRODUCT_DETAIL_PRODUCT_THROUGH_MODELS = _m2m_through_models(Products)
+PRODUCT_DETAIL_COMPONENT_THROUGH_MODELS = _m2m_through_models(Components)
+
+
+def _products_with_components(component_ids):
+    return ProductComponents.objects.filter(
+        component_id__in=list(component_ids)
+    ).values_list('product_id', flat=True).distinct()
+
+
+@_on_save_and_delete(
+    Products, Components, ComponentAttributes,
+    *PRODUCT_DETAIL_PRODUCT_MODELS, *PRODUCT_DETAIL_SHARED_MODELS,
+)
+def invalidate_product_detail_on_change(sender, instance, **kwargs):
+    if sender is Products:
+        invalidate_product_detail([instance.pk])
+    elif sender in PRODUCT_DETAIL_PRODUCT_MODELS:
+        invalidate_product_detail([instance.product_id])
+    elif sender is Components:
+        invalidate_product_detail(_products_with_components([instance.pk]))
+    elif sender is ComponentAttributes:
+        invalidate_product_detail(_products_with_components([instance.component_id]))
+    elif sender in PRODUCT_DETAIL_SHARED_MODELS:
+        invalidate_product_detail()
+
+
+@receiver(latest_listings_refreshed)
+@receiver(kit_deals_refreshed)
+def invalidate_product_detail_on_sync(sender, product_ids, **kwargs):
+    invalidate_product_detail(product_ids)
+
+
+@receiver(attribute_values_refreshed)
+def invalidate_product_detail_on_attribute_refresh(sender, component_ids, **kwargs):
+    invalidate_product_detail(_products_with_components(component_ids))
+
+
+@receiver(m2m_changed)
+def invalidate_product_detail_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if sender in PRODUCT_DETAIL_PRODUCT_THROUGH_MODELS:
+        product_ids = pk_set if reverse else [instance.pk]
+    elif sender in PRODUCT_DETAIL_COMPONENT_THROUGH_MODELS:
+        component_ids = pk_set if reverse else [instance.pk]
+        product_ids = None if component_ids is None else _products_with_components(component_ids)
+    elif sender is ItemTypes.attributes.through:
+        product_ids = None
+    else:
+        return
+    # Reverse clear() does not say which products were affected
+    invalidate_product_detail(product_ids)
+
+
+# Lookup rows displayed in every comparison
+COMPONENT_COMPARE_SHARED_MODELS = [Brands, Attributes, BatteryVoltages, BatteryPlatforms, ProductLines, Categories]
+
+
+@_on_save_and_delete(Components, ComponentAttributes, *COMPONENT_COMPARE_SHARED_MODELS)
+def invalidate_component_comparison_on_change(sender, instance, **kwargs):
+    if sender is Components:
+        invalidate_component_comparison([instance.pk])
+    elif sender is ComponentAttributes:
+        invalidate_component_comparison([instance.component_id])
+    elif sender in COMPONENT_COMPARE_SHARED_MODELS:
+        invalidate_component_comparison()
+
+
+@receiver(attribute_values_refreshed)
+def invalidate_component_comparison_on_attribute_refresh(sender, component_ids, **kwargs):
+    invalidate_component_comparison(component_ids)
+
+
+@receiver(m2m_changed)
+def invalidate_component_comparison_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if sender in PRODUCT_DETAIL_COMPONENT_THROUGH_MODELS:
+        # Reverse clear() does not say which components were affected
+        invalidate_component_comparison(pk_set if reverse else [instance.pk])
+    elif sender is ItemTypes.attributes.through:
+        invalidate_component_comparison()
+
+
+# Kit pricing of a component covers every kit containing it: their listings,
+# composition, standalone prices (proration weights), names and images
+KIT_PRICING_PRODUCT_MODELS = [PriceListings, ProductComponents, ProductImages]
+
+
+def _components_in_products(product_ids):
+    return ProductComponents.objects.filter(
+        product_id__in=product_ids
+    ).values_list('component_id', flat=True).distinct()
+
+
+@_on_save_and_delete(Products, Components, Retailers, *KIT_PRICING_PRODUCT_MODELS)
+def invalidate_kit_pricing_on_change(sender, instance, **kwargs):
+    if sender is Products:
+        invalidate_component_kit_pricing(_components_in_products([instance.pk]))
+    elif sender in KIT_PRICING_PRODUCT_MODELS:
+        component_ids = set(_components_in_products([instance.product_id]))
+        if sender is ProductComponents:
+            # A deleted line is no longer found through its product
+            component_ids.add(instance.component_id)
+        invalidate_component_kit_pricing(component_ids)
+    elif sender is Components:
+        invalidate_component_kit_pricing(
+            _components_in_products(_products_with_components([instance.pk]))
+        )
+    elif sender is Retailers:
+        invalidate_component_kit_pricing()
+
+
+@receiver(kit_deals_refreshed)
+def invalidate_kit_pricing_on_sync(sender, component_ids, **kwargs):
+    invalidate_component_kit_pricing(component_ids)
+
+
+# Lookup rows displayed in many tooltips
+QUICK_INFO_SHARED_MODELS = [Brands, Statuses, MotorTypes, Attributes, Features, BatteryPlatforms, Retailers]
+# Rows that change the kits listed in a component's tooltip
+QUICK_INFO_KIT_MODELS = [PriceListings, ProductComponents]
+QUICK_INFO_THROUGH_TYPES = {
+    Products.batteryplatforms.through: 'product',
+    Components.itemtypes.through: 'component',
+}
+
+
+@_on_save_and_delete(
+    Products, Components, ComponentAttributes, ComponentFeatures,
+    *QUICK_INFO_KIT_MODELS, *QUICK_INFO_SHARED_MODELS,
+)
+def invalidate_quick_info_on_change(sender, instance, **kwargs):
+    if sender is Products:
+        invalidate_quick_info('product', [instance.pk])
+        invalidate_quick_info('component', _components_in_products([instance.pk]))
+    elif sender in QUICK_INFO_KIT_MODELS:
+        component_ids = set(_components_in_products([instance.product_id]))
+        if sender is ProductComponents:
+            invalidate_quick_info('product', [instance.product_id])
+            component_ids.add(instance.component_id)
+        invalidate_quick_info('component', component_ids)
+    elif sender is Components:
+        # Its standalone price weighs the kit prices of every component it ships with
+        product_ids = list(_products_with_components([instance.pk]))
+        invalidate_quick_info('component', {instance.pk, *_components_in_products(product_ids)})
+        invalidate_quick_info('product', product_ids)
+    elif sender in (ComponentAttributes, ComponentFeatures):
+        invalidate_quick_info('component', [instance.component_id])
+    elif sender in QUICK_INFO_SHARED_MODELS:
+        invalidate_quick_info()
+
+
+@receiver(attribute_values_refreshed)
+def invalidate_quick_info_on_attribute_refresh(sender, component_ids, **kwargs):
+    invalidate_quick_info('component', component_ids)
+
+
+@receiver(kit_deals_refreshed)
+def invalidate_quick_info_on_sync(sender, product_ids, component_ids, **kwargs):
+    if product_ids is None:
+        invalidate_quick_info()
+    else:
+        invalidate_quick_info('product', product_ids)
+        invalidate_quick_info('component', component_ids)
+
+
+@receiver(m2m_changed)
+def invalidate_quick_info_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if sender in QUICK_INFO_THROUGH_TYPES:
+        # Reverse clear() does not say which items were affected
+        invalidate_quick_info(QUICK_INFO_THROUGH_TYPES[sender], pk_set if reverse else [instance.pk])
+    elif sender is ItemTypes.attributes.through:
+        invalidate_quick_info()
+
+
+TAXONOMY_MODELS = [Categories, Subcategories, ItemTypes]
+
+
+@_on_save_and_delete(*TAXONOMY_MODELS)
+def invalidate_taxonomy_on_change(sender, **kwargs):
+    invalidate_taxonomy()
+
+
+@receiver(m2m_changed)
+def invalidate_taxonomy_on_m2m_change(sender, action, **kwargs):
+    if sender in TAXONOMY_THROUGH_MODELS and action.startswith('post_'):
+        invalidate_taxonomy()
+
+
+# Catalog totals, home page previews and the latest articles
+SITE_STATS_MODELS = CATALOG_INDEX_MODELS + [ProductImages, LearningArticle, Tag]
+SITE_STATS_THROUGH_MODELS = CATALOG_INDEX_THROUGH_MODELS + [
+    ItemTypes.attributes.through, LearningArticle.tags.through,
+]
+
+
+@_on_save_and_delete(*SITE_STATS_MODELS)
+def invalidate_site_stats_on_change(sender, **kwargs):
+    invalidate_site_stats()
+
+
+@receiver(m2m_changed)
+def invalidate_site_stats_on_m2m_change(sender, action, **kwargs):
+    if sender in SITE_STATS_THROUGH_MODELS and action.startswith('post_'):
+        invalidate_site_stats()
+
+
+@_on_save_and_delete(Components, ItemTypes)
+def invalidate_flagship_layout_on_change(sender, instance, **kwargs):
+    # Only featured components (or ones featured until now) move the layout
+    if sender is Components and is_flagship_component(instance):
+        invalidate_flagship_layout()
+    elif sender is ItemTypes:
+        invalidate_flagship_layout()
+
+
+@receiver(m2m_changed)
+def invalidate_flagship_layout_on_m2m_change(sender, instance, action, reverse, **kwargs):
+    if sender is not Components.itemtypes.through or not action.startswith('post_'):
+        return
+    if reverse or is_flagship_component(instance):
+        invalidate_flagship_layout()
+
+
+# Page cache tags, see frontend.page_cache. Only source tables: the derived
+# tables are written row by row by the sync code, which reports each
+# refresh once through toolanalysis.sync_signals instead
+PAGE_CACHE_CATALOG_MODELS = CATALOG_INDEX_MODELS + [
+    ComponentClasses, PriceListings, ProductAccessories, ProductComponents, ProductImages, Retailers,
+]
+PAGE_CACHE_CATALOG_THROUGH_MODELS = CATALOG_INDEX_THROUGH_MODELS + [ItemTypes.attributes.through]
+PAGE_CACHE_ARTICLE_MODELS = [LearningArticle, Tag]
+PAGE_CACHE_ARTICLE_THROUGH_MODELS = [LearningArticle.tags.through]
+
+
+def _page_cache_tag(sender):
+    if sender in PAGE_CACHE_CATALOG_MODELS or sender in PAGE_CACHE_CATALOG_THROUGH_MODELS:
+        return 'catalog'
+    if sender in PAGE_CACHE_ARTICLE_MODELS or sender in PAGE_CACHE_ARTICLE_THROUGH_MODELS:
+        return 'articles'
+    if sender is SiteSettings:
+        return 'settings'
+    return None
+
+
+@_on_save_and_delete(*PAGE_CACHE_CATALOG_MODELS, *PAGE_CACHE_ARTICLE_MODELS, SiteSettings)
+def invalidate_page_cache_on_change(sender, **kwargs):
+    tag = _page_cache_tag(sender)
+    if tag:
+        invalidate_tags(tag)
+
+
+@receiver(m2m_changed)
+def invalidate_page_cache_on_m2m_change(sender, action, **kwargs):
+    tag = _page_cache_tag(sender)
+    if tag and action.startswith('post_'):
+        invalidate_tags(tag)
+
+
+@receiver(catalog_entries_refreshed)
+@receiver(latest_listings_refreshed)
+@receiver(kit_deals_refreshed)
+@receiver(standalone_prices_updated)
+@receiver(attribute_values_refreshed)
+def invalidate_page_cache_on_sync(sender, **kwargs):
+    invalidate_tags('catalog')
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def invalidate_site_settings(sender, **kwargs):
+    bump_version_on_commit(SITE_SETTINGS_NAMESPACE)
@@ -0,0 +1,226 @@
+"""
+Cached site statistics and home page sections.
+
+``home`` and ``about`` show catalog totals that need two DISTINCT counts
+over the product and component links, and ``home`` adds flagship previews,
+recent items and the quick compare cards. Both are computed here and kept
+in Django's cache, so a warm page view does not touch the database.
+
+Entries are refreshed periodically (``SITE_STATS_TIMEOUT``) and on change:
+the signal receivers in ``frontend.signals`` bump the ``site_stats``
+namespace when catalog rows or articles are written. The
+``warm_site_stats`` management command recomputes both after a deploy.
+
+``browse_flagship`` groups the featured components by their primary
+itemtype. That layout (component ids per itemtype and the sidebar counts)
+is cached under its own ``flagship_layout`` namespace, which is only bumped
+when a featured component, an itemtype or an itemtype assignment of a
+featured component changes; the components themselves are loaded per
+request.
+"""
+
+from django.core.cache import cache
+from django.db.models import OuterRef, Prefetch, Q, Subquery, UUIDField
+
+from toolanalysis.models import Attributes, Brands, Categories, ComponentAttributes, Components, ItemTypes, Products
+from .cache_utils import bump_version_on_commit, get_version
+from .models import LearningArticle
+
+SITE_STATS_NAMESPACE = 'site_stats'
+SITE_STATS_KEY_PREFIX = 'frontend:site_stats:'
+SITE_STATS_TIMEOUT = 60 * 15
+
+FLAGSHIP_LAYOUT_NAMESPACE = 'flagship_layout'
+FLAGSHIP_LAYOUT_KEY_PREFIX = 'frontend:flagship_layout:'
+FLAGSHIP_LAYOUT_TIMEOUT = 60 * 60 * 6
+
+
+def compute_site_stats():
+    """Return the catalog totals shown on the home and about pages."""
+    return {
+        'total_products': Products.objects.count(),
+        'total_components': Components.objects.count(),
+        'total_brands': Brands.objects.filter(
+            Q(products__isnull=False) | Q(components__isnull=False)
+        ).distinct().count(),
+        'total_categories': Categories.objects.filter(
+            Q(products__isnull=False) | Q(components__isnull=False)
+        ).distinct().count(),
+    }
+
+
+def compute_home_sections():
+    """Return the home page sections (articles, previews, quick compare) as evaluated lists."""
+    # Latest published articles (first 3), ignoring pin status
+    latest_articles = list(LearningArticle.objects.filter(
+        is_published=True
+    ).order_by('-published_at', '-created_at').prefetch_related('tags')[:3])
+
+    # Featured components by showcase priority: the first 4 are the preview,
+    # the first one picks the quick compare item type
+    featured = list(Components.objects.filter(
+        is_featured=True
+    ).select_related('brand').prefetch_related('categories', 'subcategories', 'itemtypes').order_by(
+        '-showcase_priority', 'name'
+    )[:4])
+
+    recent_products = list(
+        Products.objects.select_related('brand').prefetch_related('productimages_set').order_by('-releasedate')[:3]
+    )
+    recent_components = list(Components.objects.select_related('brand').order_by('-id')[:3])
+
+    quick_compare_title = None
+    quick_compare_itemtype = None
+    if featured:
+        itemtypes = list(featured[0].itemtypes.all())
+        quick_compare_itemtype = itemtypes[0] if itemtypes else None
+        if quick_compare_itemtype:
+            quick_compare_title = f"Featured {quick_compare_itemtype.name}"
+
+    # Important attributes for the item type (to show labels even if no values)
+    important_attributes = []
+    flagship_components = []
+    if quick_compare_itemtype:
+        important_attributes = list(Attributes.objects.filter(
+            itemtypes=quick_compare_itemtype
+        ).order_by('sortorder', 'name')[:4])
+
+        # Top 2 featured components of that item type
+        flagship_components = list(Components.objects.filter(
+            is_featured=True,
+            itemtypes=quick_compare_itemtype
+        ).select_related('brand', 'motortype').prefetch_related(
+            'categories', 'subcategories', 'itemtypes', 'batteryplatforms', 'productlines',
+            Prefetch('componentattributes_set',
+                     queryset=ComponentAttributes.objects.select_related('attribute').order_by(
+                         'attribute__sortorder', 'attribute__name'))
+        ).order_by('-showcase_priority', 'name')[:2])
+
+    return {
+        'latest_articles': latest_articles,
+        'flagship_preview': featured,
+        'recent_products': recent_products,
+        'recent_components': recent_components,
+        'flagship_components': flagship_components,
+        'quick_compare_title': quick_compare_title,
+        'important_attributes': important_attributes,
+        'has_flagship_products': bool(featured),
+    }
+
+
+SECTIONS = {
+    'stats': compute_site_stats,
+    'home': compute_home_sections,
+}
+
+
+def _key(name):
+    return f'{SITE_STATS_KEY_PREFIX}{name}:{get_version(SITE_STATS_NAMESPACE)}'
+
+
+def _get(name):
+    value = cache.get(_key(name))
+    if value is None:
+        value = SECTIONS[name]()
+        cache.set(_key(name), value, SITE_STATS_TIMEOUT)
+    return value
+
+
+def get_site_stats():
+    """Cached compute_site_stats."""
+    return _get('stats')
+
+
+def get_home_sections():
+    """Cached compute_home_sections."""
+    return _get('home')
+
+
+def warm_site_stats():
+    """Recompute and store every section. Returns {section name: value}."""
+    values = {}
+    for name, builder in SECTIONS.items():
+        values[name] = builder()
+        cache.set(_key(name), values[name], SITE_STATS_TIMEOUT)
+    return values
+
+
+def invalidate_site_stats():
+    bump_version_on_commit(SITE_STATS_NAMESPACE)
+
+
+def compute_flagship_layout():
+    """
+    Group the featured components by primary itemtype, in two queries.
+
+    The primary itemtype is the component's first itemtype by sortorder and
+    name, picked in SQL. Groups keep the order of their first component by
+    showcase priority; the sidebar lists them by itemtype sortorder and name.
+
+    Returns:
+        dict: {'groups': [{'name', 'slug', 'itemtype', 'component_ids'}],
+               'itemtype_metadata': sidebar entries, 'featured_ids': set of every featured id}
+    """
+    primary_itemtype = Components.itemtypes.through.objects.filter(
+        components_id=OuterRef('pk')
+    ).order_by('itemtypes__sortorder', 'itemtypes__name').values('itemtypes_id')[:1]
+    rows = list(Components.objects.filter(is_featured=True).annotate(
+        primary_itemtype_id=Subquery(primary_itemtype, output_field=UUIDField())
+    ).order_by('-showcase_priority', 'name').values_list('id', 'primary_itemtype_id'))
+    itemtypes = ItemTypes.objects.in_bulk({itemtype_id for _, itemtype_id in rows if itemtype_id})
+
+    groups = {}
+    for component_id, itemtype_id in rows:
+        if itemtype_id is None:
+            continue
+        itemtype = itemtypes[itemtype_id]
+        group = groups.get(itemtype.name)
+        if group is None:
+            group = groups[itemtype.name] = {
+                'name': itemtype.name,
+                'slug': itemtype.name.lower().replace(' ', '-').replace('&', 'and'),
+                'itemtype': itemtype,
+                'component_ids': [],
+            }
+        group['component_ids'].append(component_id)
+
+    itemtype_metadata = sorted((
+        {
+            'name': group['name'],
+            'slug': group['slug'],
+            'count': len(group['component_ids']),
+            'sortorder': group['itemtype'].sortorder or 0,
+        }
+        for group in groups.values()
+    ), key=lambda x: (x['sortorder'], x['name']))
+
+    return {
+        'groups': list(groups.values()),
+        'itemtype_metadata': itemtype_metadata,
+        'featured_ids': {component_id for component_id, _ in rows},
+    }
+
+
+def _flagship_layout_key():
+    return f'{FLAGSHIP_LAYOUT_KEY_PREFIX}{get_version(FLAGSHIP_LAYOUT_NAMESPACE)}'
+
+
+def get_flagship_layout():
+    """Cached compute_flagship_layout."""
+    layout = cache.get(_flagship_layout_key())
+    if layout is None:
+        layout = compute_flagship_layout()
+        cache.set(_flagship_layout_key(), layout, FLAGSHIP_LAYOUT_TIMEOUT)
+    return layout
+
+
+def is_flagship_component(component):
+    """Whether the component is featured now or in the cached flagship layout."""
+    if component.is_featured:
+        return True
+    layout = cache.get(_flagship_layout_key())
+    return layout is not None and component.pk in layout['featured_ids']
+
+
+def invalidate_flagship_layout():
+    bump_version_on_commit(FLAGSHIP_LAYOUT_NAMESPACE)
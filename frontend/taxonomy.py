@@ -0,0 +1,187 @@
+"""
+In-memory Categories / Subcategories / ItemTypes tree.
+
+The three taxonomy tables are small and change rarely, but breadcrumbs and
+hierarchy filters used to query them on every request. ``get_taxonomy``
+loads them and their links once per process and answers lookups by id,
+name and fullname, parents and children from dictionaries, plus the
+precomputed closures (a node and all its descendants, or all its
+ancestors) that make a category or subcategory filter match items tagged
+anywhere below it (see ``frontend.catalog_index`` and
+``frontend.catalog_utils``). The tree is rebuilt after the
+``taxonomy`` namespace is bumped by the signal receivers in
+``frontend.signals``.
+"""
+
+from collections import defaultdict
+
+from toolanalysis.models import Categories, ItemTypes, Subcategories
+from .cache_utils import VersionedLoader, bump_version_on_commit
+
+TAXONOMY_NAMESPACE = 'taxonomy'
+
+# Item relations (and catalog index facet keys) of the three levels
+HIERARCHY_KEYS = ('categories', 'subcategories', 'itemtypes')
+
+# Through models whose rows link the taxonomy levels
+TAXONOMY_THROUGH_MODELS = [
+    Subcategories.categories.through,
+    ItemTypes.categories.through,
+    ItemTypes.subcategories.through,
+]
+
+
+def _links(through, source, target):
+    """Return ({source_id: [target_ids]}, {target_id: [source_ids]}) for one link table."""
+    forward = defaultdict(list)
+    backward = defaultdict(list)
+    for source_id, target_id in through.objects.order_by().values_list(f'{source}_id', f'{target}_id'):
+        forward[source_id].append(target_id)
+        backward[target_id].append(source_id)
+    return forward, backward
+
+
+class Taxonomy:
+    """Snapshot of the taxonomy tree with parent and child maps."""
+
+    def __init__(self):
+        self.categories = {category.id: category for category in Categories.objects.all()}
+        self.subcategories = {subcategory.id: subcategory for subcategory in Subcategories.objects.all()}
+        self.itemtypes = {itemtype.id: itemtype for itemtype in ItemTypes.objects.all()}
+
+        # First match in sidebar order, as the name lookups used to return
+        self.category_by_name = {}
+        for category in self.categories.values():
+            self.category_by_name.setdefault(category.name, category)
+        self.subcategory_by_fullname = {
+            subcategory.fullname: subcategory for subcategory in self.subcategories.values()
+        }
+
+        self.subcategory_categories, self.category_subcategories = _links(
+            Subcategories.categories.through, 'subcategories', 'categories'
+        )
+        self.itemtype_categories, self.category_itemtypes = _links(
+            ItemTypes.categories.through, 'itemtypes', 'categories'
+        )
+        self.itemtype_subcategories, self.subcategory_itemtypes = _links(
+            ItemTypes.subcategories.through, 'itemtypes', 'subcategories'
+        )
+        self.closures = self._build_closures()
+        self.ancestor_closures = self._build_ancestor_closures()
+
+    def _build_closures(self):
+        """Map every node id to itself plus all its descendants at every level."""
+        closures = {itemtype_id: frozenset([itemtype_id]) for itemtype_id in self.itemtypes}
+        for subcategory_id in self.subcategories:
+            closures[subcategory_id] = frozenset(
+                [subcategory_id, *self.subcategory_itemtypes.get(subcategory_id, ())]
+            )
+        for category_id in self.categories:
+            closure = {category_id, *self.category_itemtypes.get(category_id, ())}
+            for subcategory_id in self.category_subcategories.get(category_id, ()):
+                closure |= closures[subcategory_id]
+            closures[category_id] = frozenset(closure)
+        return closures
+
+    def _build_ancestor_closures(self):
+        """Map every node id to {level key: ids of itself and all its ancestors at that level}."""
+        ancestor_closures = defaultdict(lambda: defaultdict(set))
+        for key in HIERARCHY_KEYS:
+            for node_id in getattr(self, key):
+                for descendant_id in self.closures[node_id]:
+                    ancestor_closures[descendant_id][key].add(node_id)
+        return {node_id: dict(levels) for node_id, levels in ancestor_closures.items()}
+
+    def ancestors(self, node_id):
+        """
+        Return the parents of a category, subcategory or itemtype id.
+
+        Returns:
+            dict: {'categories': [ids], 'subcategories': [ids]}
+        """
+        if node_id in self.subcategories:
+            return {'categories': list(self.subcategory_categories.get(node_id, ())), 'subcategories': []}
+        if node_id in self.itemtypes:
+            return {
+                'categories': list(self.itemtype_categories.get(node_id, ())),
+                'subcategories': list(self.itemtype_subcategories.get(node_id, ())),
+            }
+        return {'categories': [], 'subcategories': []}
+
+    def descendants(self, node_id):
+        """
+        Return the children of a category or subcategory id.
+
+        Returns:
+            dict: {'subcategories': [ids], 'itemtypes': [ids]}
+        """
+        if node_id in self.categories:
+            return {
+                'subcategories': list(self.category_subcategories.get(node_id, ())),
+                'itemtypes': list(self.category_itemtypes.get(node_id, ())),
+            }
+        if node_id in self.subcategories:
+            return {'subcategories': [], 'itemtypes': list(self.subcategory_itemtypes.get(node_id, ()))}
+        return {'subcategories': [], 'itemtypes': []}
+
+    def closure(self, node_id):
+        """Return the node id and every descendant id, whatever their level."""
+        return self.closures.get(node_id, frozenset([node_id]))
+
+    def ancestor_closure(self, node_id):
+        """Return {level key: ids} of the node and every ancestor, whatever their level."""
+        return self.ancestor_closures.get(node_id, {})
+
+    def expand_memberships(self, memberships):
+        """
+        Add the ancestors of an item's categories, subcategories and itemtypes.
+
+        Args:
+            memberships: {level key: set of node ids} of one item, updated in place
+        """
+        nodes = [node_id for key in HIERARCHY_KEYS for node_id in memberships.get(key, ())]
+        for node_id in nodes:
+            for key, ancestor_ids in self.ancestor_closure(node_id).items():
+                memberships.setdefault(key, set()).update(ancestor_ids)
+
+    def breadcrumb(self, itemtype):
+        """
+        Breadcrumb from an itemtype's fullname (Category/Subcategory/ItemType).
+
+        Returns:
+            list: [{'label': str, 'query': catalog query string or None}]
+        """
+        if not itemtype or not itemtype.fullname:
+            return []
+
+        segments = [seg.strip() for seg in itemtype.fullname.split('/') if seg.strip()]
+        links = []
+        if len(segments) >= 1:
+            category = self.category_by_name.get(segments[0])
+            links.append({
+                'label': segments[0],
+                'query': f'category[]={category.id}' if category else None,
+            })
+        if len(segments) >= 2:
+            subcategory = self.subcategory_by_fullname.get(f'{segments[0]}/{segments[1]}')
+            links.append({
+                'label': segments[1],
+                'query': f'subcategory[]={subcategory.id}' if subcategory else None,
+            })
+        links.append({
+            'label': itemtype.name,
+            'query': f'itemtype[]={itemtype.id}',
+        })
+        return links
+
+
+_loader = VersionedLoader(TAXONOMY_NAMESPACE, Taxonomy)
+
+
+def get_taxonomy():
+    """Return the current taxonomy tree, loading it if needed."""
+    return _loader.get()
+
+
+def invalidate_taxonomy():
+    bump_version_on_commit(TAXONOMY_NAMESPACE)
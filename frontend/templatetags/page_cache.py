@@ -0,0 +1,49 @@
+from django import template
+from django.core.cache import cache
+
+from ..page_cache import fragment_key, is_enabled
+
+register = template.Library()
+
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, timeout, name, tags, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.tags = tags
+        self.vary_on = vary_on
+
+    def render(self, context):
+        if not is_enabled():
+            return self.nodelist.render(context)
+        tags = [tag.strip() for tag in str(self.tags.resolve(context)).split(',') if tag.strip()]
+        key = fragment_key(
+            str(self.name.resolve(context)),
+            tags,
+            [value.resolve(context) for value in self.vary_on],
+            context.get('request'),
+        )
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, int(self.timeout.resolve(context)))
+        return content
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Cache a template block, varying on the request query (paging excluded).
+
+    Usage: {% cachefragment 300 "filter_sidebar" "catalog,settings" item_type %}...{% endcachefragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 4:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' takes at least three arguments: timeout, fragment name and tags"
+        )
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    timeout, name, tags, *vary_on = (parser.compile_filter(bit) for bit in bits[1:])
+    return CacheFragmentNode(nodelist, timeout, name, tags, vary_on)
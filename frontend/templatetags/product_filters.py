@@ -1,6 +1,8 @@
 from django import template
 from decimal import Decimal, InvalidOperation
 
+from toolanalysis.attribute_values import format_display_value
+
 register = template.Library()
 
 def format_attribute_value_helper(component_attr):
@@ -8,79 +10,24 @@ def format_attribute_value_helper(component_attr):
     Format ComponentAttributes value based on the attribute's unit field.
     Returns ONLY the formatted numeric value (without unit).
     
-    Formatting rules:
-    - No decimals (whole numbers): MPH, CFM, PSI, W, °F, lm, dB, IPM, RPM, SPM, in-lb
-    - One decimal: Ah, A, in
-    - Float/as needed: degrees
-    - Conditional (threshold 100): V - 0 decimals if >= 100, 1 decimal if < 100
-    - Currency (2 decimals): USD, $
-    - No commas anywhere
+    Rows carry the formatted string in ``display_value``, computed on save
+    (see toolanalysis.attribute_values). Rows saved before that column
+    existed, or built in memory, fall back to the memoized formatter, which
+    applies the same unit rules.
     """
     if not component_attr:
         return ""
     
+    display_value = getattr(component_attr, 'display_value', None)
+    if display_value is not None:
+        return display_value
+    
     value = component_attr.value
     attribute = getattr(component_attr, 'attribute', None)
-    
-    # Early returns
-    if value is None or value == "":
+    if value is None or value == "" or not attribute:
         return value or ""
     
-    if not attribute:
-        return value
-    
-    unit = getattr(attribute, 'unit', None)
-    if not unit:
-        return value
-    
-    unit = str(unit).strip().lower()
-    
-    try:
-        # Convert value to float for formatting
-        clean_value = str(value).replace(',', '').replace(' ', '').strip()
-        numeric_value = float(clean_value)
-        
-        # Currency - 2 decimals, no commas, include $ prefix
-        if unit in ['$', 'usd', 'dollars', 'dollar']:
-            return f"${numeric_value:.2f}"
-        
-        # Voltage - conditional decimals (threshold 100)
-        if unit in ['v', 'volt', 'volts', 'voltage']:
-            decimals = 0 if abs(numeric_value) >= 100 else 1
-            return f"{numeric_value:.{decimals}f}"
-        
-        # No decimals (whole numbers)
-        if unit in ['mph', 'cfm', 'psi', 'w', 'watts', 'watt', 
-                   '°f', 'f', 'fahrenheit',
-                   'lm', 'lumen', 'lumens',
-                   'db', 'decibel', 'decibels',
-                   'ipm', 'rpm', 'spm',
-                   'in-lb', 'in-lbs', 'inch-pound', 'inch-pounds']:
-            return f"{int(numeric_value)}"
-        
-        # One decimal
-        if unit in ['ah', 'amp-hour', 'amp-hours', 'ampere-hour', 'ampere-hours',
-                   'a', 'amp', 'amps', 'ampere', 'amperes', 'amperage',
-                   'in', 'inch', 'inches']:
-            return f"{numeric_value:.1f}"
-        
-        # Float/as needed - degrees (display as-is, preserve original decimals)
-        if unit in ['degrees', 'degree', 'deg', '°']:
-            # If value has decimals, preserve them; otherwise format nicely
-            if '.' in str(value):
-                return f"{numeric_value}"
-            else:
-                return f"{int(numeric_value)}"
-        
-        # Default: If unit exists but no rule matches, return with 1 decimal
-        return f"{numeric_value:.1f}"
-    
-    except (ValueError, TypeError):
-        # Can't convert to number - return original value
-        return value
-    except Exception:
-        # Any other error - return original value
-        return value
+    return format_display_value(value, getattr(attribute, 'unit', None))
 
 @register.filter
 def split_bullets(value):
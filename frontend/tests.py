@@ -1,3 +1,1315 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.deletion import Collector
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from datetime import timedelta
+from decimal import Decimal
+
+from toolanalysis import attribute_values, price_sync, pricing_calculator, proration
+from toolanalysis.models import (
+    Attributes,
+    BatteryVoltages,
+    Brands,
+    CatalogEntries,
+    Categories,
+    ComponentAttributes,
+    ComponentClasses,
+    ComponentPricingHistory,
+    Components,
+    Features,
+    ComponentFeatures,
+    ComponentKitDeals,
+    ItemTypes,
+    LatestPriceListings,
+    PriceListings,
+    ProductComponents,
+    Products,
+    Retailers,
+    Subcategories,
+)
+
+from frontend import catalog_utils, detail_loaders, page_cache, pagination, pricing_utils, search_index, site_stats
+from frontend.catalog_index import get_catalog_index
+from frontend.models import SiteSettings
+from frontend.taxonomy import get_taxonomy
+from frontend.templatetags.product_filters import format_attribute_value_helper
+
+
+# Cache hits are asserted to run no queries, which the database cache backend would
+LOCAL_CACHE = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+
+
+def setUpModule():
+    LOCAL_CACHE.enable()
+
+
+def tearDownModule():
+    LOCAL_CACHE.disable()
+
+
+class CatalogFacetTests(TestCase):
+    def setUp(self):
+        # Process-local indexes may hold rows from rolled-back test transactions
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand_a = Brands.objects.create(name="Alpha")
+        cls.brand_b = Brands.objects.create(name="Bravo")
+        cls.v18 = BatteryVoltages.objects.create(value=18)
+        cls.v12 = BatteryVoltages.objects.create(value=12)
+        cls.feature = Features.objects.create(name="Brushless")
+
+        cls.drill = Components.objects.create(name="Drill", sku="D-1", brand=cls.brand_a)
+        cls.drill.batteryvoltages.add(cls.v18)
+        cls.driver = Components.objects.create(name="Driver", sku="D-2", brand=cls.brand_b)
+        cls.driver.batteryvoltages.add(cls.v12)
+        cls.saw = Components.objects.create(name="Saw", sku="S-1", brand=cls.brand_a)
+        cls.saw.batteryvoltages.add(cls.v12)
+        ComponentFeatures.objects.create(component=cls.drill, feature=cls.feature)
+
+    def _filters(self, **overrides):
+        filters = {
+            'search': '',
+            'brand_ids': [],
+            'voltage_ids': [],
+            'attribute_filters': {},
+            'feature_filters': {},
+            'feature_ids': [],
+        }
+        filters.update(overrides)
+        return filters
+
+    def test_unfiltered_options_include_counts(self):
+        options = catalog_utils.get_filter_options(self._filters(), Components)
+
+        self.assertEqual([b.name for b in options['brands']], ["Alpha", "Bravo"])
+        self.assertEqual([b.item_count for b in options['brands']], [2, 1])
+        self.assertEqual({v.value: v.item_count for v in options['voltages']}, {12: 2, 18: 1})
+        self.assertEqual([f.name for f in options['features']], ["Brushless"])
+
+    def test_facet_excludes_its_own_selection(self):
+        filters = self._filters(brand_ids=[self.brand_a.id])
+        options = catalog_utils.get_filter_options(filters, Components)
+
+        # Brand options ignore the brand selection itself
+        self.assertEqual([b.name for b in options['brands']], ["Alpha", "Bravo"])
+        # Other facets are narrowed by the brand selection
+        self.assertEqual({v.value: v.item_count for v in options['voltages']}, {12: 1, 18: 1})
+
+    def test_item_failing_one_selection_counts_only_for_that_facet(self):
+        filters = self._filters(brand_ids=[self.brand_a.id], voltage_ids=[self.v12.id])
+        options = catalog_utils.get_filter_options(filters, Components)
+
+        self.assertEqual({b.name: b.item_count for b in options['brands']}, {"Alpha": 1, "Bravo": 1})
+        self.assertEqual({v.value: v.item_count for v in options['voltages']}, {12: 1, 18: 1})
+        self.assertEqual(options['features'], [])
+
+        counts = catalog_utils.calculate_filter_counts(filters, options)
+        self.assertEqual(counts['brands'], {'selected': 1, 'total': 2})
+
+
+    def test_attribute_options_follow_filters(self):
+        torque = Attributes.objects.create(name="Torque", unit="in-lbs")
+        speed = Attributes.objects.create(name="Speed")
+        ComponentAttributes.objects.create(component=self.drill, attribute=torque, value="500")
+        ComponentAttributes.objects.create(component=self.driver, attribute=torque, value="1500")
+        ComponentAttributes.objects.create(component=self.driver, attribute=speed, value="")
+
+        options = catalog_utils.get_attribute_options(self._filters())
+        self.assertEqual([(o['name'], o['unit'], o['values']) for o in options], [
+            ("Speed", None, []),
+            ("Torque", "in-lbs", ["1500", "500"]),
+        ])
+
+        filters = self._filters(brand_ids=[self.brand_a.id], attribute_filters={str(torque.id): ["500"]})
+        options = catalog_utils.get_attribute_options(filters)
+        self.assertEqual([(o['name'], o['values'], o['selected_values']) for o in options], [
+            ("Torque", ["500"], ["500"]),
+        ])
+
+
+    def test_attribute_ranges_use_parsed_values(self):
+        torque = Attributes.objects.create(name="Torque", unit="in-lbs")
+        ComponentAttributes.objects.create(component=self.drill, attribute=torque, value="500")
+        ComponentAttributes.objects.create(component=self.driver, attribute=torque, value="1,500 in-lb")
+        ComponentAttributes.objects.create(component=self.saw, attribute=torque, value="n/a")
+
+        request = RequestFactory().get('/components/', {f'attr_{torque.id}_min': '1200', 'attr_bogus_max': '4'})
+        filters = catalog_utils.parse_filter_params(request)
+        self.assertEqual(filters['attribute_ranges'], {str(torque.id): {'min': Decimal('1200')}})
+        self.assertEqual(filters['attribute_filters'], {})
+
+        def matching(**bounds):
+            filters = self._filters(attribute_ranges={str(torque.id): bounds})
+            return set(catalog_utils.build_filter_query(Components, filters).values_list('id', flat=True))
+
+        self.assertEqual(matching(min=Decimal('1200')), {self.driver.id})
+        self.assertEqual(matching(max=Decimal('1500')), {self.drill.id, self.driver.id})
+        self.assertEqual(matching(min=Decimal('501'), max=Decimal('1499')), set())
+
+
+class CatalogIndexTests(CatalogFacetTests):
+    """Runs the facet tests above against the index, plus index-specific checks."""
+
+    def test_filter_query_matches_join_based_filters(self):
+        filters = self._filters(brand_ids=[self.brand_a.id, self.brand_b.id], voltage_ids=[self.v12.id])
+        indexed = set(catalog_utils.build_filter_query(Components, filters).values_list('id', flat=True))
+        with override_settings(CATALOG_FACET_INDEX_ENABLED=False):
+            joined = set(catalog_utils.build_filter_query(Components, filters).values_list('id', flat=True))
+        self.assertEqual(indexed, joined)
+        self.assertEqual(indexed, {self.driver.id, self.saw.id})
+
+    def test_index_is_rebuilt_after_m2m_change(self):
+        index = get_catalog_index(Components)
+        self.assertEqual(index.facet_counts('voltages', index.all)[self.v18.id], 1)
+
+        self.saw.batteryvoltages.add(self.v18)
+
+        index = get_catalog_index(Components)
+        self.assertEqual(index.facet_counts('voltages', index.all)[self.v18.id], 2)
+
+
+@override_settings(CATALOG_FACET_INDEX_ENABLED=False)
+class CatalogFacetSqlTests(CatalogFacetTests):
+    """Runs the facet tests above against the grouped SQL fallback."""
+
+
+class CatalogSortingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brands.objects.create(name="Alpha")
+        cls.first = Categories.objects.create(name="First", fullname="First", sortorder=1)
+        cls.second = Categories.objects.create(name="Second", fullname="Second", sortorder=2)
+        cls.saw = Components.objects.create(name="Saw", brand=cls.brand, fair_price_narrative={'fair_price': '$149.00'})
+        cls.saw.categories.add(cls.second)
+        cls.drill = Components.objects.create(name="Drill", fair_price_narrative={'fair_price': 99})
+        cls.drill.categories.add(cls.first, cls.second)
+        cls.light = Components.objects.create(name="Light")
+
+    def _sorted_names(self, sort, direction='asc'):
+        queryset = catalog_utils.apply_sorting(Components.objects.all(), sort, direction, Components)
+        return [component.name for component in queryset]
+
+    def test_catalog_entries_follow_source_rows(self):
+        entry = CatalogEntries.objects.get(component=self.drill)
+        self.assertEqual(entry.category_sortorder, 1)
+        self.assertEqual(CatalogEntries.objects.get(component=self.saw).brand_name, "Alpha")
+
+        self.second.sortorder = 0
+        self.second.save()
+        self.assertEqual(CatalogEntries.objects.get(component=self.drill).category_sortorder, 0)
+
+    def test_default_sort_uses_category_sortorder_without_duplicates(self):
+        self.assertEqual(self._sorted_names('name'), ["Drill", "Saw", "Light"])
+        self.assertEqual(self._sorted_names('name', 'desc'), ["Light", "Saw", "Drill"])
+
+    def test_fair_price_sort_puts_missing_prices_last(self):
+        self.assertEqual(self._sorted_names('fair_price'), ["Drill", "Saw", "Light"])
+        self.assertEqual(self._sorted_names('fair_price', 'desc'), ["Saw", "Drill", "Light"])
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        prices = [None, 20, 10, None, 10, 30, None]
+        for number, price in enumerate(prices):
+            narrative = {'fair_price': price} if price is not None else None
+            Components.objects.create(name=f"Item {number % 3}", fair_price_narrative=narrative)
+
+    def _ordered(self, direction='asc'):
+        return catalog_utils.apply_sorting(Components.objects.all(), 'fair_price', direction, Components)
+
+    def _walk(self, queryset, page_size):
+        pages, cursor = [], ''
+        while cursor is not None:
+            page = catalog_utils.paginate_results(queryset, 1, page_size, cursor)
+            pages.append(page)
+            cursor = page.next_cursor
+        return pages
+
+    def test_cursor_pages_match_offset_order(self):
+        for direction in ('asc', 'desc'):
+            queryset = self._ordered(direction)
+            expected = list(queryset.values_list('id', flat=True))
+            pages = self._walk(queryset, 3)
+
+            self.assertEqual([item.id for page in pages for item in page], expected)
+            self.assertEqual([page.start_index() for page in pages], [1, 4, 7])
+            self.assertFalse(pages[0].has_previous())
+            self.assertFalse(pages[-1].has_next())
+
+    def test_previous_cursor_returns_previous_page(self):
+        pages = self._walk(self._ordered(), 3)
+        previous = catalog_utils.paginate_results(self._ordered(), 1, 3, pages[2].previous_cursor)
+
+        self.assertEqual([item.id for item in previous], [item.id for item in pages[1]])
+        self.assertEqual(previous.number, 2)
+        self.assertTrue(previous.has_next())
+
+    def test_foreign_cursor_falls_back_to_first_page(self):
+        cursor = self._walk(self._ordered(), 3)[0].next_cursor
+        page = catalog_utils.paginate_results(self._ordered('desc'), 1, 3, cursor)
+        self.assertEqual(page.offset, 0)
+
+        page = catalog_utils.paginate_results(self._ordered(), 1, 3, cursor + 'x')
+        self.assertEqual(page.offset, 0)
+
+    def test_count_is_cached_until_catalog_changes(self):
+        self.assertEqual(catalog_utils.paginate_results(self._ordered(), 1, 3).paginator.count, 7)
+        with self.assertNumQueries(0):
+            self.assertEqual(pagination.CachedCountPaginator(
+                self._ordered(), 3, namespace='catalog_index'
+            ).count, 7)
+
+        Components.objects.create(name="Item 9")
+        self.assertEqual(catalog_utils.paginate_results(self._ordered(), 1, 3).paginator.count, 8)
+
+
+class KitPricingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.drill = Components.objects.create(name="Drill", standalone_price=Decimal('150.00'))
+        cls.battery = Components.objects.create(name="Battery", standalone_price=Decimal('50.00'))
+        cls.bag = Components.objects.create(name="Bag")
+        cls.retailers = [Retailers.objects.create(name=name) for name in ("Shop A", "Shop B")]
+
+        cls.kits = []
+        for number, price in enumerate([Decimal('199.00'), Decimal('149.99')]):
+            kit = Products.objects.create(name=f"Kit {number}")
+            ProductComponents.objects.create(product=kit, component=cls.drill)
+            ProductComponents.objects.create(product=kit, component=cls.battery, quantity=2)
+            if number:
+                ProductComponents.objects.create(product=kit, component=cls.bag)
+            for offset, retailer in enumerate(cls.retailers):
+                PriceListings.objects.create(product=kit, retailer=retailer, price=price + offset)
+            cls.kits.append(kit)
+
+    def test_weights_follow_standalone_value(self):
+        weights = pricing_utils.calculate_proration_weights([
+            ('drill', 1, Decimal('150.00')), ('battery', 2, Decimal('50.00')), ('bag', 1, None),
+        ])
+        self.assertEqual(weights['drill']['weight'], Decimal('0.6'))
+        self.assertEqual(weights['battery']['weight'], Decimal('0.4'))
+        # Fully priced bundles leave nothing for unpriced components
+        self.assertEqual(weights['bag']['weight'], Decimal('0'))
+
+        prorated = pricing_utils.apply_proration_weights(weights, Decimal('100'))
+        self.assertEqual(prorated['battery']['effective_price'], Decimal('20'))
+        self.assertEqual(prorated['bag']['effective_price'], Decimal('0'))
+
+    def test_kit_pricing_matches_per_listing_proration(self):
+        kit_pricing = pricing_utils.get_component_kit_pricing(self.battery)
+
+        self.assertEqual(len(kit_pricing), 4)
+        for item in kit_pricing:
+            expected = pricing_utils.prorate_product_price_to_components(
+                item['product'], item['pricelisting'].price
+            )[self.battery.id]['effective_price']
+            # Kit deals are stored to the cent
+            self.assertEqual(item['component_pricing']['effective_price'], expected.quantize(Decimal('0.01')))
+
+    def test_kit_pricing_query_count_is_constant(self):
+        # Kit deals with their relations, then product images
+        with self.assertNumQueries(2):
+            pricing = pricing_utils.get_components_kit_pricing([self.drill, self.battery, self.bag])
+        self.assertEqual([len(pricing[c.id]) for c in (self.drill, self.battery, self.bag)], [4, 4, 2])
+
+
+class BulkProrationTests(TestCase):
+    def test_numpy_kernel_agrees_with_decimal_to_the_cent(self):
+        import random
+        rng = random.Random(7)
+        lines, listings = [], []
+        for product in range(200):
+            for component in range(rng.randint(1, 6)):
+                price = None if rng.random() < 0.2 else Decimal(rng.randint(100, 50000)) / 100
+                lines.append((product, f'{product}-{component}', rng.randint(1, 3), price))
+            for retailer in range(rng.randint(0, 4)):
+                listings.append((product, (product, retailer), Decimal(rng.randint(500, 99999)) / 100))
+        # Half-cent tie: $0.03 over two equally priced components
+        lines += [('tie', 'a', 1, Decimal('10.00')), ('tie', 'b', 1, Decimal('10.00'))]
+        listings.append(('tie', 'tie-listing', Decimal('0.03')))
+
+        vectorized = proration.bulk_prorate(lines, listings, use_numpy=True)
+        exact = proration.bulk_prorate(lines, listings, use_numpy=False)
+
+        self.assertEqual(vectorized, exact)
+        self.assertEqual(exact[('tie-listing', 'a')], Decimal('0.02'))
+
+
+@override_settings(MANUAL_PRICES_FILE='/nonexistent/manual_prices.json')
+class PricingCalculatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.retailer = Retailers.objects.create(name="Shop")
+        cls.drill = Components.objects.create(name="Drill", standalone_price=Decimal('100.00'))
+        cls.battery = Components.objects.create(name="Battery", standalone_price=Decimal('50.00'))
+        cls.bare_tool = Products.objects.create(name="Drill (tool only)")
+        ProductComponents.objects.create(product=cls.bare_tool, component=cls.drill)
+        cls.kit = Products.objects.create(name="Drill kit")
+        ProductComponents.objects.create(product=cls.kit, component=cls.drill)
+        ProductComponents.objects.create(product=cls.kit, component=cls.battery)
+
+    def _listing(self, product, price, days_ago=0):
+        return PriceListings.objects.create(
+            product=product, retailer=self.retailer, price=Decimal(price),
+            datepulled=timezone.now().date() - timedelta(days=days_ago),
+        )
+
+    def test_prices_only_new_listings(self):
+        self._listing(self.bare_tool, '89.00', days_ago=2)
+        self._listing(self.kit, '120.00', days_ago=2)
+
+        stats = pricing_calculator.update_all_component_pricing(log=lambda message: None)
+        self.assertEqual(stats['standalone_updated'], 1)
+        self.assertEqual(stats['prorated_updated'], 2)
+        self.assertEqual(stats['products_processed'], 2)
+        self.drill.refresh_from_db()
+        self.assertEqual(self.drill.standalone_price, Decimal('89.00'))
+        self.assertEqual(
+            ComponentPricingHistory.objects.get(source_type='prorated', component=self.battery).price,
+            Decimal('43.17'),
+        )
+
+        # Nothing new: nothing is recorded again
+        stats = pricing_calculator.update_all_component_pricing(log=lambda message: None)
+        self.assertEqual((stats['prorated_updated'], stats['products_processed']), (0, 0))
+
+        self._listing(self.kit, '110.00')
+        stats = pricing_calculator.update_all_component_pricing(log=lambda message: None)
+        self.assertEqual((stats['prorated_updated'], stats['products_processed']), (2, 1))
+        self.assertEqual(ComponentPricingHistory.objects.filter(source_type='prorated').count(), 4)
+
+    def test_standalone_price_changes_drop_cached_product_details(self):
+        self.assertEqual(detail_loaders.get_product_detail(self.kit.id)['total_component_value'], Decimal('150.00'))
+
+        self._listing(self.bare_tool, '89.00')
+        pricing_calculator.update_all_component_pricing(log=lambda message: None)
+
+        self.assertEqual(detail_loaders.get_product_detail(self.kit.id)['total_component_value'], Decimal('139.00'))
+
+    def test_dry_run_writes_nothing(self):
+        self._listing(self.kit, '120.00')
+        stats = pricing_calculator.update_all_component_pricing(dry_run=True, log=lambda message: None)
+        self.assertEqual(stats['prorated_updated'], 2)
+        self.assertFalse(ComponentPricingHistory.objects.exists())
+
+
+class LatestPriceListingsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Products.objects.create(name="Kit")
+        cls.shop_a = Retailers.objects.create(name="Shop A")
+        cls.shop_b = Retailers.objects.create(name="Shop B")
+
+    def _listing(self, retailer, price, days_ago):
+        return PriceListings.objects.create(
+            product=self.product, retailer=retailer, price=Decimal(price),
+            datepulled=timezone.now().date() - timedelta(days=days_ago),
+        )
+
+    def _latest_prices(self):
+        latest = pricing_utils.get_latest_product_pricelistings(self.product)
+        return {retailer_id: listing.price for retailer_id, listing in latest.items()}
+
+    def test_latest_listing_follows_writes(self):
+        self._listing(self.shop_a, '100.00', days_ago=5)
+        newest = self._listing(self.shop_a, '90.00', days_ago=1)
+        self._listing(self.shop_b, '95.00', days_ago=90)
+        self.assertEqual(LatestPriceListings.objects.count(), 2)
+        # Shop B's latest listing is outside the 60 day window
+        self.assertEqual(self._latest_prices(), {self.shop_a.id: Decimal('90.00')})
+
+        newest.delete()
+        self.assertEqual(self._latest_prices(), {self.shop_a.id: Decimal('100.00')})
+
+        moved = PriceListings.objects.get(retailer=self.shop_a)
+        moved.retailer = self.shop_b
+        moved.save()
+        self.assertEqual(self._latest_prices(), {self.shop_b.id: Decimal('100.00')})
+
+    def test_refresh_reads_only_the_requested_pairs(self):
+        self._listing(self.shop_a, '100.00', days_ago=5)
+        self._listing(self.shop_a, '90.00', days_ago=1)
+        self._listing(self.shop_b, '95.00', days_ago=2)
+        self._listing(None, '80.00', days_ago=3)
+
+        # Bulk updates bypass the signal receivers
+        PriceListings.objects.filter(retailer__isnull=True).update(price=Decimal('70.00'))
+        PriceListings.objects.filter(retailer=self.shop_b).update(price=Decimal('60.00'))
+
+        self.assertEqual(price_sync.refresh_latest_listings([
+            (self.product.id, self.shop_a.id), (self.product.id, None),
+        ]), 2)
+        latest = dict(LatestPriceListings.objects.values_list('retailer_id', 'price'))
+        self.assertEqual(latest, {
+            self.shop_a.id: Decimal('90.00'),
+            self.shop_b.id: Decimal('95.00'),
+            None: Decimal('70.00'),
+        })
+
+
+class AttributeValueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.component = Components.objects.create(name="Drill")
+        cls.chuck = Attributes.objects.create(name="Chuck Size", unit="inches")
+
+    def test_values_are_parsed_on_save(self):
+        cases = {
+            "1,200": Decimal('1200'),
+            "1/2": Decimal('0.5'),
+            "1-1/2 in": Decimal('1.5'),
+            "13 mm": None,
+            "Keyless": None,
+        }
+        for value, expected in cases.items():
+            attr = ComponentAttributes.objects.create(component=self.component, attribute=self.chuck, value=value)
+            attr.refresh_from_db()
+            self.assertEqual(attr.numeric_value, expected, value)
+            self.assertEqual(attr.unit, "in")
+
+    def test_unit_change_and_backfill_refresh_rows(self):
+        attr = ComponentAttributes.objects.create(component=self.component, attribute=self.chuck, value="13 mm")
+        self.chuck.unit = "mm"
+        self.chuck.save()
+        attr.refresh_from_db()
+        self.assertEqual((attr.numeric_value, attr.unit), (Decimal('13'), "mm"))
+
+        ComponentAttributes.objects.update(numeric_value=None, unit=None)
+        out = StringIO()
+        call_command('backfill_attribute_values', stdout=out)
+        self.assertIn("Updated 1 component attribute values", out.getvalue())
+        attr.refresh_from_db()
+        self.assertEqual((attr.numeric_value, attr.unit), (Decimal('13'), "mm"))
+
+    def test_backfill_drops_cached_attribute_text(self):
+        torque = Attributes.objects.create(name="Torque", unit="in-lbs")
+        attr = ComponentAttributes.objects.create(component=self.component, attribute=torque, value="1,200")
+        ComponentAttributes.objects.filter(pk=attr.pk).update(display_value="1,200 (old)")
+
+        def cached_value():
+            comparison = detail_loaders.get_component_comparison([self.component.id])
+            return comparison['components'][0]['additional_attributes']['Torque']['value']
+
+        self.assertEqual(cached_value(), "1,200 (old)")
+        # bulk_update sends no post_save for the corrected rows
+        call_command('backfill_attribute_values', stdout=StringIO())
+        self.assertEqual(cached_value(), "1200")
+
+    def test_display_values_are_stored_on_save(self):
+        torque = Attributes.objects.create(name="Torque", unit="in-lbs")
+        attr = ComponentAttributes.objects.create(component=self.component, attribute=torque, value="1,200 in-lbs")
+        fraction = ComponentAttributes.objects.create(component=self.component, attribute=self.chuck, value="1/2")
+        attrs = list(ComponentAttributes.objects.filter(pk__in=[attr.pk, fraction.pk]).order_by('value'))
+        self.assertEqual([a.display_value for a in attrs], ["1,200 in-lbs", "1/2"])
+        with self.assertNumQueries(0):
+            self.assertEqual([format_attribute_value_helper(a) for a in attrs], ["1,200 in-lbs", "1/2"])
+
+    def test_formatter_rules_by_unit(self):
+        cases = [
+            ("18", "V", "18.0"),
+            ("120", "volts", "120"),
+            ("5", "Ah", "5.0"),
+            ("1,700", "RPM", "1700"),
+            # Values carrying their own unit are shown as written
+            ("1,200 in-lbs", "in-lbs", "1,200 in-lbs"),
+            ("12.5", "degrees", "12.5"),
+            ("45", "deg", "45"),
+            ("99", "$", "$99.00"),
+            ("3", "lbs", "3.0"),
+            ("Keyless", "in", "Keyless"),
+            ("7", None, "7"),
+        ]
+        for value, unit, expected in cases:
+            self.assertEqual(attribute_values.format_display_value(value, unit), expected, (value, unit))
+
+        # Unsaved rows fall back to the formatter
+        attribute = Attributes(name="Voltage", unit="V")
+        self.assertEqual(format_attribute_value_helper(ComponentAttributes(attribute=attribute, value="20")), "20.0")
+
+
+class ComponentKitDealsTests(KitPricingTests):
+    """Kit deals follow the data they are computed from."""
+
+    def _battery_prices(self, **kwargs):
+        return [
+            item['component_pricing']['effective_price']
+            for item in pricing_utils.get_component_kit_pricing(self.battery, **kwargs)
+        ]
+
+    def test_sorting_and_filtering_in_sql(self):
+        prices = self._battery_prices(sort='best_price')
+        self.assertEqual(prices, sorted(prices))
+        self.assertEqual(len(self._battery_prices(retailer_id=self.retailers[0].id)), 2)
+        self.assertEqual(len(self._battery_prices(sort='best_price', limit=1)), 1)
+
+        product_names = [
+            item['product'].name
+            for item in pricing_utils.get_component_kit_pricing(self.battery, sort='product_name')
+        ]
+        self.assertEqual(product_names, ["Kit 0", "Kit 0", "Kit 1", "Kit 1"])
+
+    def test_deals_refresh_on_standalone_price_and_bundle_changes(self):
+        before = self._battery_prices(sort='best_price')
+
+        self.drill.standalone_price = Decimal('50.00')
+        self.drill.save()
+        self.assertNotEqual(self._battery_prices(sort='best_price'), before)
+
+        ProductComponents.objects.filter(product=self.kits[1], component=self.battery).delete()
+        self.assertEqual(len(self._battery_prices()), 2)
+
+    def test_price_table_refreshes_drop_cached_pricing(self):
+        def cached_battery_prices():
+            return sorted(
+                item['component_pricing']['effective_price']
+                for item in pricing_utils.get_cached_component_kit_pricing(self.battery)
+            )
+
+        def cached_kit_price():
+            return detail_loaders.get_quick_info('component', [str(self.battery.id)])[str(self.battery.id)]
+
+        before = cached_battery_prices()
+        quick_info = cached_kit_price()
+
+        # Bulk updates bypass the signal receivers
+        PriceListings.objects.filter(product=self.kits[0]).update(price=Decimal('99.00'))
+        self.assertEqual(cached_battery_prices(), before)
+
+        price_sync.refresh_latest_listings((self.kits[0].id, retailer.id) for retailer in self.retailers)
+        after_refresh = cached_battery_prices()
+        self.assertNotEqual(after_refresh, before)
+        self.assertNotEqual(cached_kit_price(), quick_info)
+
+        PriceListings.objects.filter(product=self.kits[1]).update(price=Decimal('99.00'))
+        call_command('rebuild_price_tables', stdout=StringIO())
+        self.assertNotEqual(cached_battery_prices(), after_refresh)
+
+
+class DealAnalysisTests(KitPricingTests):
+    def _analyze(self, components, bundle_price='120.00'):
+        return self.client.get('/api/deal-analysis/', {
+            'component_ids[]': [str(component.id) for component in components],
+            'quantities[]': ['1'] * len(components),
+            'bundle_price': bundle_price,
+        })
+
+    def test_analysis_compares_every_component(self):
+        response = self._analyze([self.drill, self.battery])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual([c['name'] for c in data['components']], ["Drill", "Battery"])
+        self.assertEqual(data['components'][0]['effective_price'], '90.00')
+        battery = data['components'][1]
+        self.assertEqual(len(battery['comparisons']), 4)
+        prices = [Decimal(c['effective_price']) for c in battery['comparisons']]
+        self.assertEqual(prices, sorted(prices))
+
+    def test_query_count_does_not_grow_with_basket(self):
+        with self.assertNumQueries(3):
+            self._analyze([self.drill])
+        with self.assertNumQueries(3):
+            self._analyze([self.drill, self.battery, self.bag])
+
+    def test_invalid_basket_is_rejected(self):
+        self.assertEqual(self._analyze([], bundle_price='').status_code, 400)
+        self.assertEqual(self._analyze([self.drill], bundle_price='-1').status_code, 400)
+
+
+class ProductDetailLoaderTests(KitPricingTests):
+    def setUp(self):
+        cache.clear()
+        # Breadcrumbs come from the taxonomy tree and templates read the site
+        # settings, both loaded once per process
+        get_taxonomy()
+        SiteSettings.get_settings()
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        SiteSettings.load_settings()
+        itemtype = ItemTypes.objects.create(name="Drill", fullname="Power Tools/Drilling/Drill")
+        cls.torque = Attributes.objects.create(name="Torque", unit="in-lbs")
+        itemtype.attributes.add(cls.torque, Attributes.objects.create(name="Chuck Size"))
+        componentclass = ComponentClasses.objects.create(name="Tools", sortorder=1)
+        # The small kit takes the same attribute and breadcrumb paths
+        cls.kits[0].itemtypes.add(itemtype)
+        cls.drill.itemtypes.add(itemtype)
+
+        cls.combo = Products.objects.create(name="Combo Kit")
+        cls.combo.itemtypes.add(itemtype)
+        for number in range(8):
+            component = Components.objects.create(
+                name=f"Tool {number}", standalone_price=Decimal('100.00'), componentclass=componentclass
+            )
+            component.itemtypes.add(itemtype)
+            ComponentAttributes.objects.create(component=component, attribute=cls.torque, value=str(number))
+            ProductComponents.objects.create(product=cls.combo, component=component)
+        for number in range(4):
+            retailer = Retailers.objects.create(name=f"Shop {number + 3}")
+            PriceListings.objects.create(product=cls.combo, retailer=retailer, price=Decimal('499.00'))
+
+    def test_loader_builds_attributes_and_breadcrumbs(self):
+        context = detail_loaders.load_product_detail(self.combo.id)
+
+        self.assertEqual(context['component_count'], 8)
+        self.assertEqual(len(context['retailers_data']), 4)
+        pc = context['ordered_component_groups'][0][1]['components'][0]
+        self.assertEqual([a.name for a in pc.component_attributes], ["Chuck Size", "Torque"])
+        self.assertEqual(pc.attribute_map[self.torque.id], "0")
+        self.assertEqual([link['label'] for link in context['breadcrumb_links']], ["Power Tools", "Drilling", "Drill"])
+
+    def test_query_count_does_not_grow_with_kit_size(self):
+        with CaptureQueriesContext(connection) as small_kit:
+            self.assertEqual(self.client.get(f'/product/{self.kits[0].id}/').status_code, 200)
+        self.assertLessEqual(len(small_kit), 12)
+        with self.assertNumQueries(len(small_kit)):
+            self.assertEqual(self.client.get(f'/product/{self.combo.id}/').status_code, 200)
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_warm_hit_skips_the_database(self):
+        url = f'/product/{self.combo.id}/'
+        cold = self.client.get(url)
+        with self.assertNumQueries(0):
+            warm = self.client.get(url)
+        self.assertEqual(warm.content, cold.content)
+
+    def test_cache_follows_listing_and_attribute_changes(self):
+        context = detail_loaders.get_product_detail(self.combo.id)
+        self.assertEqual(len(context['retailers_data']), 4)
+
+        PriceListings.objects.create(product=self.combo, retailer=self.retailers[0], price=Decimal('450.00'))
+        context = detail_loaders.get_product_detail(self.combo.id)
+        self.assertEqual(len(context['retailers_data']), 5)
+
+        component_attribute = ComponentAttributes.objects.filter(component__name="Tool 0").get()
+        component_attribute.value = "650"
+        component_attribute.save()
+        pc = detail_loaders.get_product_detail(self.combo.id)['ordered_component_groups'][0][1]['components'][0]
+        self.assertEqual(pc.attribute_map[self.torque.id], "650")
+
+    def test_only_products_with_the_changed_component_are_rebuilt(self):
+        def drill_attributes():
+            groups = detail_loaders.get_product_detail(self.kits[0].id)['ordered_component_groups']
+            pc = next(pc for _, group in groups for pc in group['components'] if pc.component == self.drill)
+            return pc.component_attributes
+
+        detail_loaders.get_product_detail(self.combo.id)
+        self.assertEqual(len(drill_attributes()), 2)
+
+        self.drill.itemtypes.clear()
+        self.assertEqual(drill_attributes(), [])
+        with self.assertNumQueries(0):
+            detail_loaders.get_product_detail(self.combo.id)
+
+
+class ComponentDetailLoaderTests(KitPricingTests):
+    def setUp(self):
+        cache.clear()
+        # Breadcrumbs come from the taxonomy tree, loaded once per process
+        get_taxonomy()
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        itemtype = ItemTypes.objects.create(name="Battery", fullname="Batteries/Packs/Battery")
+        capacity = Attributes.objects.create(name="Capacity", unit="Ah")
+        itemtype.attributes.add(capacity)
+        cls.battery.itemtypes.add(itemtype)
+        ComponentAttributes.objects.create(component=cls.battery, attribute=capacity, value="5.0")
+        ComponentAttributes.objects.create(
+            component=cls.battery, attribute=Attributes.objects.create(name="Weight"), value="1.4"
+        )
+
+    def test_attributes_are_split_in_memory(self):
+        # Kit pricing (deals, then product images) comes from the cache when warm
+        with self.assertNumQueries(12):
+            context = detail_loaders.load_component_detail(self.battery.id)
+        with self.assertNumQueries(10):
+            detail_loaders.load_component_detail(self.battery.id)
+
+        self.assertEqual([a.attribute.name for a in context['important_attributes']], ["Capacity"])
+        self.assertEqual([a.attribute.name for a in context['additional_attributes']], ["Weight"])
+        self.assertEqual(len(context['product_components']), 2)
+        self.assertEqual(len(context['kit_pricing_data']), 4)
+
+    def test_kit_pricing_cache_follows_listings_and_composition(self):
+        self.assertEqual(self.client.get(f'/components/{self.battery.id}/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(pricing_utils.get_cached_component_kit_pricing(self.battery)), 4)
+
+        retailer = Retailers.objects.create(name="Shop C")
+        PriceListings.objects.create(product=self.kits[0], retailer=retailer, price=Decimal('189.00'))
+        self.assertEqual(len(pricing_utils.get_cached_component_kit_pricing(self.battery)), 5)
+
+        ProductComponents.objects.filter(product=self.kits[1], component=self.battery).delete()
+        self.assertEqual(len(pricing_utils.get_cached_component_kit_pricing(self.battery)), 3)
+
+        # Standalone price changes move the proration of every kit sibling
+        before = pricing_utils.get_cached_component_kit_pricing(self.battery)
+        self.drill.standalone_price = Decimal('250.00')
+        self.drill.save()
+        after = pricing_utils.get_cached_component_kit_pricing(self.battery)
+        self.assertNotEqual(
+            [item['component_pricing']['effective_price'] for item in before],
+            [item['component_pricing']['effective_price'] for item in after],
+        )
+
+
+class QuickInfoTests(KitPricingTests):
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        itemtype = ItemTypes.objects.create(name="Battery", fullname="Batteries/Packs/Battery")
+        capacity = Attributes.objects.create(name="Capacity", unit="Ah")
+        itemtype.attributes.add(capacity)
+        cls.battery.itemtypes.add(itemtype)
+        ComponentAttributes.objects.create(component=cls.battery, attribute=capacity, value="5")
+        ComponentAttributes.objects.create(
+            component=cls.battery, attribute=Attributes.objects.create(name="Weight"), value="1.4"
+        )
+
+    def _batch(self, item_type, *items):
+        return self.client.get('/api/quick-info/', {
+            'type': item_type, 'ids': ','.join(str(item.id) for item in items),
+        })
+
+    def test_batch_matches_single_payloads(self):
+        items = self._batch('component', self.battery, self.drill, Components(name="Gone")).json()['items']
+        self.assertEqual(set(items), {str(self.battery.id), str(self.drill.id)})
+        self.assertEqual(items[str(self.battery.id)], self.client.get(
+            f'/api/quick-info/{self.battery.id}/', {'type': 'component'}
+        ).json())
+
+        battery = items[str(self.battery.id)]
+        self.assertEqual(battery['key_attributes'], [{'name': 'Capacity', 'value': '5.0', 'unit': 'Ah'}])
+        prices = [Decimal(item['effective_price']) for item in battery['lowest_price_products']]
+        self.assertEqual(len(prices), 3)
+        self.assertEqual(prices, sorted(prices))
+
+        kit = self._batch('product', self.kits[1]).json()['items'][str(self.kits[1].id)]
+        self.assertEqual(sorted(c['name'] for c in kit['components']), ["Bag", "Battery", "Drill"])
+
+    def test_query_count_does_not_grow_with_items(self):
+        with CaptureQueriesContext(connection) as single:
+            detail_loaders.load_quick_info('component', [self.battery.id])
+        with self.assertNumQueries(len(single)):
+            detail_loaders.load_quick_info('component', [self.drill.id, self.battery.id, self.bag.id])
+        with CaptureQueriesContext(connection) as single:
+            detail_loaders.load_quick_info('product', [self.kits[0].id])
+        with self.assertNumQueries(len(single)):
+            detail_loaders.load_quick_info('product', [kit.id for kit in self.kits])
+
+    def test_payloads_are_cached_per_item(self):
+        self._batch('component', self.battery)
+        with CaptureQueriesContext(connection) as partial:
+            self._batch('component', self.battery, self.drill)
+        with self.assertNumQueries(0):
+            self._batch('component', self.drill, self.battery)
+        self.assertTrue(all(str(self.battery.id) not in query['sql'] for query in partial))
+
+        self.bag.name = "Tool bag"
+        self.bag.save()
+        kit = self._batch('product', self.kits[1]).json()['items'][str(self.kits[1].id)]
+        self.assertIn("Tool bag", [c['name'] for c in kit['components']])
+
+        PriceListings.objects.filter(product=self.kits[1]).delete()
+        battery = self._batch('component', self.battery).json()['items'][str(self.battery.id)]
+        self.assertEqual(len(battery['lowest_price_products']), 2)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get('/api/quick-info/', {'type': 'component'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/quick-info/', {'type': 'brand', 'ids': self.bag.id}).status_code, 400)
+        self.assertEqual(self.client.get('/api/quick-info/', {'type': 'product', 'ids': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(f'/api/quick-info/{self.bag.id}/', {'type': 'product'}).status_code, 404)
+
+
+class TaxonomyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Categories.objects.create(name="Power Tools", fullname="Power Tools")
+        cls.subcategory = Subcategories.objects.create(name="Drilling", fullname="Power Tools/Drilling")
+        cls.subcategory.categories.add(cls.category)
+        cls.itemtype = ItemTypes.objects.create(name="Drill", fullname="Power Tools/Drilling/Drill")
+        cls.itemtype.categories.add(cls.category)
+        cls.itemtype.subcategories.add(cls.subcategory)
+
+    def test_tree_lookups_do_not_query(self):
+        get_taxonomy()
+        with self.assertNumQueries(0):
+            taxonomy = get_taxonomy()
+            self.assertEqual(taxonomy.descendants(self.category.id), {
+                'subcategories': [self.subcategory.id], 'itemtypes': [self.itemtype.id],
+            })
+            self.assertEqual(taxonomy.ancestors(self.itemtype.id), {
+                'categories': [self.category.id], 'subcategories': [self.subcategory.id],
+            })
+            self.assertEqual([link['query'] for link in taxonomy.breadcrumb(self.itemtype)], [
+                f'category[]={self.category.id}',
+                f'subcategory[]={self.subcategory.id}',
+                f'itemtype[]={self.itemtype.id}',
+            ])
+
+    def test_tree_is_reloaded_after_taxonomy_changes(self):
+        get_taxonomy()
+        other = ItemTypes.objects.create(name="Driver", fullname="Power Tools/Drilling/Driver")
+        other.subcategories.add(self.subcategory)
+        self.assertEqual(
+            set(get_taxonomy().descendants(self.subcategory.id)['itemtypes']), {self.itemtype.id, other.id}
+        )
+
+    def test_closure_covers_every_level(self):
+        self.assertEqual(
+            get_taxonomy().closure(self.category.id), {self.category.id, self.subcategory.id, self.itemtype.id}
+        )
+        self.assertEqual(get_taxonomy().closure(self.itemtype.id), {self.itemtype.id})
+
+    def test_catalog_filters_match_items_tagged_below_the_category(self):
+        tagged_category = Products.objects.create(name="Tagged category")
+        tagged_category.categories.add(self.category)
+        tagged_itemtype = Products.objects.create(name="Tagged itemtype")
+        tagged_itemtype.itemtypes.add(self.itemtype)
+        Products.objects.create(name="Untagged")
+
+        def matching(**selection):
+            filters = {'category_ids': [], 'subcategory_ids': [], 'itemtype_ids': [], **selection}
+            return set(catalog_utils.build_filter_query(Products, filters))
+
+        for enabled in (True, False):
+            with self.subTest(index=enabled), override_settings(CATALOG_FACET_INDEX_ENABLED=enabled):
+                self.assertEqual(matching(category_ids=[self.category.id]), {tagged_category, tagged_itemtype})
+                self.assertEqual(matching(subcategory_ids=[self.subcategory.id]), {tagged_itemtype})
+                self.assertEqual(matching(itemtype_ids=[self.itemtype.id]), {tagged_itemtype})
+
+                options = catalog_utils.get_filter_options({'category_ids': [self.category.id]}, Products)
+                self.assertEqual([(c.name, c.item_count) for c in options['categories']], [("Power Tools", 2)])
+                self.assertEqual([(s.name, s.item_count) for s in options['subcategories']], [("Drilling", 1)])
+
+
+class SiteStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        SiteSettings.get_settings()
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSettings.load_settings()
+        brand = Brands.objects.create(name="Acme")
+        Products.objects.create(name="Kit", brand=brand)
+        Components.objects.create(name="Drill", is_featured=True)
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_warm_pages_skip_the_database(self):
+        call_command('warm_site_stats', stdout=StringIO())
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/').status_code, 200)
+            response = self.client.get('/about/')
+        self.assertEqual(response.context['total_products'], 1)
+        self.assertEqual(response.context['total_brands'], 1)
+
+    def test_stats_follow_catalog_changes(self):
+        self.assertEqual(site_stats.get_site_stats()['total_components'], 1)
+        Components.objects.create(name="Saw")
+        self.assertEqual(site_stats.get_site_stats()['total_components'], 2)
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class FlagshipBrowseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        SiteSettings.get_settings()
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSettings.load_settings()
+        cls.drills = ItemTypes.objects.create(name="Drill", fullname="Power Tools/Drilling/Drill", sortorder=1)
+        cls.saws = ItemTypes.objects.create(name="Circular Saw", fullname="Power Tools/Cutting/Circular Saw", sortorder=2)
+        cls.hammer = Components.objects.create(name="Hammer Drill", is_featured=True, showcase_priority=1)
+        cls.hammer.itemtypes.add(cls.saws, cls.drills)
+        cls.saw = Components.objects.create(name="Saw", is_featured=True, showcase_priority=5)
+        cls.saw.itemtypes.add(cls.saws)
+        cls.driver = Components.objects.create(name="Driver", is_featured=True, showcase_priority=1)
+        cls.driver.itemtypes.add(cls.drills)
+        cls.plain = Components.objects.create(name="Plain")
+        cls.plain.itemtypes.add(cls.drills)
+
+    def _browse(self):
+        response = self.client.get('/browse/')
+        return {
+            name: [component.name for component in group['components']]
+            for name, group in response.context['organized_products'].items()
+        }, response.context['itemtype_metadata']
+
+    def test_components_are_grouped_by_primary_itemtype(self):
+        organized, metadata = self._browse()
+        # Groups follow showcase priority, the sidebar follows itemtype sortorder
+        self.assertEqual(list(organized.items()), [
+            ("Circular Saw", ["Saw"]),
+            ("Drill", ["Driver", "Hammer Drill"]),
+        ])
+        self.assertEqual([(m['name'], m['slug'], m['count']) for m in metadata], [
+            ("Drill", "drill", 2), ("Circular Saw", "circular-saw", 1),
+        ])
+
+    def test_query_count_does_not_grow_with_components(self):
+        with CaptureQueriesContext(connection) as before:
+            site_stats.compute_flagship_layout()
+        for number in range(3):
+            component = Components.objects.create(name=f"Grinder {number}", is_featured=True)
+            component.itemtypes.add(self.saws)
+        with self.assertNumQueries(len(before)):
+            site_stats.compute_flagship_layout()
+
+    def test_layout_is_cached_until_featured_components_change(self):
+        self._browse()
+        self.plain.name = "Plain drill"
+        self.plain.save()
+        self.plain.itemtypes.add(self.saws)
+        with self.assertNumQueries(0):
+            site_stats.get_flagship_layout()
+
+        self.saw.showcase_priority = 0
+        self.saw.save()
+        self.assertEqual(list(self._browse()[0]), ["Drill", "Circular Saw"])
+
+        self.hammer.is_featured = False
+        self.hammer.save()
+        self.assertEqual(self._browse()[0]["Drill"], ["Driver"])
+
+        self.driver.itemtypes.set([self.saws])
+        self.assertEqual(list(self._browse()[0]), ["Circular Saw"])
+
+
+class SiteSettingsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_settings_are_cached_until_saved(self):
+        SiteSettings.load_settings()
+        settings = SiteSettings.get_settings()
+        with self.assertNumQueries(0):
+            self.assertIs(SiteSettings.get_settings(), settings)
+
+        settings.show_fair_price_feature = False
+        settings.save()
+        self.assertFalse(SiteSettings.get_settings().show_fair_price_feature)
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_context_processor_exposes_fair_price_flag(self):
+        SiteSettings.objects.update_or_create(pk=1, defaults={'show_fair_price_feature': False})
+        response = self.client.get('/components/')
+        self.assertFalse(response.context['show_fair_price'])
+        self.assertEqual(response.context['site_settings'].pk, 1)
+
+
+class SearchSuggestionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brands.objects.create(name="Milwaukee")
+        Products.objects.create(name="Compact Drill Kit", sku="2801-22CT", brand=cls.brand)
+        Products.objects.create(name="Drill", sku="2801-20", brand=cls.brand)
+        Components.objects.create(name="M18 Hammer Drill", sku="2804-20", brand=cls.brand)
+        Components.objects.create(name="Drill Driver", sku="2801-20X", brand=cls.brand)
+        Components.objects.create(name="Impact Driver", sku="2853-20", brand=cls.brand)
+
+    def _suggest(self, query):
+        response = self.client.get('/api/search-suggestions/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [(item['type'], item['text']) for item in response.json()['suggestions']]
+
+    def test_matches_are_ranked(self):
+        self.assertEqual(self._suggest('DRILL'), [
+            ('Product', 'Drill'),
+            ('Product', 'Compact Drill Kit'),
+            ('Component', 'Drill Driver'),
+            ('Component', 'M18 Hammer Drill'),
+        ])
+        self.assertEqual(self._suggest('dr'), [
+            ('Product', 'Drill'),
+            ('Product', 'Compact Drill Kit'),
+            ('Component', 'Drill Driver'),
+            ('Component', 'Impact Driver'),
+            ('Component', 'M18 Hammer Drill'),
+        ])
+
+    def test_sku_and_brand_matches(self):
+        self.assertEqual(self._suggest('2801-20'), [
+            ('Product', 'Drill'),
+            ('Component', 'Drill Driver'),
+        ])
+        self.assertEqual(self._suggest('waukee'), [('Brand', 'Milwaukee')])
+        self.assertEqual(self._suggest('x'), [])
+
+    def test_index_matches_the_sql_fallback(self):
+        indexed = self._suggest('driver')
+        with override_settings(SEARCH_SUGGESTION_INDEX_ENABLED=False):
+            self.assertEqual(sorted(self._suggest('driver')), sorted(indexed))
+
+    def test_warm_lookup_skips_the_database_and_follows_changes(self):
+        search_index.get_search_index()
+        with self.assertNumQueries(0):
+            search_index.get_search_index().suggest('hammer')
+        Components.objects.filter(name="M18 Hammer Drill").get().delete()
+        self.assertEqual(self._suggest('hammer'), [])
+
+
+class SearchDocumentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        brand = Brands.objects.create(name="Milwaukee")
+        cls.impact = Components.objects.create(
+            name="M18 FUEL Impact Driver", sku="2767-20", brand=brand, description="High torque fastening"
+        )
+        cls.hammer = Components.objects.create(name="M18 Hammer Drill", sku="2804-20", brand=brand)
+        cls.rotary = Components.objects.create(name="Rotary Tool", sku="2460-20", description="Sands and drills")
+        chuck = Attributes.objects.create(name="Chuck")
+        ComponentAttributes.objects.create(component=cls.hammer, attribute=chuck, value="Keyless")
+        cls.kit = Products.objects.create(
+            name="Hammer Drill Kit", sku="2804-22", brand=brand, bullets="Includes two batteries"
+        )
+
+    def test_results_are_ranked_by_field(self):
+        self.assertEqual(search_index.search_ids(Components, "drill"), [self.hammer.id, self.rotary.id])
+        self.assertEqual(search_index.search_ids(Components, "milwaukee hammer"), [self.hammer.id])
+        self.assertEqual(search_index.search_ids(Components, "torque"), [self.impact.id])
+        self.assertEqual(search_index.search_ids(Components, "keyless"), [self.hammer.id])
+        self.assertEqual(search_index.search_ids(Products, "batteries"), [self.kit.id])
+        self.assertEqual(search_index.search_ids(Components, "hammer saw"), [])
+
+    def test_sku_matches_ignore_separators_and_one_typo(self):
+        for query in ("2767-20", "276720", "2767 20", "2767-02", "27672O"):
+            self.assertEqual(search_index.search_ids(Components, query), [self.impact.id], query)
+        # No typo matches once a SKU matches exactly
+        self.assertEqual(search_index.search_ids(Components, "2804-20"), [self.hammer.id])
+
+    def test_catalog_search_filter_uses_the_index(self):
+        filters = {'search': 'impact'}
+        indexed = list(catalog_utils.build_filter_query(Components, filters).values_list('id', flat=True))
+        self.assertEqual(indexed, [self.impact.id])
+
+        response = self.client.get('/components/', {'search': '276720'})
+        self.assertEqual([c.id for c in response.context['components']], [self.impact.id])
+
+    def test_search_page_is_ranked_and_paginated(self):
+        response = self.client.get('/search/', {'q': 'hammer drill'})
+        self.assertEqual(list(response.context['components']), [self.hammer])
+        self.assertEqual(list(response.context['products']), [self.kit])
+        self.assertFalse(response.context['has_next'])
+
+        first, total = search_index.search_page(Components, "m18", 1, page_size=1)
+        second, _ = search_index.search_page(Components, "m18", 2, page_size=1)
+        self.assertEqual(total, 2)
+        # Equal scores fall back to name order
+        self.assertEqual(first + second, [self.impact, self.hammer])
+
+    def test_documents_follow_attribute_changes(self):
+        search_index.get_document_index(Components)
+        ComponentAttributes.objects.filter(component=self.hammer).update(value="Keyed")
+        self.assertEqual(search_index.search_ids(Components, "keyless"), [self.hammer.id])
+        ComponentAttributes.objects.get(component=self.hammer).save()
+        self.assertEqual(search_index.search_ids(Components, "keyless"), [])
+
+
+class CompareComponentsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        SiteSettings.get_settings()
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSettings.load_settings()
+        brand = Brands.objects.create(name="Acme")
+        itemtype = ItemTypes.objects.create(name="Drill", fullname="Power Tools/Drilling/Drill")
+        torque = Attributes.objects.create(name="Torque", unit="in-lbs")
+        weight = Attributes.objects.create(name="Weight", unit="lbs")
+        color = Attributes.objects.create(name="Color")
+        itemtype.attributes.add(torque)
+
+        cls.drill = Components.objects.create(
+            name="Drill", brand=brand, fair_price_narrative={'fair_price': '99', 'reasoning': 'Solid'}
+        )
+        cls.drill.itemtypes.add(itemtype)
+        ComponentAttributes.objects.create(component=cls.drill, attribute=torque, value="500")
+        ComponentAttributes.objects.create(component=cls.drill, attribute=weight, value="3.5")
+        cls.driver = Components.objects.create(name="Driver")
+        ComponentAttributes.objects.create(component=cls.driver, attribute=torque, value="1500")
+        ComponentAttributes.objects.create(component=cls.driver, attribute=color, value="Red")
+
+    def _compare(self, *components):
+        ids = ','.join(str(component.id) for component in components)
+        return self.client.get('/api/compare-components/', {'component_ids': ids})
+
+    def test_attributes_are_split_and_merged(self):
+        data = self._compare(self.driver, self.drill).json()
+
+        self.assertEqual([c['name'] for c in data['components']], ["Drill", "Driver"])
+        drill, driver = data['components']
+        self.assertEqual(drill['brand'], "Acme")
+        self.assertEqual(drill['important_attributes'], {'Torque': {'value': '500', 'unit': 'in-lbs'}})
+        self.assertEqual(drill['additional_attributes'], {'Weight': {'value': '3.5', 'unit': 'lbs'}})
+        self.assertEqual(driver['important_attributes'], {})
+        self.assertEqual(set(driver['additional_attributes']), {'Torque', 'Color'})
+        self.assertEqual(drill['fair_price']['price'], '99')
+        self.assertIsNone(driver['fair_price'])
+        self.assertTrue(data['show_fair_price'])
+
+        self.assertEqual(data['common_attributes'], [
+            {'name': 'Torque', 'unit': 'in-lbs', 'type': 'important'},
+            {'name': 'Color', 'unit': '', 'type': 'additional'},
+            {'name': 'Torque', 'unit': 'in-lbs', 'type': 'additional'},
+            {'name': 'Weight', 'unit': 'lbs', 'type': 'additional'},
+        ])
+        self.assertEqual(data['all_attributes'], [
+            {'name': 'Color', 'unit': '', 'type': 'additional'},
+            {'name': 'Torque', 'unit': 'in-lbs', 'type': 'important'},
+            {'name': 'Weight', 'unit': 'lbs', 'type': 'additional'},
+        ])
+
+    def test_query_count_does_not_grow_with_components(self):
+        with CaptureQueriesContext(connection) as single:
+            detail_loaders.load_component_comparison([self.drill.id])
+        with self.assertNumQueries(len(single)):
+            detail_loaders.load_component_comparison([self.drill.id, self.driver.id])
+
+    def test_responses_are_cached_until_a_component_changes(self):
+        self._compare(self.drill, self.driver)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._compare(self.driver, self.drill).status_code, 200)
+
+        ComponentAttributes.objects.filter(component=self.drill, value="500").get().delete()
+        drill = self._compare(self.drill, self.driver).json()['components'][0]
+        self.assertEqual(drill['important_attributes'], {})
+
+    def test_fair_price_follows_site_settings(self):
+        SiteSettings.objects.update_or_create(pk=1, defaults={'show_fair_price_feature': False})
+        data = self._compare(self.drill).json()
+        self.assertFalse(data['show_fair_price'])
+        self.assertIsNone(data['components'][0]['fair_price'])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get('/api/compare-components/').status_code, 400)
+        self.assertEqual(self.client.get('/api/compare-components/', {'component_ids': 'a,b,c,d,e'}).status_code, 400)
+        missing = Components(name="Gone")
+        self.assertEqual(self._compare(missing).status_code, 404)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brands.objects.create(name="Acme")
+        Products.objects.create(name="Kit", brand=cls.brand)
+
+    def test_query_parameter_order_shares_an_entry(self):
+        first = self.client.get('/products/?brand[]=%s&sort=name&utm_source=mail' % self.brand.id)
+        self.assertEqual(first[page_cache.CACHE_HEADER], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get('/products/?sort=name&brand[]=%s' % self.brand.id)
+        self.assertEqual(second[page_cache.CACHE_HEADER], 'HIT')
+        self.assertEqual(second.content, first.content)
+
+    def test_tagged_pages_are_revalidated_once_while_stale(self):
+        self.client.get('/products/')
+        Products.objects.create(name="New kit", brand=self.brand)
+
+        # Another request is already re-rendering: serve the stale page
+        key = page_cache._page_key('frontend.views.index', RequestFactory().get('/products/'))
+        cache.add(f'{key}:lock', True)
+        stale = self.client.get('/products/')
+        self.assertEqual(stale[page_cache.CACHE_HEADER], 'STALE')
+        self.assertNotContains(stale, "New kit")
+
+        cache.delete(f'{key}:lock')
+        fresh = self.client.get('/products/')
+        self.assertEqual(fresh[page_cache.CACHE_HEADER], 'MISS')
+        self.assertContains(fresh, "New kit")
+
+    def test_hosts_do_not_share_entries(self):
+        self.client.get('/products/')
+        other = self.client.get('/products/', HTTP_HOST='tooldecoded.com')
+        self.assertEqual(other[page_cache.CACHE_HEADER], 'MISS')
+        self.assertEqual(self.client.get('/products/', secure=True)[page_cache.CACHE_HEADER], 'MISS')
+
+    def test_sync_tables_bump_the_catalog_tag_once_per_refresh(self):
+        kit = Products.objects.get(name="Kit")
+        for name in ("Drill", "Battery"):
+            ProductComponents.objects.create(product=kit, component=Components.objects.create(name=name))
+        retailer = Retailers.objects.create(name="Shop")
+
+        with mock.patch.object(page_cache, 'bump_version_on_commit', wraps=page_cache.bump_version_on_commit) as bump:
+            PriceListings.objects.create(product=kit, retailer=retailer, price=Decimal('99.00'))
+            # The listing itself, then one refresh each of the latest listings and the kit deals
+            self.assertEqual(bump.call_count, 3)
+
+            bump.reset_mock()
+            price_sync.rebuild_kit_deals()
+            self.assertEqual(bump.call_count, 1)
+
+    def test_derived_tables_keep_fast_deletes(self):
+        # Receivers connected without a sender would make these deletes fetch every row
+        collector = Collector(using='default')
+        for model_class in (CatalogEntries, ComponentKitDeals, LatestPriceListings):
+            self.assertTrue(collector.can_fast_delete(model_class.objects.all()), model_class)
+
+    def test_session_requests_bypass_the_cache(self):
+        self.client.get('/products/')
+        self.client.cookies['sessionid'] = 'abc'
+        self.assertNotIn(page_cache.CACHE_HEADER, self.client.get('/products/'))
+
+    def test_fragment_cache_follows_tags(self):
+        template = Template(
+            '{% load page_cache %}{% cachefragment 300 "sidebar" "catalog" kind %}{{ value }}{% endcachefragment %}'
+        )
+        request = RequestFactory().get('/products/?b=2&a=1&page=3')
+
+        def render(value, kind='product', path='/products/?a=1&b=2'):
+            return template.render(Context({'value': value, 'kind': kind, 'request': RequestFactory().get(path)}))
+
+        self.assertEqual(template.render(Context({'value': 'one', 'kind': 'product', 'request': request})), 'one')
+        self.assertEqual(render('two'), 'one')
+        self.assertEqual(render('two', kind='component'), 'two')
+        self.assertEqual(render('two', path='/products/?a=9'), 'two')
+
+        page_cache.invalidate_tags('catalog')
+        self.assertEqual(render('three'), 'three')
+
+    def test_cached_sidebar_skips_the_facets(self):
+        Components.objects.create(name="Drill", brand=self.brand)
+        with mock.patch.object(catalog_utils, 'get_filter_options', wraps=catalog_utils.get_filter_options) as facets, \
+                mock.patch.object(catalog_utils, 'get_attribute_options', wraps=catalog_utils.get_attribute_options) as attributes:
+            for path in ('/products/', '/components/'):
+                self.assertContains(self.client.get(path), 'Acme')
+            self.assertEqual((facets.call_count, attributes.call_count), (2, 1))
+
+            # Another page misses the page cache but shares the sidebar fragment
+            for path in ('/products/?page=2', '/components/?page=2'):
+                self.assertContains(self.client.get(path), 'Acme')
+            self.assertEqual((facets.call_count, attributes.call_count), (2, 1))
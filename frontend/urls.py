@@ -23,7 +23,9 @@ urlpatterns = [
     # API endpoints
     path('api/search-suggestions/', views.api_search_suggestions, name='api_search_suggestions'),
     path('api/filter-options/', views.api_filter_options, name='api_filter_options'),
+    path('api/quick-info/', views.api_quick_info_batch, name='api_quick_info_batch'),
     path('api/quick-info/<uuid:item_id>/', views.api_quick_info, name='api_quick_info'),
     path('api/compare-components/', views.api_compare_components, name='api_compare_components'),
     path('api/components-for-deal-decoder/', views.api_components_for_deal_decoder, name='api_components_for_deal_decoder'),
+    path('api/deal-analysis/', views.api_deal_analysis, name='api_deal_analysis'),
 ]
\ No newline at end of file
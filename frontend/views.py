@@ -1,27 +1,29 @@
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
-from django.db.models import Q, Count, Case, When, Value, F, FloatField, Prefetch
+from django.db.models import Q, Count, Case, When, Value, F, FloatField
 from django.db.models.functions import Cast
 from django.http import JsonResponse
 from django.utils.text import slugify
-from decimal import Decimal
-from collections import defaultdict
 import uuid
 from toolanalysis.models import (
     Products, Components, Brands, BatteryVoltages, BatteryPlatforms, 
-    Categories, Subcategories, ItemTypes, Statuses, ListingTypes, ComponentAttributes, Attributes,
-    ProductLines, ProductComponents, Features, ComponentFeatures, ProductAccessories
+    Categories, Subcategories, ItemTypes, Statuses, ListingTypes,
+    ProductLines, Features
 )
 from .models import LearningArticle, Tag, SiteSettings
-from .utils import get_category_hierarchy_filters
 from . import catalog_utils
-from .templatetags.product_filters import format_attribute_value_helper
 from . import pricing_utils
+from . import pagination
+from . import deal_analysis
+from . import detail_loaders
+from . import site_stats
+from . import search_index
+from .page_cache import cache_public_page
 
 # ============================================================================
 # CATALOG VIEWS - UNIFIED IMPLEMENTATION
 # ============================================================================
 
+@cache_public_page(120)
 def index(request):
     """Unified product catalog view using shared utilities."""
     # Parse filter parameters
@@ -34,24 +36,12 @@ def index(request):
     products = catalog_utils.apply_sorting(products, filters['sort'], filters['sort_direction'], Products)
     
     # Paginate results
-    page_obj = catalog_utils.paginate_results(products, filters['page'], filters['page_size'])
-    
-    # Get filter options
-    filter_options = catalog_utils.get_filter_options(filters, Products)
-    
-    # Calculate filter counts
-    filter_counts = catalog_utils.calculate_filter_counts(filters, filter_options)
+    page_obj = catalog_utils.paginate_results(products, filters['page'], filters['page_size'], filters['cursor'])
     
     context = {
         'products': page_obj,
-        'brands': filter_options['brands'],
-        'voltages': filter_options['voltages'],
-        'platforms': filter_options['platforms'],
-        'statuses': filter_options['statuses'],
-        'categories': filter_options['categories'],
-        'subcategories': filter_options['subcategories'],
-        'itemtypes': filter_options['itemtypes'],
-        'filter_counts': filter_counts,
+        # Facets are only computed if the filter_sidebar fragment misses the cache
+        **catalog_utils.lazy_sidebar_context(filters, Products),
         'current_filters': {
             'search': filters['search'],
             'brand': request.GET.get('brand', ''),
@@ -79,6 +69,7 @@ def index(request):
     return render(request, 'frontend/products.html', context)
 
 
+@cache_public_page(120, tags=('catalog', 'settings'))
 def components_index(request):
     """Unified component catalog view using shared utilities."""
     # Parse filter parameters
@@ -93,60 +84,12 @@ def components_index(request):
     # Paginate results (components use 12 per page by default)
     if not request.GET.get('page_size'):
         filters['page_size'] = 12
-    page_obj = catalog_utils.paginate_results(components, filters['page'], filters['page_size'])
-    
-    # Get filter options
-    filter_options = catalog_utils.get_filter_options(filters, Components)
-    
-    # Calculate filter counts
-    filter_counts = catalog_utils.calculate_filter_counts(filters, filter_options)
-    
-    # Get features for filtering (using new Features system)
-    # Features are now included in filter_options from catalog_utils
-    
-    # Get attributes with their values for filtering (specifications only)
-    non_category_components = catalog_utils.build_filter_query(Components, filters)
-    attributes_with_values = ComponentAttributes.objects.filter(
-        component__in=non_category_components
-    ).values('attribute__id', 'attribute__name', 'attribute__unit', 'value').distinct().order_by('attribute__name', 'value')
-    
-    # Group attributes by attribute
-    attributes_dict = {}
-    for attr_data in attributes_with_values:
-        attr_id = str(attr_data['attribute__id'])
-        if attr_id not in attributes_dict:
-            attributes_dict[attr_id] = {
-                'id': attr_id,
-                'name': attr_data['attribute__name'],
-                'unit': attr_data['attribute__unit'],
-                'values': [],
-                'selected_values': filters['attribute_filters'].get(attr_id, [])
-            }
-        if attr_data['value']:
-            attributes_dict[attr_id]['values'].append(attr_data['value'])
-    
-    # Sort values for each attribute
-    regular_attributes = []
-    for attr_data in attributes_dict.values():
-        attr_data['values'].sort()
-        regular_attributes.append(attr_data)
-    
-    # Get site settings for fair price feature
-    site_settings = SiteSettings.get_settings()
+    page_obj = catalog_utils.paginate_results(components, filters['page'], filters['page_size'], filters['cursor'])
     
     context = {
         'components': page_obj,
-        'brands': filter_options['brands'],
-        'voltages': filter_options['voltages'],
-        'platforms': filter_options['platforms'],
-        'product_lines': filter_options['product_lines'],
-        'categories': filter_options['categories'],
-        'subcategories': filter_options['subcategories'],
-        'itemtypes': filter_options['itemtypes'],
-        'motor_types': filter_options.get('motor_types', []),
-        'features': filter_options.get('features', []),
-        'attributes': regular_attributes,
-        'filter_counts': filter_counts,
+        # Facets and attributes are only computed if the filter_sidebar fragment misses the cache
+        **catalog_utils.lazy_sidebar_context(filters, Components),
         'current_filters': {
             'search': filters['search'],
             'brand': request.GET.get('brand', ''),
@@ -172,7 +115,6 @@ def components_index(request):
         'selected_attribute_filters': filters['attribute_filters'],
         'selected_feature_filters': filters['feature_filters'],
         'selected_feature_ids': filters['feature_ids'],
-        'show_fair_price': site_settings.show_fair_price_feature,
         'item_type': 'component',  # For template differentiation
     }
     
@@ -180,338 +122,21 @@ def components_index(request):
 
 
 
+@cache_public_page(300)
 def product_detail(request, product_id):
     """Product detail view"""
-    product = get_object_or_404(Products, id=product_id)
-    
-    # Get product components with proper prefetching
-    product_components = list(ProductComponents.objects.filter(
-        product=product
-    ).select_related('component__brand', 'component__componentclass', 'component__motortype').prefetch_related(
-        'component__componentattributes_set__attribute',
-        'component__itemtypes'
-    ).all())
-    
-    # Pricing computation (standalone_price only) and extended values
-    component_prices = {}
-    prices_complete = True
-    any_price_available = False
-    total_component_value = None
-    total_component_quantity = 0
-    decimal_zero = Decimal('0')
-    
-    for pc in product_components:
-        total_component_quantity += pc.quantity
-        unit_price = pc.component.standalone_price
-        ext_value = None
-        pc.attribute_map = {
-            attr.attribute_id: attr.value
-            for attr in pc.component.componentattributes_set.all()
+    context = dict(detail_loaders.get_product_detail(product_id))
+
+    # Breadcrumb parts from first item type's fullname (Category/Subcategory/ItemType)
+    products_url = request.build_absolute_uri('/products/')
+    context['breadcrumb_parts'] = [
+        {
+            'label': link['label'],
+            'url': f"{products_url}?{link['query']}" if link['query'] else products_url,
         }
-        # Get attributes associated with this component's itemtypes
-        component_itemtypes = pc.component.itemtypes.all()
-        pc.component_attributes = list(Attributes.objects.filter(
-            itemtypes__in=component_itemtypes
-        ).distinct().order_by('name'))
-        if unit_price is not None:
-            ext_value = unit_price * pc.quantity
-            any_price_available = True
-        else:
-            prices_complete = False
-        component_prices[pc.component.id] = {
-            'price': unit_price,
-            'ext_value': ext_value,
-            'has_price': unit_price is not None,
-            'has_ext_value': ext_value is not None,
-        }
-        if ext_value is None:
-            prices_complete = False
-    
-    if prices_complete and any_price_available:
-        total_component_value = sum(
-            (component_prices[pc.component.id]['ext_value'] for pc in product_components),
-            decimal_zero
-        )
-    
-    # Sort components by componentclass (sortorder, then name), then component name
-    product_components.sort(key=lambda pc: (
-        pc.component.componentclass.sortorder if pc.component.componentclass and pc.component.componentclass.sortorder is not None else 999999,
-        pc.component.componentclass.name if pc.component.componentclass else '',
-        (pc.component.name or '').lower()
-    ))
-    
-    # Collect all itemtypes for attribute collection
-    all_itemtypes = set()
-    for pc in product_components:
-        primary_itemtype = pc.component.itemtypes.first()
-        if primary_itemtype:
-            all_itemtypes.add(primary_itemtype)
-    
-    # Get all attributes from all itemtypes
-    all_attributes = []
-    if all_itemtypes:
-        all_attributes = list(Attributes.objects.filter(
-            itemtypes__in=all_itemtypes
-        ).distinct().order_by('name'))
-    
-    # Get component product images (if any) - placeholder for now
-    component_products = {}
-    product_image_urls = []
-    if product.image:
-        product_image_urls.append(product.image)
-    product_image_urls.extend(list(product.productimages_set.values_list('image', flat=True)))
-
-    # Build component summary rows (flat list, no grouping)
-    component_summary_rows = []
-    for pc in product_components:
-        price_info = component_prices.get(pc.component.id, {})
-        # Get componentclass info for accent stripe
-        componentclass_name = None
-        componentclass_id = None
-        if pc.component.componentclass:
-            componentclass_name = pc.component.componentclass.name
-            componentclass_id = str(pc.component.componentclass.id)
-        
-        component_summary_rows.append({
-            'component_id': pc.component.id,
-            'name': pc.component.name,
-            'brand': pc.component.brand.name if pc.component.brand else '',
-            'sku': pc.component.sku or '',
-            'quantity': pc.quantity,
-            'quantity_list': list(range(pc.quantity)) if pc.quantity and pc.quantity > 0 else [],
-            'image': pc.component.image,
-            'unit_price': price_info.get('price'),
-            'ext_value': price_info.get('ext_value'),
-            'has_price': price_info.get('has_price'),
-            'has_ext_value': price_info.get('has_ext_value'),
-            'componentclass_name': componentclass_name,
-            'componentclass_id': componentclass_id,
-        })
-    
-    current_filters = {
-        'sort': 'name',
-        'sort_direction': 'asc'
-    }
-    
-    show_total_component_value = prices_complete and total_component_value is not None
-
-    # Get pricing listings and prorated component prices
-    latest_pricelistings = pricing_utils.get_latest_product_pricelistings(product, days=60)
-    
-    # Build consolidated pricing data structure for single table
-    # Add retailer pricing columns to component summary rows
-    retailers_data = []
-    
-    for retailer_id, pricelisting in latest_pricelistings.items():
-        retailer = pricelisting.retailer
-        retailer_key = str(retailer.id) if retailer else 'none'
-        
-        # Calculate prorated component prices for this listing
-        prorated_prices = pricing_utils.prorate_product_price_to_components(
-            product,
-            pricelisting.price
-        )
-        
-        # Calculate discount info for totals (compare kit price vs total component value)
-        discount_info = {}
-        if total_component_value and total_component_value > Decimal('0') and pricelisting.price:
-            total_savings = total_component_value - pricelisting.price
-            if total_savings > Decimal('0'):
-                discount_percentage = (total_savings / total_component_value) * Decimal('100')
-                discount_info = {
-                    'has_discount': True,
-                    'percentage': discount_percentage,
-                    'savings': total_savings,
-                }
-        
-        retailers_data.append({
-            'id': retailer_key,
-            'retailer': retailer,
-            'pricelisting': pricelisting,
-            'price': pricelisting.price,
-            'url': pricelisting.url,
-            'datepulled': pricelisting.datepulled,
-            'discount_info': discount_info,
-        })
-        
-        # Add pricing data to component summary rows
-        for row in component_summary_rows:
-            component_id = row['component_id']
-            prorated_data = prorated_prices.get(component_id, {})
-            effective_price = prorated_data.get('effective_price')
-            
-            # Add retailer pricing to row
-            if 'retailer_pricing' not in row:
-                row['retailer_pricing'] = {}
-            row['retailer_pricing'][retailer_key] = {
-                'effective_price': effective_price,
-            }
-
-    # Get ProductAccessories for this product
-    product_accessories = list(ProductAccessories.objects.filter(
-        product=product
-    ).order_by('name'))
-    
-    # Group components by componentclass
-    component_groups = defaultdict(lambda: {'components': [], 'total_quantity': 0, 'total_value': Decimal('0'), 'battery_count': 0, 'charger_count': 0})
-    
-    for pc in product_components:
-        # Determine group name - combine batteries and chargers
-        if pc.component.componentclass:
-            class_name = pc.component.componentclass.name
-            class_name_lower = class_name.lower()
-            # Combine batteries and chargers into one group (using exact componentclass names)
-            if class_name_lower in ('batteries', 'chargers', 'battery', 'charger'):
-                group_name = 'Batteries & Chargers'
-                group_sortorder = pc.component.componentclass.sortorder if pc.component.componentclass.sortorder is not None else 999998
-                # Track separate counts for batteries and chargers
-                if class_name_lower in ('batteries', 'battery'):
-                    component_groups[group_name]['battery_count'] += 1
-                elif class_name_lower in ('chargers', 'charger'):
-                    component_groups[group_name]['charger_count'] += 1
-            else:
-                group_name = class_name
-                group_sortorder = pc.component.componentclass.sortorder if pc.component.componentclass.sortorder is not None else 999999
-        else:
-            group_name = 'Other'
-            group_sortorder = 999999
-        
-        component_groups[group_name]['components'].append(pc)
-        component_groups[group_name]['total_quantity'] += pc.quantity
-        price_info = component_prices.get(pc.component.id, {})
-        if price_info.get('ext_value'):
-            component_groups[group_name]['total_value'] += price_info['ext_value']
-        component_groups[group_name]['sortorder'] = group_sortorder
-    
-    # Convert to list of tuples and sort by sortorder, then name
-    ordered_component_groups = []
-    for group_name, group_data in sorted(component_groups.items(), key=lambda x: (x[1]['sortorder'], x[0])):
-        group_components = group_data['components']
-        group_total_value = group_data['total_value'] if group_data['total_value'] > Decimal('0') else None
-        
-        # Check if all components in this group have prices
-        group_prices_complete = all(
-            component_prices.get(pc.component.id, {}).get('has_price', False)
-            for pc in group_components
-        )
-        group_has_price_data = any(
-            component_prices.get(pc.component.id, {}).get('has_price', False)
-            for pc in group_components
-        )
-        
-        ordered_component_groups.append((
-            group_name,
-            {
-                'components': group_components,
-                'component_count': len(group_components),
-                'total_quantity': group_data['total_quantity'],
-                'total_value': group_total_value,
-                'prices_complete': group_prices_complete,
-                'has_price_data': group_has_price_data,
-                'anchor': f"component-group-{group_name.lower().replace(' ', '-').replace('&', 'and')}",
-                'battery_count': group_data.get('battery_count', 0),
-                'charger_count': group_data.get('charger_count', 0),
-            }
-        ))
-    
-    # If no groups were created (no components), create empty group
-    if not ordered_component_groups:
-        ordered_component_groups = [('Included Components', {
-            'components': [],
-            'component_count': 0,
-            'total_quantity': 0,
-            'total_value': None,
-            'prices_complete': False,
-            'has_price_data': False,
-            'anchor': 'component-breakdown',
-        })]
-    
-    # Calculate componentclass counts for badges in Component Value Summary table
-    # Store as dict with count and sortorder
-    componentclass_counts = defaultdict(lambda: {'count': 0, 'sortorder': 999999})
-    for pc in product_components:
-        if pc.component.componentclass:
-            class_name = pc.component.componentclass.name
-            class_name_lower = class_name.lower()
-            sortorder = pc.component.componentclass.sortorder if pc.component.componentclass.sortorder is not None else 999999
-            # Track batteries and chargers separately, but also combine them
-            if class_name_lower in ('batteries', 'battery'):
-                componentclass_counts['Batteries']['count'] += 1
-                if componentclass_counts['Batteries']['sortorder'] == 999999:
-                    componentclass_counts['Batteries']['sortorder'] = sortorder
-            elif class_name_lower in ('chargers', 'charger'):
-                componentclass_counts['Chargers']['count'] += 1
-                if componentclass_counts['Chargers']['sortorder'] == 999999:
-                    componentclass_counts['Chargers']['sortorder'] = sortorder
-            else:
-                componentclass_counts[class_name]['count'] += 1
-                if componentclass_counts[class_name]['sortorder'] == 999999:
-                    componentclass_counts[class_name]['sortorder'] = sortorder
-    
-    # Convert to sorted list of tuples (sortorder, then name)
-    ordered_componentclass_counts = sorted(
-        componentclass_counts.items(),
-        key=lambda x: (x[1]['sortorder'], x[0])
-    )
-    
-    context = {
-        'product': product,
-        'ordered_component_groups': ordered_component_groups,
-        'component_products': component_products,
-        'current_filters': current_filters,
-        'component_prices': component_prices,
-        'prices_complete': prices_complete,
-        'total_component_value': total_component_value,
-        'total_component_quantity': total_component_quantity,
-        'component_count': len(product_components),
-        'component_group_count': len(ordered_component_groups),
-        'has_component_prices': any_price_available,
-        'show_total_component_value': show_total_component_value,
-        'product_image_urls': product_image_urls,
-        'component_summary_rows': component_summary_rows,
-        'retailers_data': retailers_data,
-        'componentclass_counts': dict(componentclass_counts),
-        'ordered_componentclass_counts': ordered_componentclass_counts,
-        'product_accessories': product_accessories,
-    }
+        for link in context.pop('breadcrumb_links')
+    ]
 
-    # Build breadcrumb parts from first item type's fullname (Category/Subcategory/ItemType)
-    try:
-        first_itemtype = product.itemtypes.first()
-        breadcrumb_parts = []
-        if first_itemtype and first_itemtype.fullname:
-            segments = [seg.strip() for seg in first_itemtype.fullname.split('/') if seg.strip()]
-            # Resolve Category (first segment)
-            if len(segments) >= 1:
-                cat = Categories.objects.filter(name=segments[0]).order_by('name').first()
-                if cat:
-                    breadcrumb_parts.append({
-                        'label': segments[0],
-                        'url': f"{ request.build_absolute_uri('/products/') }?category[]={cat.id}",
-                    })
-                else:
-                    breadcrumb_parts.append({ 'label': segments[0], 'url': request.build_absolute_uri('/products/') })
-            # Resolve Subcategory (first two segments combined)
-            if len(segments) >= 2:
-                fullname = f"{segments[0]}/{segments[1]}"
-                subcat = Subcategories.objects.filter(fullname=fullname).order_by('name').first()
-                if subcat:
-                    breadcrumb_parts.append({
-                        'label': segments[1],
-                        'url': f"{ request.build_absolute_uri('/products/') }?subcategory[]={subcat.id}",
-                    })
-                else:
-                    breadcrumb_parts.append({ 'label': segments[1], 'url': request.build_absolute_uri('/products/') })
-            # ItemType (link by id)
-            if len(segments) >= 3 or first_itemtype:
-                breadcrumb_parts.append({
-                    'label': first_itemtype.name,
-                    'url': f"{ request.build_absolute_uri('/products/') }?itemtype[]={first_itemtype.id}",
-                })
-        context['breadcrumb_parts'] = breadcrumb_parts
-    except Exception:
-        context['breadcrumb_parts'] = []
-    
     return render(request, 'frontend/product_detail.html', context)
 
 
@@ -543,26 +168,17 @@ def component_price_finder(request):
             component = components.first()
     
     if component:
-        # Get kit pricing data
-        kit_pricing_data = pricing_utils.get_component_kit_pricing(component)
-        
-        # Filter by retailer if specified
-        if retailer_filter:
-            kit_pricing_data = [
-                item for item in kit_pricing_data
-                if item['pricelisting'].retailer and str(item['pricelisting'].retailer.id) == retailer_filter
-            ]
-        
-        # Sort results
-        if sort_by == 'best_price':
-            kit_pricing_data.sort(key=lambda x: x['component_pricing']['effective_price'] or Decimal('999999'))
-        elif sort_by == 'retailer':
-            kit_pricing_data.sort(key=lambda x: (
-                x['pricelisting'].retailer.name if x['pricelisting'].retailer else '',
-                x['component_pricing']['effective_price'] or Decimal('999999')
-            ))
-        elif sort_by == 'product_name':
-            kit_pricing_data.sort(key=lambda x: x['product'].name.lower())
+        # Get kit pricing data, filtered by retailer and sorted in SQL
+        try:
+            retailer_id = uuid.UUID(retailer_filter) if retailer_filter else None
+        except ValueError:
+            retailer_id = None
+        if retailer_filter and retailer_id is None:
+            kit_pricing_data = []
+        else:
+            kit_pricing_data = pricing_utils.get_component_kit_pricing(
+                component, retailer_id=retailer_id, sort=sort_by
+            )
         
         results = kit_pricing_data
     
@@ -585,8 +201,6 @@ def component_price_finder(request):
 
 def deal_decoder(request):
     """Deal Decoder view - analyze bundle deals and compare component prices"""
-    from decimal import Decimal, InvalidOperation
-    
     # Handle GET requests with preserved selections (from back button)
     if request.method == 'GET':
         component_ids = request.GET.getlist('component_id')
@@ -614,32 +228,9 @@ def deal_decoder(request):
         bundle_price_str = request.POST.get('bundle_price', '').strip()
         
         # Validate inputs
-        errors = []
-        if not component_ids or not all(component_ids):
-            errors.append("Please select at least one component.")
-        if not bundle_price_str:
-            errors.append("Please enter a bundle price.")
-        
-        try:
-            bundle_price = Decimal(bundle_price_str)
-            if bundle_price <= 0:
-                errors.append("Bundle price must be greater than 0.")
-        except (InvalidOperation, ValueError):
-            errors.append("Please enter a valid bundle price.")
-        
-        if len(component_ids) != len(quantities):
-            errors.append("Component and quantity counts do not match.")
-        
-        # Parse quantities
-        parsed_quantities = []
-        for qty_str in quantities:
-            try:
-                qty = int(qty_str)
-                if qty <= 0:
-                    errors.append("All quantities must be greater than 0.")
-                parsed_quantities.append(qty)
-            except ValueError:
-                errors.append("Please enter valid quantities.")
+        bundle_price, parsed_quantities, errors = deal_analysis.parse_basket(
+            component_ids, quantities, bundle_price_str
+        )
         
         if errors:
             # Return form with errors
@@ -652,131 +243,13 @@ def deal_decoder(request):
             return render(request, 'frontend/deal_decoder.html', context)
         
         # Get components
-        try:
-            selected_components = Components.objects.filter(
-                id__in=component_ids
-            ).select_related('brand')
-            
-            if selected_components.count() != len(component_ids):
-                errors.append("One or more selected components were not found.")
-                context = {'errors': errors}
-                return render(request, 'frontend/deal_decoder.html', context)
-        except Exception as e:
-            errors.append(f"Error loading components: {str(e)}")
+        selected_components, errors = deal_analysis.load_basket_components(component_ids)
+        if errors:
             context = {'errors': errors}
             return render(request, 'frontend/deal_decoder.html', context)
         
-        # Calculate effective prices from user's bundle using weighted proration
-        # This mimics the logic in prorate_product_price_to_components
-        component_data = {}
-        total_weight = Decimal('0')
-        
-        for component, quantity in zip(selected_components, parsed_quantities):
-            standalone_price = component.standalone_price
-            if standalone_price is not None:
-                weighted_value = standalone_price * Decimal(quantity)
-                total_weight += weighted_value
-                component_data[component.id] = {
-                    'component': component,
-                    'quantity': quantity,
-                    'standalone_price': standalone_price,
-                    'weighted_value': weighted_value,
-                    'has_price': True,
-                }
-            else:
-                component_data[component.id] = {
-                    'component': component,
-                    'quantity': quantity,
-                    'standalone_price': None,
-                    'weighted_value': Decimal('0'),
-                    'has_price': False,
-                }
-        
-        # Calculate weights and effective prices
-        components_without_price = [
-            comp_id for comp_id, data in component_data.items()
-            if not data['has_price']
-        ]
-        
-        # Allocate weights
-        if total_weight > 0:
-            used_weight = Decimal('0')
-            for comp_id, data in component_data.items():
-                if data['has_price']:
-                    weight = data['weighted_value'] / total_weight
-                    component_data[comp_id]['weight'] = weight
-                    used_weight += weight
-            
-            if components_without_price:
-                remaining_weight = Decimal('1') - used_weight
-                if remaining_weight > 0:
-                    weight_per_component = remaining_weight / Decimal(len(components_without_price))
-                    for comp_id in components_without_price:
-                        component_data[comp_id]['weight'] = weight_per_component
-        else:
-            # No components have standalone_price - equal distribution
-            weight_per_component = Decimal('1') / Decimal(len(component_data)) if component_data else Decimal('0')
-            for comp_id in component_data:
-                component_data[comp_id]['weight'] = weight_per_component
-        
-        # Calculate effective prices for user's bundle
-        user_bundle_results = {}
-        for comp_id, data in component_data.items():
-            weight = data.get('weight', Decimal('0'))
-            quantity = data['quantity']
-            
-            if quantity > 0 and weight > 0:
-                effective_price = (bundle_price * weight) / Decimal(quantity)
-            else:
-                effective_price = Decimal('0')
-            
-            user_bundle_results[comp_id] = {
-                'component': data['component'],
-                'quantity': quantity,
-                'standalone_price': data['standalone_price'],
-                'effective_price': effective_price,
-                'weight': weight,
-            }
-        
-        # For each component, get comparison data from other products
-        comparison_data = {}
-        for comp_id, bundle_info in user_bundle_results.items():
-            component = bundle_info['component']
-            user_effective_price = bundle_info['effective_price']
-            
-            # Get all products containing this component
-            kit_pricing_data = pricing_utils.get_component_kit_pricing(component)
-            
-            # Compare and sort
-            comparisons = []
-            for item in kit_pricing_data:
-                product_effective_price = item['component_pricing']['effective_price']
-                if product_effective_price is not None:
-                    price_difference = user_effective_price - product_effective_price
-                    percentage_diff = None
-                    if user_effective_price > 0:
-                        percentage_diff = (price_difference / user_effective_price) * Decimal('100')
-                    
-                    comparisons.append({
-                        'product': item['product'],
-                        'pricelisting': item['pricelisting'],
-                        'product_component': item['product_component'],
-                        'effective_price': product_effective_price,
-                        'list_price': item['component_pricing']['list_price'],
-                        'price_difference': price_difference,
-                        'percentage_diff': percentage_diff,
-                        'is_better': price_difference > 0,  # User pays more = product is better deal
-                        'is_equal': abs(price_difference) < Decimal('0.01'),
-                    })
-            
-            # Sort by effective price (best deals first)
-            comparisons.sort(key=lambda x: x['effective_price'] or Decimal('999999'))
-            
-            # Convert UUID to string for template access
-            comparison_data[str(comp_id)] = {
-                'user_bundle_info': bundle_info,
-                'comparisons': comparisons,
-            }
+        # Prorate the bundle and compare every component with kit deals in one batch
+        analysis = deal_analysis.analyze_basket(selected_components, parsed_quantities, bundle_price)
         
         # Store component IDs and quantities for back button (convert to strings for JSON serialization)
         import json
@@ -784,9 +257,9 @@ def deal_decoder(request):
         quantities_list = [int(qty) for qty in parsed_quantities]
         
         context = {
-            'selected_components': list(user_bundle_results.values()),
+            'selected_components': analysis['selected_components'],
             'bundle_price': bundle_price,
-            'comparison_data': comparison_data,
+            'comparison_data': analysis['comparison_data'],
             'has_results': True,
             'component_ids_json': json.dumps(component_ids_list),
             'quantities_json': json.dumps(quantities_list),
@@ -800,217 +273,89 @@ def deal_decoder(request):
         return render(request, 'frontend/deal_decoder.html', context)
 
 
+@cache_public_page(300, tags=('catalog', 'settings'))
 def component_detail(request, component_id):
     """Component detail view"""
-    component = get_object_or_404(Components, id=component_id)
-    
-    # Get all component attributes
-    component_attributes = ComponentAttributes.objects.filter(component=component).select_related('attribute')
-    
-    # Get category-designated attributes from component's ItemTypes
-    category_attributes = Attributes.objects.filter(
-        itemtypes__in=component.itemtypes.all()
-    ).distinct()
-    
-    # Separate important vs additional attributes
-    # Important attributes are those that are designated for the component's categories
-    important_attributes = component_attributes.filter(attribute__in=category_attributes)
-    # Additional attributes are everything else
-    additional_attributes = component_attributes.exclude(attribute__in=category_attributes)
-    
-    # Get component features
-    component_features = ComponentFeatures.objects.filter(component=component).select_related('feature')
-    
-    # Get products that use this component
-    product_components = ProductComponents.objects.filter(component=component).select_related('product').prefetch_related('product__productimages_set')
-    
-    # Get kit pricing data for this component
-    kit_pricing_data = pricing_utils.get_component_kit_pricing(component)
-    
-    # Get site settings for fair price feature
-    site_settings = SiteSettings.get_settings()
-    
-    context = {
-        'component': component,
-        'important_attributes': important_attributes,
-        'additional_attributes': additional_attributes,
-        'component_features': component_features,
-        'product_components': product_components,
-        'kit_pricing_data': kit_pricing_data,
-        'show_fair_price': site_settings.show_fair_price_feature,
-    }
-
-    # Build breadcrumb parts from first item type's fullname for components
-    try:
-        first_itemtype = component.itemtypes.first()
-        breadcrumb_parts = []
-        if first_itemtype and first_itemtype.fullname:
-            segments = [seg.strip() for seg in first_itemtype.fullname.split('/') if seg.strip()]
-            # Resolve Category
-            if len(segments) >= 1:
-                cat = Categories.objects.filter(name=segments[0]).order_by('name').first()
-                if cat:
-                    breadcrumb_parts.append({
-                        'label': segments[0],
-                        'url': f"{ request.build_absolute_uri('/components/') }?category[]={cat.id}",
-                    })
-                else:
-                    breadcrumb_parts.append({ 'label': segments[0], 'url': request.build_absolute_uri('/components/') })
-            # Resolve Subcategory
-            if len(segments) >= 2:
-                fullname = f"{segments[0]}/{segments[1]}"
-                subcat = Subcategories.objects.filter(fullname=fullname).order_by('name').first()
-                if subcat:
-                    breadcrumb_parts.append({
-                        'label': segments[1],
-                        'url': f"{ request.build_absolute_uri('/components/') }?subcategory[]={subcat.id}",
-                    })
-                else:
-                    breadcrumb_parts.append({ 'label': segments[1], 'url': request.build_absolute_uri('/components/') })
-            # ItemType
-            if len(segments) >= 3 or first_itemtype:
-                breadcrumb_parts.append({
-                    'label': first_itemtype.name,
-                    'url': f"{ request.build_absolute_uri('/components/') }?itemtype[]={first_itemtype.id}",
-                })
-        context['breadcrumb_parts'] = breadcrumb_parts
-    except Exception:
-        context['breadcrumb_parts'] = []
+    context = detail_loaders.load_component_detail(component_id)
+
+    # Breadcrumb parts from first item type's fullname for components
+    components_url = request.build_absolute_uri('/components/')
+    context['breadcrumb_parts'] = [
+        {
+            'label': link['label'],
+            'url': f"{components_url}?{link['query']}" if link['query'] else components_url,
+        }
+        for link in context.pop('breadcrumb_links')
+    ]
     
     return render(request, 'frontend/component_detail.html', context)
 
+@cache_public_page(600)
 def browse_flagship(request):
     """Browse flagship components organized by item type - curated showcase view"""
-    # Query featured components ordered by showcase priority, then name
-    flagship_components = Components.objects.filter(
-        is_featured=True
-    ).select_related('brand').prefetch_related(
-        'batteryvoltages', 'batteryplatforms', 'itemtypes', 'componentattributes_set__attribute'
-    ).order_by('-showcase_priority', 'name')
-    
-    # Organize components by primary item type
-    organized_products = {}
-    itemtype_metadata = []  # For sidebar navigation
+    # Featured component ids grouped by primary item type, from the site stats cache
+    layout = site_stats.get_flagship_layout()
     
-    for component in flagship_components:
-        # Get the primary item type for this component
-        primary_itemtype = component.itemtypes.first()
-        
-        if primary_itemtype:
-            itemtype_name = primary_itemtype.name
-            itemtype_slug = itemtype_name.lower().replace(' ', '-').replace('&', 'and')
-            
-            if itemtype_name not in organized_products:
-                organized_products[itemtype_name] = {
-                    'itemtype': primary_itemtype,
-                    'itemtype_slug': itemtype_slug,
-                    'components': []
-                }
-            
-            organized_products[itemtype_name]['components'].append(component)
-    
-    # Create item type metadata for sidebar navigation
-    for itemtype_name, itemtype_data in organized_products.items():
-        itemtype_metadata.append({
-            'name': itemtype_name,
-            'slug': itemtype_data['itemtype_slug'],
-            'count': len(itemtype_data['components']),
-            'sortorder': itemtype_data['itemtype'].sortorder or 0
-        })
+    component_ids = [component_id for group in layout['groups'] for component_id in group['component_ids']]
+    components = Components.objects.select_related('brand').prefetch_related(
+        'batteryvoltages', 'batteryplatforms', 'componentattributes_set__attribute'
+    ).in_bulk(component_ids)
     
-    # Sort item types by sortorder, then by name
-    itemtype_metadata.sort(key=lambda x: (x['sortorder'], x['name']))
+    # Organize components by primary item type, in showcase order
+    organized_products = {}
+    for group in layout['groups']:
+        organized_products[group['name']] = {
+            'itemtype': group['itemtype'],
+            'itemtype_slug': group['slug'],
+            'components': [
+                components[component_id] for component_id in group['component_ids'] if component_id in components
+            ],
+        }
     
     context = {
         'organized_products': organized_products,
-        'itemtype_metadata': itemtype_metadata,
-        'has_products': flagship_components.exists(),
+        'itemtype_metadata': layout['itemtype_metadata'],
+        'has_products': bool(layout['featured_ids']),
     }
     
     return render(request, 'frontend/browse.html', context)
 
+@cache_public_page(300, tags=('catalog', 'articles'))
 def home(request):
     """Home page with site overview and statistics"""
-    # Get basic statistics for the home page
-    total_products = Products.objects.count()
-    total_components = Components.objects.count()
-    total_brands = Brands.objects.filter(Q(products__isnull=False) | Q(components__isnull=False)).distinct().count()
-    total_categories = Categories.objects.filter(Q(products__isnull=False) | Q(components__isnull=False)).distinct().count()
-    
-    # Get latest published articles (first 3), ignoring pin status
-    latest_articles = LearningArticle.objects.filter(
-        is_published=True
-    ).order_by('-published_at', '-created_at').prefetch_related('tags')[:3]
-    
-    # Get flagship components preview (first 4 featured components, ordered by showcase priority)
-    flagship_preview = Components.objects.filter(
-        is_featured=True
-    ).select_related('brand').prefetch_related('categories', 'subcategories', 'itemtypes').order_by('-showcase_priority', 'name')[:4]
-    
-    # Get recent products (latest 3 by release date)
-    recent_products = Products.objects.select_related('brand').prefetch_related('productimages_set').order_by('-releasedate')[:3]
-    
-    # Get recent components (latest 3)
-    recent_components = Components.objects.select_related('brand').order_by('-id')[:3]
-    
-    # Determine quick-compare item type from highest showcase_priority featured component
-    quick_compare_title = None
-    quick_compare_itemtype = None
-    top_featured = Components.objects.filter(is_featured=True).select_related('brand').prefetch_related('itemtypes').order_by('-showcase_priority', 'name').first()
-    if top_featured:
-        quick_compare_itemtype = top_featured.itemtypes.first()
-        if quick_compare_itemtype:
-            quick_compare_title = f"Featured {quick_compare_itemtype.name}"
-
-    # Get important attributes for the item type (to show labels even if no values)
-    important_attributes = []
-    if quick_compare_itemtype:
-        important_attributes = Attributes.objects.filter(
-            itemtypes=quick_compare_itemtype
-        ).order_by('sortorder', 'name')[:4]
-
-    # Get quick compare components: top 2 featured of that derived item type (ordered by showcase priority)
-    flagship_components = Components.objects.filter(
-        is_featured=True,
-        itemtypes=quick_compare_itemtype if quick_compare_itemtype else None
-    ).select_related('brand', 'motortype').prefetch_related(
-        'categories', 'subcategories', 'itemtypes', 'batteryplatforms', 'productlines',
-        Prefetch('componentattributes_set', 
-                queryset=ComponentAttributes.objects.select_related('attribute').order_by('attribute__sortorder', 'attribute__name'))
-    ).order_by('-showcase_priority', 'name')[:2]
-    
+    # Statistics and sections are served from the site stats cache
     context = {
-        'total_products': total_products,
-        'total_components': total_components,
-        'total_brands': total_brands,
-        'total_categories': total_categories,
-        'latest_articles': latest_articles,
-        'flagship_preview': flagship_preview,
-        'recent_products': recent_products,
-        'recent_components': recent_components,
-        'flagship_components': flagship_components,
-        'quick_compare_title': quick_compare_title,
-        'important_attributes': important_attributes,
-        'has_flagship_products': Components.objects.filter(is_featured=True).exists(),
+        **site_stats.get_site_stats(),
+        **site_stats.get_home_sections(),
     }
     
     return render(request, 'frontend/home.html', context)
 
+def _search_page(model_class, query, page_number):
+    """One page of search results and the total, ranked when the search index is enabled."""
+    if search_index.documents_enabled():
+        return search_index.search_page(model_class, query, page_number)
+    
+    queryset = model_class.objects.filter(
+        Q(name__icontains=query) | Q(sku__icontains=query) | Q(description__icontains=query)
+    ).select_related('brand').order_by('name')
+    offset = (page_number - 1) * search_index.SEARCH_PAGE_SIZE
+    return list(queryset[offset:offset + search_index.SEARCH_PAGE_SIZE]), queryset.count()
+
 def search_results(request):
     """Global search results page for products, components, and brands."""
     query = request.GET.get('q', '').strip()
-    products = []
-    components = []
+    try:
+        page_number = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page_number = 1
+    products, product_count = [], 0
+    components, component_count = [], 0
     brands = []
 
     if query:
-        products = Products.objects.filter(
-            Q(name__icontains=query) | Q(sku__icontains=query) | Q(description__icontains=query)
-        ).select_related('brand').order_by('name')[:50]
-
-        components = Components.objects.filter(
-            Q(name__icontains=query) | Q(sku__icontains=query) | Q(description__icontains=query)
-        ).select_related('brand').order_by('name')[:50]
+        products, product_count = _search_page(Products, query, page_number)
+        components, component_count = _search_page(Components, query, page_number)
 
         brands = Brands.objects.filter(
             Q(name__icontains=query)
@@ -1021,24 +366,19 @@ def search_results(request):
         'products': products,
         'components': components,
         'brands': brands,
+        'product_count': product_count,
+        'component_count': component_count,
+        'page_number': page_number,
+        'has_previous': page_number > 1,
+        'has_next': max(product_count, component_count) > page_number * search_index.SEARCH_PAGE_SIZE,
     }
 
     return render(request, 'frontend/search_results.html', context)
 
 def about(request):
     """About page with information about the database"""
-    # Compute database statistics for the About page
-    total_products = Products.objects.count()
-    total_components = Components.objects.count()
-    total_brands = Brands.objects.filter(Q(products__isnull=False) | Q(components__isnull=False)).distinct().count()
-    total_categories = Categories.objects.filter(Q(products__isnull=False) | Q(components__isnull=False)).distinct().count()
-
-    context = {
-        'total_products': total_products,
-        'total_components': total_components,
-        'total_brands': total_brands,
-        'total_categories': total_categories,
-    }
+    # Database statistics for the About page, from the site stats cache
+    context = dict(site_stats.get_site_stats())
 
     return render(request, 'frontend/about.html', context)
 
@@ -1069,13 +409,8 @@ def learning_index(request):
         article_count=Count('articles', filter=Q(articles__is_published=True))
     ).filter(article_count__gt=0).order_by('name')
     
-    # Paginate articles
-    paginator = Paginator(articles, 12)
-    page = int(request.GET.get('page', 1))
-    try:
-        page_obj = paginator.page(page)
-    except:
-        page_obj = paginator.page(1)
+    # Paginate articles (?cursor= opts into keyset pagination)
+    page_obj = pagination.paginate(articles, request.GET.get('page', 1), 12, cursor=request.GET.get('cursor'))
     
     context = {
         'articles': page_obj,
@@ -1122,6 +457,9 @@ def api_search_suggestions(request):
     if len(query) < 2:
         return JsonResponse({'suggestions': []})
     
+    if search_index.is_enabled():
+        return JsonResponse({'suggestions': search_index.get_search_index().suggest(query)})
+    
     suggestions = []
     
     # Search products
@@ -1257,118 +595,38 @@ def api_filter_options(request):
 def api_quick_info(request, item_id):
     """API endpoint for quick product/component info for tooltips"""
     item_type = request.GET.get('type', 'product')
+    if item_type not in detail_loaders.QUICK_INFO_TYPES:
+        return JsonResponse({'error': 'Invalid item type'}, status=400)
+    
+    # Payload cached per item, shared with api_quick_info_batch
+    payload = detail_loaders.get_quick_info(item_type, [item_id]).get(str(item_id))
+    if payload is None:
+        return JsonResponse({'error': f'{item_type.capitalize()} not found'}, status=404)
+    return JsonResponse(payload)
+
+def api_quick_info_batch(request):
+    """
+    API endpoint for the tooltips of many products or components at once.
+    
+    Takes ``type`` (product or component) and ``ids`` (comma separated) and
+    returns {'items': {id: api_quick_info payload}}; unknown ids are left out.
+    Catalog pages prefetch the tooltips of all their cards with one request.
+    """
+    item_type = request.GET.get('type', 'product')
+    if item_type not in detail_loaders.QUICK_INFO_TYPES:
+        return JsonResponse({'error': 'Invalid item type'}, status=400)
+    
+    ids = [item_id.strip() for item_id in request.GET.get('ids', '').split(',') if item_id.strip()]
+    if not ids:
+        return JsonResponse({'error': 'No IDs provided'}, status=400)
+    if len(ids) > detail_loaders.QUICK_INFO_BATCH_LIMIT:
+        return JsonResponse({'error': f'Maximum {detail_loaders.QUICK_INFO_BATCH_LIMIT} items per request'}, status=400)
+    try:
+        ids = [uuid.UUID(item_id) for item_id in ids]
+    except ValueError:
+        return JsonResponse({'error': 'Invalid ID'}, status=400)
     
-    if item_type == 'product':
-        try:
-            product = Products.objects.select_related('brand', 'status').prefetch_related(
-                'batteryplatforms', 'productcomponents_set__component'
-            ).get(id=item_id)
-            
-            # Get battery platforms
-            battery_platforms = [platform.name for platform in product.batteryplatforms.all()]
-            
-            # Get components list
-            components = []
-            for product_component in product.productcomponents_set.all():
-                component = product_component.component
-                components.append({
-                    'name': component.name,
-                    'quantity': product_component.quantity,
-                    'sku': component.sku or '',
-                    'url': f'/components/{component.id}/'
-                })
-            
-            return JsonResponse({
-                'name': product.name,
-                'brand': product.brand.name if product.brand else '',
-                'sku': product.sku or '',
-                'status': product.status.name if product.status else '',
-                'image': product.image or '',
-                'description': product.description or '',
-                'battery_platforms': battery_platforms,
-                'components': components,
-                'url': f'/product/{product.id}/'
-            })
-        except Products.DoesNotExist:
-            return JsonResponse({'error': 'Product not found'}, status=404)
-    
-    elif item_type == 'component':
-        try:
-            component = Components.objects.select_related('brand', 'motortype').prefetch_related(
-                'itemtypes__attributes', 'componentattributes_set__attribute', 'componentfeatures_set__feature'
-            ).get(id=item_id)
-            
-            # Get category-designated attributes (key attributes)
-            category_attributes = Attributes.objects.filter(
-                itemtypes__in=component.itemtypes.all()
-            ).distinct()
-            
-            # Get component attributes that are designated by categories
-            important_attributes = ComponentAttributes.objects.filter(
-                component=component,
-                attribute__in=category_attributes
-            ).select_related('attribute')
-            
-            key_attributes = []
-            for attr in important_attributes:
-                formatted_value = format_attribute_value_helper(attr) if attr.value else 'N/A'
-                key_attributes.append({
-                    'name': attr.attribute.name,
-                    'value': formatted_value,
-                    'unit': attr.attribute.unit or ''
-                })
-            
-            # Get component features
-            component_features = ComponentFeatures.objects.filter(component=component).select_related('feature')
-            features = []
-            for comp_feature in component_features:
-                features.append({
-                    'name': comp_feature.feature.name,
-                    'value': comp_feature.value or 'Yes'
-                })
-            
-            # Get top 3 products with lowest effective prices
-            kit_pricing = pricing_utils.get_component_kit_pricing(component)
-            lowest_price_products = []
-            if kit_pricing:
-                # Sort by effective_price ascending and take top 3
-                sorted_pricing = sorted(
-                    kit_pricing,
-                    key=lambda x: x['component_pricing']['effective_price']
-                )[:3]
-                
-                for item in sorted_pricing:
-                    product = item['product']
-                    pricelisting = item['pricelisting']
-                    effective_price = item['component_pricing']['effective_price']
-                    
-                    lowest_price_products.append({
-                        'name': product.name,
-                        'url': f'/product/{product.id}/',
-                        'effective_price': str(effective_price),
-                        'kit_price': str(pricelisting.price),
-                        'retailer': pricelisting.retailer.name if pricelisting.retailer else None,
-                        'retailer_url': pricelisting.url if pricelisting.url else None,
-                        'retailer_logo': pricelisting.retailer.logo if pricelisting.retailer and pricelisting.retailer.logo else None,
-                        'image': product.image or ''
-                    })
-            
-            return JsonResponse({
-                'name': component.name,
-                'brand': component.brand.name if component.brand else '',
-                'sku': component.sku or '',
-                'image': component.image or '',
-                'description': component.description or '',
-                'motor_type': component.motortype.name if component.motortype else None,
-                'key_attributes': key_attributes,
-                'features': features,
-                'lowest_price_products': lowest_price_products,
-                'url': f'/components/{component.id}/'
-            })
-        except Components.DoesNotExist:
-            return JsonResponse({'error': 'Component not found'}, status=404)
-    
-    return JsonResponse({'error': 'Invalid item type'}, status=400)
+    return JsonResponse({'items': detail_loaders.get_quick_info(item_type, ids)})
 
 def api_compare_components(request):
     """API endpoint for component comparison data"""
@@ -1382,162 +640,57 @@ def api_compare_components(request):
         if len(component_id_list) > 4:
             return JsonResponse({'error': 'Maximum 4 components can be compared'}, status=400)
         
-        # Query components with all related data
-        components = Components.objects.filter(
-            id__in=component_id_list
-        ).select_related('brand', 'listingtype').prefetch_related(
-            'batteryvoltages', 'batteryplatforms', 'categories', 'subcategories', 'itemtypes', 'productlines',
-            'componentattributes_set__attribute'
-        ).order_by('name')
-        
-        if not components.exists():
+        # Components, attribute split and attribute union, cached per id set
+        comparison = detail_loaders.get_component_comparison(component_id_list)
+        if comparison is None:
             return JsonResponse({'error': 'No components found'}, status=404)
         
         # Get site settings for fair price feature
         site_settings = SiteSettings.get_settings()
         
         comparison_data = {
-            'components': [],
-            'common_attributes': [],
-            'all_attributes': [],
+            'components': [
+                {**component, 'fair_price': component['fair_price'] if site_settings.show_fair_price_feature else None}
+                for component in comparison['components']
+            ],
+            'common_attributes': comparison['common_attributes'],
+            'all_attributes': comparison['all_attributes'],
             'show_fair_price': site_settings.show_fair_price_feature
         }
         
-        # Process each component
-        for component in components:
-            # Get category-designated attributes (important attributes)
-            category_attributes = Attributes.objects.filter(
-                itemtypes__in=component.itemtypes.all()
-            ).distinct()
-            
-            # Get component attributes
-            component_attrs = component.componentattributes_set.select_related('attribute').all()
-            
-            # Separate important vs additional attributes
-            important_attrs = component_attrs.filter(attribute__in=category_attributes)
-            additional_attrs = component_attrs.exclude(attribute__in=category_attributes)
-            
-            # Build component data
-            component_data = {
-                'id': str(component.id),
-                'name': component.name,
-                'description': component.description or '',
-                'sku': component.sku or '',
-                'brand': component.brand.name if component.brand else '',
-                'image': component.image or '',
-                'voltage': [str(v.value) for v in component.batteryvoltages.all()],
-                'platform': [p.name for p in component.batteryplatforms.all()],
-                'product_lines': [pl.name for pl in component.productlines.all()],
-                'categories': [c.name for c in component.categories.all()],
-                'important_attributes': {},
-                'additional_attributes': {},
-                'fair_price': None
-            }
-            
-            # Add important attributes
-            for attr in important_attrs:
-                formatted_value = format_attribute_value_helper(attr) if attr.value else 'N/A'
-                component_data['important_attributes'][attr.attribute.name] = {
-                    'value': formatted_value,
-                    'unit': attr.attribute.unit or ''
-                }
-            
-            # Add additional attributes
-            for attr in additional_attrs:
-                formatted_value = format_attribute_value_helper(attr) if attr.value else 'N/A'
-                component_data['additional_attributes'][attr.attribute.name] = {
-                    'value': formatted_value,
-                    'unit': attr.attribute.unit or ''
-                }
-            
-            # Add fair price data if enabled
-            if site_settings.show_fair_price_feature:
-                try:
-                    if hasattr(component, 'fair_price_narrative') and component.fair_price_narrative and component.fair_price_narrative.get('fair_price'):
-                        component_data['fair_price'] = {
-                            'price': component.fair_price_narrative.get('fair_price'),
-                            'reasoning': component.fair_price_narrative.get('reasoning', ''),
-                            'pros': component.fair_price_narrative.get('pros', []),
-                            'cons': component.fair_price_narrative.get('cons', []),
-                            'market_notes': component.fair_price_narrative.get('market_notes', '')
-                        }
-                    else:
-                        # Always add fair_price key when feature is enabled, even if no data
-                        component_data['fair_price'] = None
-                except Exception as e:
-                    component_data['fair_price'] = None
-            
-            comparison_data['components'].append(component_data)
-        
-        # Find all attributes across all components (for detailed comparison)
-        if comparison_data['components']:
-            # Get all important attribute names from any component
-            all_important_attrs = set()
-            for comp in comparison_data['components']:
-                all_important_attrs.update(comp['important_attributes'].keys())
-            
-            # Get all additional attribute names from any component
-            all_additional_attrs = set()
-            for comp in comparison_data['components']:
-                all_additional_attrs.update(comp['additional_attributes'].keys())
-            
-            # Build all important attributes list with units
-            for attr_name in sorted(all_important_attrs):
-                # Get unit from first component that has this attribute
-                unit = ''
-                for comp in comparison_data['components']:
-                    if attr_name in comp['important_attributes']:
-                        unit = comp['important_attributes'][attr_name]['unit']
-                        break
-                comparison_data['common_attributes'].append({
-                    'name': attr_name,
-                    'unit': unit,
-                    'type': 'important'
-                })
-            
-            # Build all additional attributes list with units
-            for attr_name in sorted(all_additional_attrs):
-                # Get unit from first component that has this attribute
-                unit = ''
-                for comp in comparison_data['components']:
-                    if attr_name in comp['additional_attributes']:
-                        unit = comp['additional_attributes'][attr_name]['unit']
-                        break
-                comparison_data['common_attributes'].append({
-                    'name': attr_name,
-                    'unit': unit,
-                    'type': 'additional'
-                })
-            
-            # Build all attributes list (for showing all available attributes)
-            all_attrs = sorted(all_important_attrs | all_additional_attrs)
-            for attr_name in all_attrs:
-                # Get unit from first component that has this attribute
-                unit = ''
-                attr_type = 'additional'
-                for comp in comparison_data['components']:
-                    if attr_name in comp['important_attributes']:
-                        unit = comp['important_attributes'][attr_name]['unit']
-                        attr_type = 'important'
-                        break
-                    elif attr_name in comp['additional_attributes']:
-                        unit = comp['additional_attributes'][attr_name]['unit']
-                        break
-                comparison_data['all_attributes'].append({
-                    'name': attr_name,
-                    'unit': unit,
-                    'type': attr_type
-                })
-        
         return JsonResponse(comparison_data)
         
     except Exception as e:
         return JsonResponse({'error': f'Error processing comparison: {str(e)}'}, status=500)
 
+def api_deal_analysis(request):
+    """
+    API endpoint for the Deal Decoder analysis.
+    
+    Accepts the same fields as the Deal Decoder form (component_ids[],
+    quantities[], bundle_price) by POST or GET and returns the prorated
+    price of every component with its kit deal comparisons.
+    """
+    params = request.POST if request.method == 'POST' else request.GET
+    component_ids = params.getlist('component_ids[]')
+    quantities = params.getlist('quantities[]')
+    bundle_price_str = params.get('bundle_price', '').strip()
+    
+    bundle_price, parsed_quantities, errors = deal_analysis.parse_basket(
+        component_ids, quantities, bundle_price_str
+    )
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+    
+    components, errors = deal_analysis.load_basket_components(component_ids)
+    if errors:
+        return JsonResponse({'errors': errors}, status=404)
+    
+    analysis = deal_analysis.analyze_basket(components, parsed_quantities, bundle_price)
+    return JsonResponse(deal_analysis.serialize_analysis(analysis, bundle_price))
+
 def api_components_for_deal_decoder(request):
     """API endpoint for browsing/filtering components in Deal Decoder"""
-    from django.core.paginator import Paginator
-    
     # Check if filtering by specific component IDs (for restoring selections)
     ids_param = request.GET.get('ids')
     if ids_param:
@@ -1562,15 +715,11 @@ def api_components_for_deal_decoder(request):
         # Apply sorting
         components = catalog_utils.apply_sorting(components, filters['sort'], filters['sort_direction'], Components)
     
-    # Paginate
+    # Paginate (pass ?cursor= for keyset pagination and follow next_cursor)
     page = int(request.GET.get('page', 1))
     page_size = int(request.GET.get('page_size', 24))
-    paginator = Paginator(components, page_size)
-    
-    try:
-        page_obj = paginator.page(page)
-    except:
-        page_obj = paginator.page(1)
+    page_obj = catalog_utils.paginate_results(components, page, page_size, request.GET.get('cursor'))
+    paginator = page_obj.paginator
     
     # Serialize components
     components_data = []
@@ -1594,6 +743,8 @@ def api_components_for_deal_decoder(request):
         'has_next': page_obj.has_next(),
         'has_previous': page_obj.has_previous(),
         'total_count': paginator.count,
+        'next_cursor': getattr(page_obj, 'next_cursor', None),
+        'previous_cursor': getattr(page_obj, 'previous_cursor', None),
     }
     
     if include_filters:
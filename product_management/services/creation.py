@@ -7,6 +7,7 @@ from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
 
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models.signals import post_save, pre_save
 
 from product_management.models import BackofficeAudit
 from product_management.services.audit import record_audit_entry, snapshot_instance
@@ -208,6 +209,31 @@ def extract_component_from_product(
     return component
 
 
+def _update_with_save_signals(queryset, field_updates: Dict[str, Any]) -> None:
+    """
+    Run queryset.update() and send pre_save/post_save for every updated row.
+
+    update() sends no model signals, and the receivers in toolanalysis.signals
+    and frontend.signals are what keep CatalogEntries, kit deals and the
+    frontend caches in sync with a saved row.
+    """
+    model = queryset.model
+    update_fields = frozenset(field_updates)
+    instances = list(queryset)
+    for instance in instances:
+        for name, value in field_updates.items():
+            setattr(instance, name, value)
+        pre_save.send(sender=model, instance=instance, raw=False, using=queryset.db, update_fields=update_fields)
+
+    queryset.update(**field_updates)
+
+    for instance in instances:
+        post_save.send(
+            sender=model, instance=instance, created=False, raw=False,
+            using=queryset.db, update_fields=update_fields,
+        )
+
+
 @transaction.atomic
 def batch_update_components(
     component_ids: Sequence[str],
@@ -243,7 +269,7 @@ def batch_update_components(
     
     # Apply field updates
     if field_updates:
-        components.update(**field_updates)
+        _update_with_save_signals(components, field_updates)
     
     # Apply M2M updates - need to refetch since update() doesn't return objects
     if m2m_updates:
@@ -294,7 +320,7 @@ def batch_update_products(
     
     # Apply field updates
     if field_updates:
-        products.update(**field_updates)
+        _update_with_save_signals(products, field_updates)
     
     # Apply M2M updates - need to refetch since update() doesn't return objects
     if m2m_updates:
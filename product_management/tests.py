@@ -1,9 +1,20 @@
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from frontend.cache_utils import get_version
+from frontend.catalog_index import CATALOG_INDEX_NAMESPACE
+from frontend.detail_loaders import get_component_comparison, get_product_detail, get_quick_info
+from frontend.page_cache import TAG_NAMESPACE_PREFIX
+from frontend.pricing_utils import get_cached_component_kit_pricing
+from frontend.search_index import SEARCH_DOCUMENTS_NAMESPACE, search_ids
+from frontend.site_stats import get_flagship_layout
 from product_management.services import (
     BundleComponentItem,
+    batch_update_components,
+    batch_update_products,
     create_bare_tool,
     create_bundle_from_products,
     extract_component_from_product,
@@ -11,10 +22,14 @@ from product_management.services import (
 )
 from toolanalysis.models import (
     Brands,
+    CatalogEntries,
+    ComponentKitDeals,
     Components,
     ListingTypes,
+    PriceListings,
     ProductComponents,
     Products,
+    Retailers,
 )
 
 
@@ -113,6 +128,86 @@ class ProductManagementServiceTests(TestCase):
 
         self.assertFalse(Components.objects.filter(id=component.id).exists())
 
+    def test_batch_updates_refresh_catalog_entries(self):
+        component, product = create_bare_tool(
+            component_data=self._component_payload(),
+            product_data=self._product_payload(),
+            user=self.superuser,
+        )
+        other_brand = Brands.objects.create(name="Acme")
+
+        batch_update_components([component.id], {"brand": other_brand}, user=self.superuser)
+        batch_update_products([product.id], {"brand": other_brand}, user=self.superuser)
+
+        self.assertEqual(CatalogEntries.objects.get(component=component).brand_name, "Acme")
+        self.assertEqual(CatalogEntries.objects.get(product=product).brand_name, "Acme")
+
+    def test_batch_updates_invalidate_catalog_caches(self):
+        component, _ = create_bare_tool(component_data=self._component_payload(), user=self.superuser)
+        namespaces = (CATALOG_INDEX_NAMESPACE, f"{TAG_NAMESPACE_PREFIX}catalog")
+        before = [get_version(namespace) for namespace in namespaces]
+
+        batch_update_components([component.id], {"is_featured": True}, user=self.superuser)
+
+        after = [get_version(namespace) for namespace in namespaces]
+        self.assertTrue(all(old != new for old, new in zip(before, after)))
+
+    def test_batch_price_updates_refresh_kit_deals(self):
+        drill = Components.objects.create(name="Drill", standalone_price=Decimal("100.00"))
+        battery = Components.objects.create(name="Battery", standalone_price=Decimal("100.00"))
+        kit = Products.objects.create(name="Kit")
+        ProductComponents.objects.create(product=kit, component=drill)
+        ProductComponents.objects.create(product=kit, component=battery)
+        PriceListings.objects.create(product=kit, retailer=Retailers.objects.create(name="Shop"), price=Decimal("100.00"))
+
+        batch_update_components([drill.id], {"standalone_price": Decimal("300.00")}, user=self.superuser)
+
+        deal = ComponentKitDeals.objects.get(component=battery)
+        self.assertEqual(deal.effective_price, Decimal("25.00"))
+
+    def test_batch_feature_updates_refresh_flagship_layout(self):
+        component, _ = create_bare_tool(component_data=self._component_payload(), user=self.superuser)
+        self.assertEqual(get_flagship_layout()["featured_ids"], set())
+
+        batch_update_components([component.id], {"is_featured": True}, user=self.superuser)
+
+        self.assertEqual(get_flagship_layout()["featured_ids"], {component.id})
+
+    def test_batch_updates_refresh_cached_details(self):
+        drill = Components.objects.create(name="Drill", brand=self.brand, standalone_price=Decimal("100.00"))
+        kit = Products.objects.create(name="Kit", brand=self.brand)
+        ProductComponents.objects.create(product=kit, component=drill)
+        PriceListings.objects.create(product=kit, retailer=Retailers.objects.create(name="Shop"), price=Decimal("90.00"))
+
+        def cached_names():
+            return (
+                get_product_detail(kit.id)["product"].name,
+                get_product_detail(kit.id)["product"].brand.name,
+                get_component_comparison([drill.id])["components"][0]["name"],
+                get_quick_info("component", [str(drill.id)])[str(drill.id)]["name"],
+                get_quick_info("product", [str(kit.id)])[str(kit.id)]["brand"],
+                get_cached_component_kit_pricing(drill)[0]["product"].name,
+            )
+
+        self.assertEqual(cached_names(), ("Kit", "Tooldecoded", "Drill", "Drill", "Tooldecoded", "Kit"))
+
+        other_brand = Brands.objects.create(name="Acme")
+        batch_update_products([kit.id], {"name": "Kit Pro", "brand": other_brand}, user=self.superuser)
+        batch_update_components([drill.id], {"name": "Drill Pro"}, user=self.superuser)
+
+        self.assertEqual(cached_names(), ("Kit Pro", "Acme", "Drill Pro", "Drill Pro", "Acme", "Kit Pro"))
+
+    def test_batch_updates_refresh_search_only_when_text_changes(self):
+        product = Products.objects.create(name="Kit", brand=self.brand)
+        self.assertEqual(search_ids(Products, "newbrand"), [])
+
+        before = get_version(SEARCH_DOCUMENTS_NAMESPACE)
+        batch_update_products([product.id], {"image": "kit.png"}, user=self.superuser)
+        self.assertEqual(get_version(SEARCH_DOCUMENTS_NAMESPACE), before)
+
+        batch_update_products([product.id], {"brand": Brands.objects.create(name="Newbrand")}, user=self.superuser)
+        self.assertEqual(search_ids(Products, "newbrand"), [product.id])
+
 
 class ProductManagementViewTests(TestCase):
     @classmethod
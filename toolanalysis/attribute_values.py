@@ -0,0 +1,206 @@
+"""
+Typed storage for ComponentAttributes values.
+
+``value`` is free text. Each row also carries ``numeric_value``, the value
+parsed as a number ("1,200" -> 1200, "1/2" -> 0.5), ``unit``, the
+attribute's unit in canonical spelling ("in-lbs" -> "in-lb"), and
+``display_value``, the value formatted for its unit ("18" V -> "18.0"), so
+catalog filters can run indexed range queries (torque >= 1200 in-lb) and
+templates and JSON APIs print the stored string instead of re-parsing it.
+
+The columns are filled on save by the receivers in toolanalysis.signals;
+``refresh_attribute_values`` recomputes every row and backs the
+``backfill_attribute_values`` management command.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from .models import ComponentAttributes
+from .sync_signals import attribute_values_refreshed
+
+# Canonical spelling of each unit alias
+UNIT_ALIASES = {
+    '$': 'usd', 'usd': 'usd', 'dollar': 'usd', 'dollars': 'usd',
+    'v': 'v', 'volt': 'v', 'volts': 'v', 'voltage': 'v',
+    'w': 'w', 'watt': 'w', 'watts': 'w',
+    '°f': '°f', 'f': '°f', 'fahrenheit': '°f',
+    'lm': 'lm', 'lumen': 'lm', 'lumens': 'lm',
+    'db': 'db', 'decibel': 'db', 'decibels': 'db',
+    'in-lb': 'in-lb', 'in-lbs': 'in-lb', 'inch-pound': 'in-lb', 'inch-pounds': 'in-lb',
+    'ft-lb': 'ft-lb', 'ft-lbs': 'ft-lb', 'foot-pound': 'ft-lb', 'foot-pounds': 'ft-lb',
+    'ah': 'ah', 'amp-hour': 'ah', 'amp-hours': 'ah', 'ampere-hour': 'ah', 'ampere-hours': 'ah',
+    'a': 'a', 'amp': 'a', 'amps': 'a', 'ampere': 'a', 'amperes': 'a', 'amperage': 'a',
+    'in': 'in', 'inch': 'in', 'inches': 'in', '"': 'in',
+    'lb': 'lb', 'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb',
+    'oz': 'oz', 'ounce': 'oz', 'ounces': 'oz',
+    'deg': 'degrees', 'degree': 'degrees', 'degrees': 'degrees', '°': 'degrees',
+}
+
+NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)')
+FRACTION = re.compile(r'(?:(\d+)[\s-]+)?(\d+)/(\d+)')
+# A number or fraction, optionally followed by a unit
+VALUE_WITH_UNIT = re.compile(r'(.*?\d\.?)\s*([^\d\s./][^\d]*)?')
+
+# Largest magnitude that fits ComponentAttributes.numeric_value
+MAX_NUMERIC_VALUE = Decimal('1e12')
+NUMERIC_PLACES = Decimal('0.000001')
+
+
+def normalize_unit(unit):
+    """Return the canonical spelling of a unit, or the lower-cased unit if unknown."""
+    if unit is None:
+        return None
+    unit = str(unit).strip().lower()
+    if not unit:
+        return None
+    return UNIT_ALIASES.get(unit, unit)
+
+
+def _parse_number(text):
+    if NUMBER.fullmatch(text):
+        return Decimal(text)
+    match = FRACTION.fullmatch(text)
+    if not match or int(match.group(3)) == 0:
+        return None
+    whole, numerator, denominator = match.groups()
+    return Decimal(whole or 0) + Decimal(numerator) / Decimal(denominator)
+
+
+def parse_numeric_value(value, unit=None):
+    """
+    Parse an attribute value as a Decimal.
+
+    Accepts plain numbers with thousands separators ("1,200", "18.0") and
+    fractions ("1/2", "1-1/2"), optionally followed by the attribute's own
+    unit in any spelling ("1/2 in", "1200 in-lbs"). Returns None for
+    anything else, such as ranges, other units or free text.
+    """
+    if value is None:
+        return None
+    match = VALUE_WITH_UNIT.fullmatch(str(value).replace(',', '').strip())
+    if not match:
+        return None
+    number_text, suffix = match.groups()
+    if suffix and (unit is None or normalize_unit(suffix) != normalize_unit(unit)):
+        return None
+    try:
+        number = _parse_number(number_text.strip())
+    except InvalidOperation:
+        return None
+    if number is None or abs(number) >= MAX_NUMERIC_VALUE:
+        return None
+    return number.quantize(NUMERIC_PLACES)
+
+
+# Display rules by lower-cased unit spelling
+CURRENCY_UNITS = {'$', 'usd', 'dollars', 'dollar'}
+VOLTAGE_UNITS = {'v', 'volt', 'volts', 'voltage'}
+WHOLE_NUMBER_UNITS = {
+    'mph', 'cfm', 'psi', 'w', 'watts', 'watt',
+    '°f', 'f', 'fahrenheit',
+    'lm', 'lumen', 'lumens',
+    'db', 'decibel', 'decibels',
+    'ipm', 'rpm', 'spm',
+    'in-lb', 'in-lbs', 'inch-pound', 'inch-pounds',
+}
+ONE_DECIMAL_UNITS = {
+    'ah', 'amp-hour', 'amp-hours', 'ampere-hour', 'ampere-hours',
+    'a', 'amp', 'amps', 'ampere', 'amperes', 'amperage',
+    'in', 'inch', 'inches',
+}
+DEGREE_UNITS = {'degrees', 'degree', 'deg', '°'}
+
+
+@lru_cache(maxsize=4096)
+def format_display_value(value, unit):
+    """
+    Format an attribute value for its unit. Returns ONLY the formatted
+    numeric value (without unit), or the value unchanged if it is not a
+    number or the unit has no rule.
+
+    Formatting rules:
+    - No decimals (whole numbers): MPH, CFM, PSI, W, °F, lm, dB, IPM, RPM, SPM, in-lb
+    - One decimal: Ah, A, in
+    - Float/as needed: degrees
+    - Conditional (threshold 100): V - 0 decimals if >= 100, 1 decimal if < 100
+    - Currency (2 decimals): USD, $
+    - No commas anywhere
+
+    Memoized on (value, unit): catalog values repeat across many components.
+    """
+    # Early returns
+    if value is None or value == "":
+        return value or ""
+    if not unit:
+        return value
+
+    unit_key = str(unit).strip().lower()
+
+    try:
+        # Plain numbers only; values carrying a unit or a fraction print as written
+        numeric_value = float(str(value).replace(',', '').replace(' ', '').strip())
+
+        # Currency - 2 decimals, no commas, include $ prefix
+        if unit_key in CURRENCY_UNITS:
+            return f"${numeric_value:.2f}"
+
+        # Voltage - conditional decimals (threshold 100)
+        if unit_key in VOLTAGE_UNITS:
+            decimals = 0 if abs(numeric_value) >= 100 else 1
+            return f"{numeric_value:.{decimals}f}"
+
+        if unit_key in WHOLE_NUMBER_UNITS:
+            return f"{int(numeric_value)}"
+
+        if unit_key in ONE_DECIMAL_UNITS:
+            return f"{numeric_value:.1f}"
+
+        # Float/as needed - degrees (display as-is, preserve original decimals)
+        if unit_key in DEGREE_UNITS:
+            if '.' in str(value):
+                return f"{numeric_value}"
+            return f"{int(numeric_value)}"
+
+        # Default: If unit exists but no rule matches, return with 1 decimal
+        return f"{numeric_value:.1f}"
+    except (ValueError, TypeError, OverflowError):
+        # Can't convert to number - return original value
+        return value
+
+
+def apply_attribute_fields(component_attribute, unit):
+    """Set numeric_value, unit and display_value on an unsaved ComponentAttributes from its value."""
+    component_attribute.numeric_value = parse_numeric_value(component_attribute.value, unit)
+    component_attribute.unit = normalize_unit(unit)
+    component_attribute.display_value = format_display_value(component_attribute.value, unit)
+
+
+def refresh_attribute_values(queryset=None, batch_size=1000):
+    """
+    Recompute numeric_value, unit and display_value for ComponentAttributes rows.
+
+    Args:
+        queryset: rows to refresh (default: every row)
+    Returns:
+        int: number of rows whose stored values changed
+    """
+    if queryset is None:
+        queryset = ComponentAttributes.objects.all()
+
+    fields = ['numeric_value', 'unit', 'display_value']
+    changed = []
+    for row in queryset.select_related('attribute').only(
+        'id', 'component_id', 'value', *fields, 'attribute__unit'
+    ).iterator(chunk_size=batch_size):
+        current = [getattr(row, field) for field in fields]
+        apply_attribute_fields(row, row.attribute.unit)
+        if current != [getattr(row, field) for field in fields]:
+            changed.append(row)
+
+    ComponentAttributes.objects.bulk_update(changed, fields, batch_size=batch_size)
+    if changed:
+        attribute_values_refreshed.send(
+            sender=ComponentAttributes, component_ids=list({row.component_id for row in changed})
+        )
+    return len(changed)
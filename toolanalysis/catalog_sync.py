@@ -0,0 +1,128 @@
+"""
+Maintenance of the denormalized CatalogEntries table.
+
+Each Product and Component has one CatalogEntries row holding the values the
+catalog sorts on (brand name, category/subcategory/itemtype sortorders, fair
+price), so catalog pages can sort through a single one-to-one join instead of three M2M joins and a DISTINCT.
+
+Rows are refreshed incrementally from the signal receivers in
+toolanalysis.signals; ``rebuild_catalog_entries`` recomputes everything and
+backs the ``rebuild_catalog_entries`` management command. Both send
+``catalog_entries_refreshed`` once per call.
+"""
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .models import CatalogEntries, Components, Products
+from .sync_signals import catalog_entries_refreshed
+
+ITEM_FIELDS = {
+    Products: 'product',
+    Components: 'component',
+}
+
+
+def extract_fair_price(fair_price_narrative):
+    """Return fair_price_narrative['fair_price'] as a Decimal, or None."""
+    if not isinstance(fair_price_narrative, dict):
+        return None
+    value = fair_price_narrative.get('fair_price')
+    if value is None or value == '':
+        return None
+    try:
+        return Decimal(str(value).replace('$', '').replace(',', '').strip()).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _min_sortorder(values):
+    sortorders = [value for value in values if value is not None]
+    return min(sortorders) if sortorders else CatalogEntries.SORTORDER_MISSING
+
+
+def _related_values(model_class, relation, column, item_ids):
+    """Return {item_id: [column values]} for one M2M relation of the items."""
+    field = model_class._meta.get_field(relation)
+    source = f'{field.m2m_field_name()}_id'
+    target = field.m2m_reverse_field_name()
+    rows = field.remote_field.through.objects.filter(**{f'{source}__in': item_ids}).values_list(
+        source, f'{target}__{column}'
+    )
+    values = defaultdict(list)
+    for item_id, value in rows:
+        values[item_id].append(value)
+    return values
+
+
+def build_entries(model_class, item_ids):
+    """Build unsaved CatalogEntries for the given items, in a fixed number of queries."""
+    item_field = ITEM_FIELDS[model_class]
+    only = ['id', 'name', 'sku', 'brand__name']
+    if model_class == Components:
+        only.append('fair_price_narrative')
+    items = model_class.objects.filter(id__in=item_ids).select_related('brand').only(*only)
+
+    categories = _related_values(model_class, 'categories', 'sortorder', item_ids)
+    subcategories = _related_values(model_class, 'subcategories', 'sortorder', item_ids)
+    itemtypes = _related_values(model_class, 'itemtypes', 'sortorder', item_ids)
+
+    entries = []
+    for item in items:
+        entries.append(CatalogEntries(**{
+            item_field: item,
+            'name': item.name,
+            'sku': item.sku,
+            'brand_name': item.brand.name if item.brand else None,
+            'category_sortorder': _min_sortorder(categories[item.id]),
+            'subcategory_sortorder': _min_sortorder(subcategories[item.id]),
+            'itemtype_sortorder': _min_sortorder(itemtypes[item.id]),
+            'fair_price': extract_fair_price(getattr(item, 'fair_price_narrative', None)),
+        }))
+    return entries
+
+
+def _replace_entries(model_class, item_ids):
+    item_field = ITEM_FIELDS[model_class]
+    entries = build_entries(model_class, item_ids)
+    CatalogEntries.objects.filter(**{f'{item_field}_id__in': item_ids}).delete()
+    CatalogEntries.objects.bulk_create(entries)
+    return len(entries)
+
+
+@transaction.atomic
+def refresh_catalog_entries(model_class, item_ids):
+    """Recompute the CatalogEntries rows of the given Products or Components."""
+    item_ids = list(set(item_ids))
+    if not item_ids:
+        return 0
+    count = _replace_entries(model_class, item_ids)
+    catalog_entries_refreshed.send(sender=model_class, item_ids=item_ids)
+    return count
+
+
+def refresh_entries_for_related(relation, value_ids):
+    """Refresh every item linked to the given brands/categories/subcategories/itemtypes."""
+    for model_class in ITEM_FIELDS:
+        if relation == 'brand':
+            lookup = {'brand_id__in': value_ids}
+        else:
+            lookup = {f'{relation}__id__in': value_ids}
+        item_ids = model_class.objects.filter(**lookup).values_list('id', flat=True).distinct()
+        refresh_catalog_entries(model_class, list(item_ids))
+
+
+def rebuild_catalog_entries(batch_size=500):
+    """Recompute every CatalogEntries row. Returns {'products': n, 'components': n}."""
+    stats = {}
+    for model_class, item_field in ITEM_FIELDS.items():
+        item_ids = list(model_class.objects.order_by('pk').values_list('id', flat=True))
+        count = 0
+        for start in range(0, len(item_ids), batch_size):
+            with transaction.atomic():
+                count += _replace_entries(model_class, item_ids[start:start + batch_size])
+        stats[f'{item_field}s'] = count
+        catalog_entries_refreshed.send(sender=model_class, item_ids=None)
+    CatalogEntries.objects.filter(product__isnull=True, component__isnull=True).delete()
+    return stats
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from toolanalysis.attribute_values import refresh_attribute_values
+
+
+class Command(BaseCommand):
+    help = 'Fill the numeric_value, unit and display_value columns of ComponentAttributes'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Backfilling attribute values...')
+        count = refresh_attribute_values()
+        self.stdout.write(self.style.SUCCESS(f"Updated {count} component attribute values"))
@@ -16,6 +16,11 @@ class Command(BaseCommand):
             action='store_true', 
             help='Show detailed output'
         )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Ignore the watermark and price every unpriced listing in the age window'
+        )
     
     def handle(self, *args, **options):
         dry_run = options['dry_run']
@@ -29,7 +34,9 @@ class Command(BaseCommand):
         self.stdout.write('Starting component pricing calculation...')
         
         try:
-            stats = update_all_component_pricing(dry_run=dry_run, verbose=verbose)
+            stats = update_all_component_pricing(
+                dry_run=dry_run, verbose=verbose, full=options['full'], log=self.stdout.write
+            )
             
             # Display summary
             self.stdout.write('\n' + '='*50)
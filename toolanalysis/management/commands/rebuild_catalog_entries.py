@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from toolanalysis.catalog_sync import rebuild_catalog_entries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized CatalogEntries table from Products and Components'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding catalog entries...')
+        stats = rebuild_catalog_entries()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {stats['products']} product and {stats['components']} component catalog entries"
+            )
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from toolanalysis.price_sync import rebuild_kit_deals, rebuild_latest_listings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the derived price tables (LatestPriceListings, ComponentKitDeals) from PriceListings'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding latest price listings...')
+        count = rebuild_latest_listings()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} latest price listings"))
+
+        self.stdout.write('Rebuilding component kit deals...')
+        count = rebuild_kit_deals()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} component kit deals"))
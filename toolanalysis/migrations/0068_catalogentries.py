@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:14
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toolanalysis', '0067_components_componentclass_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntries',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('name', models.TextField()),
+                ('sku', models.TextField(blank=True, null=True)),
+                ('brand_name', models.TextField(blank=True, null=True)),
+                ('category_sortorder', models.IntegerField(default=2147483647)),
+                ('subcategory_sortorder', models.IntegerField(default=2147483647)),
+                ('itemtype_sortorder', models.IntegerField(default=2147483647)),
+                ('voltage_ids', models.JSONField(blank=True, default=list)),
+                ('platform_ids', models.JSONField(blank=True, default=list)),
+                ('feature_ids', models.JSONField(blank=True, default=list)),
+                ('fair_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('component', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='catalog_entry', to='toolanalysis.components')),
+                ('product', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='catalog_entry', to='toolanalysis.products')),
+            ],
+            options={
+                'db_table': 'CatalogEntries',
+                'ordering': ['category_sortorder', 'subcategory_sortorder', 'itemtype_sortorder', 'name'],
+                'indexes': [models.Index(fields=['category_sortorder', 'subcategory_sortorder', 'itemtype_sortorder', 'name'], name='CatalogEntr_categor_c2b8af_idx'), models.Index(fields=['brand_name', 'name'], name='CatalogEntr_brand_n_b8f3ac_idx'), models.Index(fields=['fair_price', 'name'], name='CatalogEntr_fair_pr_c927a2_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:24
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def populate_latest_listings(apps, schema_editor):
+    # Same rows as toolanalysis.price_sync.rebuild_latest_listings, built from historical models
+    PriceListings = apps.get_model('toolanalysis', 'PriceListings')
+    LatestPriceListings = apps.get_model('toolanalysis', 'LatestPriceListings')
+    product_ids = list(
+        PriceListings.objects.filter(product__isnull=False)
+        .order_by('product_id').values_list('product_id', flat=True).distinct()
+    )
+    for start in range(0, len(product_ids), BATCH_SIZE):
+        latest = {}
+        for listing in PriceListings.objects.filter(
+            product_id__in=product_ids[start:start + BATCH_SIZE]
+        ).order_by('-datepulled', '-id'):
+            latest.setdefault((listing.product_id, listing.retailer_id), listing)
+        LatestPriceListings.objects.bulk_create([
+            LatestPriceListings(
+                product_id=listing.product_id,
+                retailer_id=listing.retailer_id,
+                pricelisting=listing,
+                price=listing.price,
+                datepulled=listing.datepulled,
+            )
+            for listing in latest.values()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toolanalysis', '0068_catalogentries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestPriceListings',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('datepulled', models.DateField()),
+                ('pricelisting', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='latest_entry', to='toolanalysis.pricelistings')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='latest_pricelistings', to='toolanalysis.products')),
+                ('retailer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='toolanalysis.retailers')),
+            ],
+            options={
+                'db_table': 'LatestPriceListings',
+                'ordering': ['product', '-datepulled'],
+                'indexes': [models.Index(fields=['product', '-datepulled'], name='LatestPrice_product_bd33ee_idx')],
+                'unique_together': {('product', 'retailer')},
+            },
+        ),
+        migrations.RunPython(populate_latest_listings, migrations.RunPython.noop),
+    ]
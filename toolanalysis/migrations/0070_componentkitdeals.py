@@ -0,0 +1,98 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:25
+
+import django.db.models.deletion
+import uuid
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+
+from toolanalysis.proration import (
+    apply_proration_weights, calculate_component_discounts, calculate_proration_weights
+)
+
+BATCH_SIZE = 500
+CENT = Decimal('0.01')
+
+
+def _cents(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP) if value is not None else None
+
+
+def populate_kit_deals(apps, schema_editor):
+    # Same rows as toolanalysis.price_sync.rebuild_kit_deals, built from historical models
+    # and the LatestPriceListings filled by 0069
+    ProductComponents = apps.get_model('toolanalysis', 'ProductComponents')
+    LatestPriceListings = apps.get_model('toolanalysis', 'LatestPriceListings')
+    ComponentKitDeals = apps.get_model('toolanalysis', 'ComponentKitDeals')
+    product_ids = list(
+        LatestPriceListings.objects.order_by('product_id').values_list('product_id', flat=True).distinct()
+    )
+    for start in range(0, len(product_ids), BATCH_SIZE):
+        lines_by_product = defaultdict(list)
+        for line in ProductComponents.objects.filter(
+            product_id__in=product_ids[start:start + BATCH_SIZE], component__isnull=False
+        ).values_list('product_id', 'id', 'component_id', 'quantity', 'component__standalone_price'):
+            lines_by_product[line[0]].append(line)
+
+        deals = []
+        weights_by_product = {}
+        for row in LatestPriceListings.objects.filter(product_id__in=list(lines_by_product)):
+            lines = lines_by_product[row.product_id]
+            if row.product_id not in weights_by_product:
+                weights_by_product[row.product_id] = calculate_proration_weights(
+                    (component_id, quantity, standalone_price)
+                    for _, _, component_id, quantity, standalone_price in lines
+                )
+            prorated = apply_proration_weights(weights_by_product[row.product_id], row.price)
+            for _, product_component_id, component_id, _, list_price in lines:
+                effective_price = prorated[component_id]['effective_price']
+                discounts = calculate_component_discounts(None, list_price, effective_price)
+                deals.append(ComponentKitDeals(
+                    component_id=component_id,
+                    product_id=row.product_id,
+                    product_component_id=product_component_id,
+                    pricelisting_id=row.pricelisting_id,
+                    retailer_id=row.retailer_id,
+                    effective_price=_cents(effective_price),
+                    list_price=list_price,
+                    dollar_discount=_cents(discounts['dollar_discount']),
+                    percentage_discount=_cents(discounts['percentage_discount']),
+                    has_discount=discounts['has_discount'],
+                    datepulled=row.datepulled,
+                ))
+        ComponentKitDeals.objects.bulk_create(deals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toolanalysis', '0069_latestpricelistings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComponentKitDeals',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('effective_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('list_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('dollar_discount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('percentage_discount', models.DecimalField(blank=True, decimal_places=2, max_digits=7, null=True)),
+                ('has_discount', models.BooleanField(default=False)),
+                ('datepulled', models.DateField()),
+                ('component', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kit_deals', to='toolanalysis.components')),
+                ('pricelisting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='component_kit_deals', to='toolanalysis.pricelistings')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='component_kit_deals', to='toolanalysis.products')),
+                ('product_component', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kit_deals', to='toolanalysis.productcomponents')),
+                ('retailer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='toolanalysis.retailers')),
+            ],
+            options={
+                'db_table': 'ComponentKitDeals',
+                'ordering': ['component', 'effective_price'],
+                'indexes': [models.Index(fields=['component', 'effective_price'], name='ComponentKi_compone_569cfc_idx'), models.Index(fields=['component', 'retailer', 'effective_price'], name='ComponentKi_compone_a93aba_idx')],
+                'unique_together': {('component', 'pricelisting')},
+            },
+        ),
+        migrations.RunPython(populate_kit_deals, migrations.RunPython.noop),
+    ]
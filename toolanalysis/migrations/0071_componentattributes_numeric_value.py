@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toolanalysis', '0070_componentkitdeals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='componentattributes',
+            name='numeric_value',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True),
+        ),
+        migrations.AddField(
+            model_name='componentattributes',
+            name='unit',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='componentattributes',
+            index=models.Index(fields=['attribute', 'numeric_value'], name='ComponentAt_attribu_0212b3_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toolanalysis', '0071_componentattributes_numeric_value'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='componentattributes',
+            name='display_value',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
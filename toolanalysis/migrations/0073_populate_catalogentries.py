@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+from toolanalysis.catalog_sync import extract_fair_price
+
+SORTORDER_MISSING = 2147483647
+BATCH_SIZE = 500
+
+
+def _related_values(model_class, relation, column, item_ids):
+    field = model_class._meta.get_field(relation)
+    source = f'{field.m2m_field_name()}_id'
+    target = field.m2m_reverse_field_name()
+    rows = field.remote_field.through.objects.filter(**{f'{source}__in': item_ids}).values_list(
+        source, f'{target}__{column}'
+    )
+    values = defaultdict(list)
+    for item_id, value in rows:
+        values[item_id].append(value)
+    return values
+
+
+def _min_sortorder(values):
+    sortorders = [value for value in values if value is not None]
+    return min(sortorders) if sortorders else SORTORDER_MISSING
+
+
+def populate_catalog_entries(apps, schema_editor):
+    # Same rows as toolanalysis.catalog_sync.rebuild_catalog_entries, built from historical models
+    CatalogEntries = apps.get_model('toolanalysis', 'CatalogEntries')
+    for model_name, item_field in (('Products', 'product'), ('Components', 'component')):
+        model_class = apps.get_model('toolanalysis', model_name)
+        existing = CatalogEntries.objects.filter(**{f'{item_field}__isnull': False}).values(f'{item_field}_id')
+        item_ids = list(model_class.objects.exclude(id__in=existing).order_by('pk').values_list('id', flat=True))
+        for start in range(0, len(item_ids), BATCH_SIZE):
+            batch = item_ids[start:start + BATCH_SIZE]
+            categories = _related_values(model_class, 'categories', 'sortorder', batch)
+            subcategories = _related_values(model_class, 'subcategories', 'sortorder', batch)
+            itemtypes = _related_values(model_class, 'itemtypes', 'sortorder', batch)
+            CatalogEntries.objects.bulk_create([
+                CatalogEntries(**{
+                    item_field: item,
+                    'name': item.name,
+                    'sku': item.sku,
+                    'brand_name': item.brand.name if item.brand else None,
+                    'category_sortorder': _min_sortorder(categories[item.id]),
+                    'subcategory_sortorder': _min_sortorder(subcategories[item.id]),
+                    'itemtype_sortorder': _min_sortorder(itemtypes[item.id]),
+                    'fair_price': extract_fair_price(getattr(item, 'fair_price_narrative', None)),
+                })
+                for item in model_class.objects.filter(id__in=batch).select_related('brand')
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toolanalysis', '0072_componentattributes_display_value'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_catalog_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:53
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toolanalysis', '0073_populate_catalogentries'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='catalogentries',
+            name='feature_ids',
+        ),
+        migrations.RemoveField(
+            model_name='catalogentries',
+            name='platform_ids',
+        ),
+        migrations.RemoveField(
+            model_name='catalogentries',
+            name='voltage_ids',
+        ),
+    ]
@@ -186,10 +186,17 @@ class ComponentAttributes(models.Model):
     component = models.ForeignKey('Components', on_delete=models.CASCADE)
     attribute = models.ForeignKey('Attributes', on_delete=models.CASCADE)
     value = models.TextField(blank=True, null=True)
+    # Derived from value and the attribute's unit, maintained by toolanalysis.attribute_values
+    numeric_value = models.DecimalField(max_digits=18, decimal_places=6, blank=True, null=True)
+    unit = models.TextField(blank=True, null=True)
+    display_value = models.TextField(blank=True, null=True)
     class Meta:
         db_table = 'ComponentAttributes'
         ordering = ['component', 'attribute']
         unique_together = ('component', 'attribute', 'value')
+        indexes = [
+            models.Index(fields=['attribute', 'numeric_value']),
+        ]
 
 class ProductAccessories(models.Model):
     id = models.UUIDField(default=uuid.uuid4, primary_key=True)
@@ -286,3 +293,66 @@ class ComponentClasses(models.Model):
     class Meta:
         db_table = 'ComponentClasses'
         ordering = ['sortorder', 'name']
+
+class CatalogEntries(models.Model):
+    """Denormalized catalog row per Product/Component, maintained by toolanalysis.catalog_sync"""
+    SORTORDER_MISSING = 2147483647
+
+    id = models.UUIDField(default=uuid.uuid4, primary_key=True)
+    product = models.OneToOneField('Products', on_delete=models.CASCADE, null=True, blank=True, related_name='catalog_entry')
+    component = models.OneToOneField('Components', on_delete=models.CASCADE, null=True, blank=True, related_name='catalog_entry')
+    name = models.TextField()
+    sku = models.TextField(blank=True, null=True)
+    brand_name = models.TextField(blank=True, null=True)
+    category_sortorder = models.IntegerField(default=SORTORDER_MISSING)
+    subcategory_sortorder = models.IntegerField(default=SORTORDER_MISSING)
+    itemtype_sortorder = models.IntegerField(default=SORTORDER_MISSING)
+    fair_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    class Meta:
+        db_table = 'CatalogEntries'
+        ordering = ['category_sortorder', 'subcategory_sortorder', 'itemtype_sortorder', 'name']
+        indexes = [
+            models.Index(fields=['category_sortorder', 'subcategory_sortorder', 'itemtype_sortorder', 'name']),
+            models.Index(fields=['brand_name', 'name']),
+            models.Index(fields=['fair_price', 'name']),
+        ]
+
+class LatestPriceListings(models.Model):
+    """Most recent PriceListing per (product, retailer), maintained by toolanalysis.price_sync"""
+    id = models.UUIDField(default=uuid.uuid4, primary_key=True)
+    product = models.ForeignKey('Products', on_delete=models.CASCADE, related_name='latest_pricelistings')
+    retailer = models.ForeignKey('Retailers', on_delete=models.CASCADE, null=True, blank=True)
+    pricelisting = models.OneToOneField('PriceListings', on_delete=models.CASCADE, related_name='latest_entry')
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    datepulled = models.DateField()
+    class Meta:
+        db_table = 'LatestPriceListings'
+        ordering = ['product', '-datepulled']
+        unique_together = ('product', 'retailer')
+        indexes = [
+            models.Index(fields=['product', '-datepulled']),
+        ]
+
+class ComponentKitDeals(models.Model):
+    """Prorated price of a component in each current kit listing, maintained by toolanalysis.price_sync"""
+    id = models.UUIDField(default=uuid.uuid4, primary_key=True)
+    component = models.ForeignKey('Components', on_delete=models.CASCADE, related_name='kit_deals')
+    product = models.ForeignKey('Products', on_delete=models.CASCADE, related_name='component_kit_deals')
+    product_component = models.ForeignKey('ProductComponents', on_delete=models.CASCADE, related_name='kit_deals')
+    pricelisting = models.ForeignKey('PriceListings', on_delete=models.CASCADE, related_name='component_kit_deals')
+    retailer = models.ForeignKey('Retailers', on_delete=models.CASCADE, null=True, blank=True)
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2)
+    list_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    dollar_discount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    percentage_discount = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    has_discount = models.BooleanField(default=False)
+    datepulled = models.DateField()
+    class Meta:
+        db_table = 'ComponentKitDeals'
+        ordering = ['component', 'effective_price']
+        unique_together = ('component', 'pricelisting')
+        indexes = [
+            models.Index(fields=['component', 'effective_price']),
+            models.Index(fields=['component', 'retailer', 'effective_price']),
+        ]
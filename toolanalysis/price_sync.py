@@ -0,0 +1,203 @@
+"""
+Maintenance of the derived price tables.
+
+LatestPriceListings keeps the most recent PriceListing of every (product,
+retailer) pair, so pages that show current prices read them with one
+indexed lookup instead of scanning and deduplicating recent listings.
+
+ComponentKitDeals holds, for every component, its prorated price and
+discount in each of those latest kit listings, so the price finder and the
+deal decoder filter and sort kit deals in SQL instead of prorating every
+kit on each request. Deals of a product are recomputed whenever its latest
+listings, its ProductComponents or a component's standalone price change.
+
+Rows are refreshed from the signal receivers in toolanalysis.signals. Bulk
+imports and bulk updates bypass signals; run ``rebuild_price_tables``
+afterwards. Every refresh or rebuild sends ``latest_listings_refreshed`` or
+``kit_deals_refreshed`` (toolanalysis.sync_signals) once, so caches built
+from these rows can be dropped.
+"""
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import ComponentKitDeals, LatestPriceListings, PriceListings, ProductComponents
+from .proration import apply_proration_weights, calculate_component_discounts, calculate_proration_weights
+from .sync_signals import kit_deals_refreshed, latest_listings_refreshed
+
+CENT = Decimal('0.01')
+
+
+def _cents(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP) if value is not None else None
+
+
+def _latest_by_pair(listings):
+    """Pick the latest listing per (product, retailer) from rows ordered newest first."""
+    latest = {}
+    for listing in listings:
+        latest.setdefault((listing.product_id, listing.retailer_id), listing)
+    return latest
+
+
+@transaction.atomic
+def refresh_latest_listings(pairs):
+    """
+    Recompute the LatestPriceListings rows of the given (product_id, retailer_id) pairs.
+
+    When a listing moves to another product or retailer, pass its old pair
+    as well so the row pointing at it is replaced.
+    """
+    pairs = {(product_id, retailer_id) for product_id, retailer_id in pairs if product_id is not None}
+    if not pairs:
+        return 0
+
+    retailers_by_product = defaultdict(set)
+    for product_id, retailer_id in pairs:
+        retailers_by_product[product_id].add(retailer_id)
+    retailer_ids = {retailer_id for _, retailer_id in pairs}
+    retailer_filter = Q(retailer_id__in=retailer_ids - {None})
+    if None in retailer_ids:
+        retailer_filter |= Q(retailer__isnull=True)
+    # Only the newest row of each candidate pair leaves the database
+    listings = PriceListings.objects.filter(
+        retailer_filter, product_id__in=list(retailers_by_product)
+    ).annotate(pair_rank=Window(
+        RowNumber(),
+        partition_by=[F('product_id'), F('retailer_id')],
+        order_by=[F('datepulled').desc(), F('id').desc()],
+    )).filter(pair_rank=1)
+    latest = {
+        pair: listing for pair, listing in _latest_by_pair(listings).items()
+        if pair in pairs
+    }
+
+    for product_id, retailer_ids in retailers_by_product.items():
+        LatestPriceListings.objects.filter(product_id=product_id, retailer_id__in=retailer_ids - {None}).delete()
+        if None in retailer_ids:
+            LatestPriceListings.objects.filter(product_id=product_id, retailer__isnull=True).delete()
+
+    LatestPriceListings.objects.bulk_create([
+        LatestPriceListings(
+            product_id=listing.product_id,
+            retailer_id=listing.retailer_id,
+            pricelisting=listing,
+            price=listing.price,
+            datepulled=listing.datepulled,
+        )
+        for listing in latest.values()
+    ])
+    latest_listings_refreshed.send(sender=LatestPriceListings, product_ids=list(retailers_by_product))
+    refresh_kit_deals(retailers_by_product)
+    return len(latest)
+
+
+def rebuild_latest_listings(batch_size=500):
+    """Recompute every LatestPriceListings row. Returns the number of rows."""
+    product_ids = list(
+        PriceListings.objects.filter(product__isnull=False)
+        .order_by('product_id').values_list('product_id', flat=True).distinct()
+    )
+    count = 0
+    with transaction.atomic():
+        LatestPriceListings.objects.all().delete()
+        for start in range(0, len(product_ids), batch_size):
+            listings = PriceListings.objects.filter(
+                product_id__in=product_ids[start:start + batch_size]
+            ).order_by('-datepulled', '-id')
+            rows = [
+                LatestPriceListings(
+                    product_id=listing.product_id,
+                    retailer_id=listing.retailer_id,
+                    pricelisting=listing,
+                    price=listing.price,
+                    datepulled=listing.datepulled,
+                )
+                for listing in _latest_by_pair(listings).values()
+            ]
+            LatestPriceListings.objects.bulk_create(rows)
+            count += len(rows)
+    latest_listings_refreshed.send(sender=LatestPriceListings, product_ids=None)
+    return count
+
+
+def build_kit_deals(product_ids):
+    """Build unsaved ComponentKitDeals for the given products' latest listings."""
+    lines_by_product = defaultdict(list)
+    for line in ProductComponents.objects.filter(
+        product_id__in=product_ids, component__isnull=False
+    ).values_list('product_id', 'id', 'component_id', 'quantity', 'component__standalone_price'):
+        lines_by_product[line[0]].append(line)
+
+    latest_rows = LatestPriceListings.objects.filter(product_id__in=list(lines_by_product))
+
+    deals = []
+    weights_by_product = {}
+    for row in latest_rows:
+        lines = lines_by_product[row.product_id]
+        if row.product_id not in weights_by_product:
+            weights_by_product[row.product_id] = calculate_proration_weights(
+                (component_id, quantity, standalone_price)
+                for _, _, component_id, quantity, standalone_price in lines
+            )
+        prorated = apply_proration_weights(weights_by_product[row.product_id], row.price)
+
+        for _, product_component_id, component_id, _, list_price in lines:
+            effective_price = prorated[component_id]['effective_price']
+            discounts = calculate_component_discounts(None, list_price, effective_price)
+            deals.append(ComponentKitDeals(
+                component_id=component_id,
+                product_id=row.product_id,
+                product_component_id=product_component_id,
+                pricelisting_id=row.pricelisting_id,
+                retailer_id=row.retailer_id,
+                effective_price=_cents(effective_price),
+                list_price=list_price,
+                dollar_discount=_cents(discounts['dollar_discount']),
+                percentage_discount=_cents(discounts['percentage_discount']),
+                has_discount=discounts['has_discount'],
+                datepulled=row.datepulled,
+            ))
+    return deals
+
+
+@transaction.atomic
+def refresh_kit_deals(product_ids):
+    """Recompute the ComponentKitDeals rows of the given products."""
+    product_ids = list({product_id for product_id in product_ids if product_id is not None})
+    if not product_ids:
+        return 0
+    deals = build_kit_deals(product_ids)
+    stale = ComponentKitDeals.objects.filter(product_id__in=product_ids)
+    component_ids = set(stale.values_list('component_id', flat=True)) | {deal.component_id for deal in deals}
+    stale.delete()
+    ComponentKitDeals.objects.bulk_create(deals)
+    kit_deals_refreshed.send(sender=ComponentKitDeals, product_ids=product_ids, component_ids=component_ids)
+    return len(deals)
+
+
+def refresh_kit_deals_for_components(component_ids):
+    """Recompute the deals of every product containing the given components."""
+    product_ids = ProductComponents.objects.filter(
+        component_id__in=list(component_ids), product__isnull=False
+    ).values_list('product_id', flat=True).distinct()
+    return refresh_kit_deals(list(product_ids))
+
+
+def rebuild_kit_deals(batch_size=500):
+    """Recompute every ComponentKitDeals row. Returns the number of rows."""
+    product_ids = list(
+        LatestPriceListings.objects.order_by('product_id').values_list('product_id', flat=True).distinct()
+    )
+    count = 0
+    with transaction.atomic():
+        ComponentKitDeals.objects.all().delete()
+        for start in range(0, len(product_ids), batch_size):
+            deals = build_kit_deals(product_ids[start:start + batch_size])
+            ComponentKitDeals.objects.bulk_create(deals)
+            count += len(deals)
+    kit_deals_refreshed.send(sender=ComponentKitDeals, product_ids=None, component_ids=None)
+    return count
@@ -0,0 +1,255 @@
+"""
+Incremental component pricing pipeline behind ``calculate_component_pricing``.
+
+Each run records ComponentPricingHistory rows for the PriceListings that
+arrived since the previous run:
+
+* ``standalone``: listings of products that are a single component
+  (quantity 1). The component's ``standalone_price`` is set to the lowest
+  current listing of such products.
+* ``prorated``: listings of bundles, prorated onto every component with the
+  same weighting the site uses (``toolanalysis.proration.bulk_prorate``).
+* ``manual``: prices from ``manual_prices.json``. Components with a manual
+  price never get their ``standalone_price`` overwritten.
+
+The watermark is the newest ``datepulled`` among listings already referenced
+by ComponentPricingHistory. Listings from that day onward that are not yet
+referenced are processed, so nothing new is skipped and nothing is recorded
+twice.
+"""
+import json
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from .models import ComponentPricingHistory, Components, LatestPriceListings, PriceListings, ProductComponents
+from .price_sync import refresh_kit_deals_for_components
+from .proration import bulk_prorate
+from .sync_signals import standalone_prices_updated
+
+LISTING_MAX_AGE_DAYS = 60
+BATCH_SIZE = 1000
+
+
+def manual_prices_path():
+    return Path(getattr(settings, 'MANUAL_PRICES_FILE', Path(settings.BASE_DIR) / 'manual_prices.json'))
+
+
+def load_manual_prices(path=None):
+    """
+    Read manual overrides: a JSON list of {"component_id": ..., "price": ...}.
+
+    Returns:
+        tuple: ({component_id: Decimal price}, [error messages])
+    """
+    path = Path(path) if path else manual_prices_path()
+    if not path.exists():
+        return {}, []
+    prices, errors = {}, []
+    try:
+        entries = json.loads(path.read_text() or '[]')
+    except ValueError as e:
+        return {}, [f'Could not read {path.name}: {e}']
+    for entry in entries:
+        try:
+            prices[str(uuid.UUID(str(entry['component_id'])))] = Decimal(str(entry['price'])).quantize(Decimal('0.01'))
+        except (KeyError, TypeError, ValueError, InvalidOperation) as e:
+            errors.append(f'Invalid manual price entry {entry!r}: {e}')
+    return prices, errors
+
+
+def get_watermark():
+    """Return the newest datepulled already priced, or None before the first run."""
+    return ComponentPricingHistory.objects.aggregate(
+        watermark=Max('source_pricelisting__datepulled')
+    )['watermark']
+
+
+def get_new_listings(full=False):
+    """
+    Return the PriceListings to price in this run.
+
+    Incremental runs take listings pulled on or after the watermark; the
+    first run and ``full`` runs take every listing within the listing age
+    window. Listings already referenced by a history row are never taken
+    twice.
+    """
+    watermark = None if full else get_watermark()
+    since = watermark or timezone.now().date() - timedelta(days=LISTING_MAX_AGE_DAYS)
+    priced = ComponentPricingHistory.objects.filter(
+        source_pricelisting__datepulled__gte=since
+    ).values('source_pricelisting_id')
+    listings = PriceListings.objects.filter(
+        product__isnull=False, datepulled__gte=since
+    ).exclude(id__in=priced)
+    return list(listings.order_by('datepulled'))
+
+
+def _lowest_current_prices(product_ids):
+    """Return {product_id: lowest latest-per-retailer price} within the age window."""
+    cutoff_date = timezone.now().date() - timedelta(days=LISTING_MAX_AGE_DAYS)
+    rows = LatestPriceListings.objects.filter(
+        product_id__in=list(product_ids), datepulled__gte=cutoff_date
+    ).values('product_id').annotate(lowest=Min('price')).values_list('product_id', 'lowest')
+    return dict(rows)
+
+
+def _standalone_products(component_ids):
+    """Return {component_id: {product_id}} of products that are just that component."""
+    single_line_products = (
+        ProductComponents.objects.values('product_id')
+        .annotate(lines=Count('id')).filter(lines=1).values('product_id')
+    )
+    rows = ProductComponents.objects.filter(
+        component_id__in=list(component_ids), quantity=1, product_id__in=single_line_products
+    ).values_list('component_id', 'product_id')
+
+    products = defaultdict(set)
+    for component_id, product_id in rows:
+        products[component_id].add(product_id)
+    return products
+
+
+def _apply_manual_prices(stats, history, updated):
+    """Record changed manual prices and return the ids of manually priced components."""
+    manual_prices, errors = load_manual_prices()
+    stats['errors'].extend(errors)
+
+    components = Components.objects.in_bulk(list(manual_prices)) if manual_prices else {}
+    known = {str(component_id) for component_id in components}
+    for component_id in manual_prices:
+        if component_id not in known:
+            stats['errors'].append(f'Manual price for unknown component {component_id}')
+
+    latest_manual = dict(
+        ComponentPricingHistory.objects.filter(source_type='manual', component_id__in=list(components))
+        .order_by('calculation_date').values_list('component_id', 'price')
+    )
+    for component_id, component in components.items():
+        price = manual_prices[str(component_id)]
+        if latest_manual.get(component_id) != price:
+            history.append(ComponentPricingHistory(
+                component=component, price=price, source_type='manual',
+                metadata={'source': manual_prices_path().name},
+            ))
+        if component.standalone_price != price:
+            component.standalone_price = price
+            updated[component_id] = component
+            stats['standalone_updated'] += 1
+
+    return set(components) | set(
+        ComponentPricingHistory.objects.filter(source_type='manual').values_list('component_id', flat=True)
+    )
+
+
+def update_all_component_pricing(dry_run=False, verbose=False, full=False, log=print):
+    """
+    Price every component affected by new listings.
+
+    Returns:
+        dict: standalone_updated, prorated_updated, skipped, products_processed, errors
+    """
+    stats = {
+        'standalone_updated': 0,
+        'prorated_updated': 0,
+        'skipped': 0,
+        'products_processed': 0,
+        'errors': [],
+    }
+    history = []
+    updated = {}
+
+    manual_ids = _apply_manual_prices(stats, history, updated)
+
+    # New listings and the components of their products
+    listings = get_new_listings(full=full)
+    lines_by_product = defaultdict(list)
+    for line in ProductComponents.objects.filter(
+        product_id__in={listing.product_id for listing in listings}, component__isnull=False
+    ).values_list('product_id', 'component_id', 'quantity', 'component__standalone_price'):
+        lines_by_product[line[0]].append(line)
+    stats['products_processed'] = len(lines_by_product)
+    if verbose:
+        log(f'{len(listings)} new listings across {len(lines_by_product)} products')
+
+    standalone_component = {
+        product_id: lines[0][1]
+        for product_id, lines in lines_by_product.items()
+        if len(lines) == 1 and lines[0][2] == 1
+    }
+    bundle_listings = []
+    for listing in listings:
+        retailer_id = str(listing.retailer_id) if listing.retailer_id else None
+        component_id = standalone_component.get(listing.product_id)
+        if component_id is not None:
+            history.append(ComponentPricingHistory(
+                component_id=component_id, price=listing.price, source_type='standalone',
+                source_product_id=listing.product_id, source_pricelisting=listing,
+                metadata={'retailer_id': retailer_id},
+            ))
+        elif listing.product_id in lines_by_product:
+            bundle_listings.append(listing)
+
+    # Standalone products: refresh standalone_price from the lowest current listing
+    affected = {standalone_component[listing.product_id] for listing in listings
+                if listing.product_id in standalone_component}
+    standalone_products = _standalone_products(affected)
+    lowest = _lowest_current_prices(set().union(*standalone_products.values()))
+    for component_id, component in Components.objects.in_bulk(list(affected)).items():
+        if component_id in manual_ids:
+            stats['skipped'] += 1
+            continue
+        prices = [lowest[product_id] for product_id in standalone_products[component_id] if product_id in lowest]
+        if prices and component.standalone_price != min(prices):
+            component.standalone_price = min(prices)
+            updated[component_id] = component
+            stats['standalone_updated'] += 1
+            if verbose:
+                log(f'  standalone {component.name}: {component.standalone_price}')
+
+    # Bundles: prorate every new listing onto its components
+    # Weights use the standalone prices as updated above
+    bundle_lines = []
+    for bundle_id in {listing.product_id for listing in bundle_listings}:
+        for product_id, component_id, quantity, standalone_price in lines_by_product[bundle_id]:
+            if component_id in updated:
+                standalone_price = updated[component_id].standalone_price
+            bundle_lines.append((product_id, component_id, quantity, standalone_price))
+    quantities = {(line[0], line[1]): line[2] for line in bundle_lines}
+    listings_by_id = {listing.id: listing for listing in bundle_listings}
+    prorated = bulk_prorate(
+        bundle_lines, [(listing.product_id, listing.id, listing.price) for listing in bundle_listings]
+    )
+    for (listing_id, component_id), price in prorated.items():
+        listing = listings_by_id[listing_id]
+        history.append(ComponentPricingHistory(
+            component_id=component_id, price=price, source_type='prorated',
+            source_product_id=listing.product_id, source_pricelisting=listing,
+            metadata={
+                'retailer_id': str(listing.retailer_id) if listing.retailer_id else None,
+                'quantity': quantities[(listing.product_id, component_id)],
+                'bundle_price': str(listing.price),
+            },
+        ))
+        stats['prorated_updated'] += 1
+    if verbose:
+        log(f'{stats["prorated_updated"]} prorated prices from {len(bundle_listings)} bundle listings')
+
+    if dry_run:
+        return stats
+
+    with transaction.atomic():
+        ComponentPricingHistory.objects.bulk_create(history, batch_size=BATCH_SIZE)
+        Components.objects.bulk_update(list(updated.values()), ['standalone_price'], batch_size=BATCH_SIZE)
+        # bulk_update skips the signals that keep kit deals and product pages in sync
+        refresh_kit_deals_for_components(list(updated))
+        if updated:
+            standalone_prices_updated.send(sender=Components, component_ids=list(updated))
+    return stats
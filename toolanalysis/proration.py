@@ -0,0 +1,277 @@
+"""
+Proration of bundle prices onto their components.
+
+A bundle's listing price is split over its components in proportion to
+their standalone value (standalone_price x quantity); components without a
+standalone price share whatever weight is left. These are the prices the
+site shows as a component's "effective price" in a kit, the pricing
+pipeline records as ``prorated`` history and ComponentKitDeals stores.
+"""
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+CENT = Decimal('0.01')
+
+
+def calculate_proration_weights(lines):
+    """
+    Calculate proration weights for the components of one bundle.
+    
+    Algorithm:
+    1. Calculate total "value" weight: Sum of (component.standalone_price × quantity) 
+       for all components with standalone_price
+    2. For components with standalone_price: weight = (standalone_price × quantity) / total_weight
+    3. For components without standalone_price: equal share of remaining weight
+    
+    Weights only depend on the bundle contents, so they can be computed once
+    and reused for every listing price of the bundle.
+    
+    Args:
+        lines: iterable of (component_id, quantity, standalone_price or None)
+    
+    Returns:
+        dict: {component_id: {'weight': Decimal, 'quantity': int}}
+    """
+    total_weight = Decimal('0')
+    component_data = {}
+    
+    for component_id, quantity, standalone_price in lines:
+        if standalone_price is not None:
+            weighted_value = standalone_price * Decimal(quantity)
+            total_weight += weighted_value
+            component_data[component_id] = {
+                'has_price': True,
+                'weighted_value': weighted_value,
+                'quantity': quantity,
+            }
+        else:
+            component_data[component_id] = {
+                'has_price': False,
+                'weighted_value': Decimal('0'),
+                'quantity': quantity,
+            }
+    
+    components_without_price = [
+        comp_id for comp_id, data in component_data.items()
+        if not data['has_price']
+    ]
+    
+    # Allocate weights
+    if total_weight > 0:
+        # Components with price get weight proportional to their value
+        # These weights will sum to 1.0 if all components have prices
+        used_weight = Decimal('0')
+        for comp_id, data in component_data.items():
+            if data['has_price']:
+                weight = data['weighted_value'] / total_weight
+                component_data[comp_id]['weight'] = weight
+                used_weight += weight
+        
+        # If there are components without price, they share the remaining weight equally
+        if components_without_price:
+            remaining_weight = Decimal('1') - used_weight
+            if remaining_weight > 0:
+                weight_per_component = remaining_weight / Decimal(len(components_without_price))
+                for comp_id in components_without_price:
+                    component_data[comp_id]['weight'] = weight_per_component
+    else:
+        # No components have standalone_price - equal distribution
+        weight_per_component = Decimal('1') / Decimal(len(component_data)) if component_data else Decimal('0')
+        for comp_id in component_data:
+            component_data[comp_id]['weight'] = weight_per_component
+    
+    return {
+        comp_id: {'weight': data.get('weight', Decimal('0')), 'quantity': data['quantity']}
+        for comp_id, data in component_data.items()
+    }
+
+
+def apply_proration_weights(weights, product_price):
+    """
+    Effective component price = product_price × weight / quantity.
+    
+    Args:
+        weights: result of calculate_proration_weights
+        product_price: Decimal price of the bundle
+    
+    Returns:
+        dict: {component_id: {'effective_price': Decimal, 'weight': Decimal, 'quantity': int}}
+    """
+    result = {}
+    for comp_id, data in weights.items():
+        weight = data['weight']
+        quantity = data['quantity']
+        
+        if quantity > 0 and weight > 0:
+            effective_price = (product_price * weight) / Decimal(quantity)
+        else:
+            effective_price = Decimal('0')
+        
+        result[comp_id] = {
+            'effective_price': effective_price,
+            'weight': weight,
+            'quantity': quantity,
+        }
+    
+    return result
+
+
+def bulk_prorate(lines, listings, use_numpy=True):
+    """
+    Prorate many listing prices onto their bundle components at once.
+    
+    Same weighting as calculate_proration_weights/apply_proration_weights,
+    rounded to the cent. By default the weights and effective prices are
+    computed with grouped NumPy array operations; results that land within
+    float error of a half cent are recomputed with Decimal so both backends
+    agree to the cent.
+    
+    Args:
+        lines: iterable of (product_id, component_id, quantity, standalone_price or None)
+        listings: iterable of (product_id, listing_key, price)
+        use_numpy: use the NumPy backend (False computes every price with Decimal)
+    
+    Returns:
+        dict: {(listing_key, component_id): Decimal effective price}
+    """
+    lines = list(lines)
+    listings = list(listings)
+    if use_numpy and lines and listings:
+        return _bulk_prorate_numpy(lines, listings)
+    return _bulk_prorate_decimal(lines, listings)
+
+
+def _bulk_prorate_decimal(lines, listings):
+    lines_by_product = defaultdict(list)
+    for product_id, component_id, quantity, standalone_price in lines:
+        lines_by_product[product_id].append((component_id, quantity, standalone_price))
+    weights_by_product = {
+        product_id: calculate_proration_weights(product_lines)
+        for product_id, product_lines in lines_by_product.items()
+    }
+    
+    result = {}
+    for product_id, listing_key, price in listings:
+        prorated = apply_proration_weights(weights_by_product.get(product_id, {}), Decimal(price))
+        for component_id, data in prorated.items():
+            result[(listing_key, component_id)] = data['effective_price'].quantize(CENT, rounding=ROUND_HALF_UP)
+    return result
+
+
+def _bulk_prorate_numpy(lines, listings):
+    # Group lines by product so each product's lines are contiguous
+    product_index = {}
+    for line in lines:
+        product_index.setdefault(line[0], len(product_index))
+    lines = sorted(lines, key=lambda line: product_index[line[0]])
+    product_count = len(product_index)
+    
+    line_product = np.fromiter((product_index[line[0]] for line in lines), dtype=np.int64, count=len(lines))
+    quantity = np.array([line[2] for line in lines], dtype=np.float64)
+    standalone = np.array([np.nan if line[3] is None else float(line[3]) for line in lines], dtype=np.float64)
+    has_price = ~np.isnan(standalone)
+    
+    # Weights per line (calculate_proration_weights)
+    weighted_value = np.where(has_price, standalone * quantity, 0.0)
+    total_weight = np.bincount(line_product, weights=weighted_value, minlength=product_count)
+    line_count = np.bincount(line_product, minlength=product_count)
+    line_total = total_weight[line_product]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(
+            line_total > 0,
+            # Priced lines use up the whole weight; unpriced lines get nothing
+            np.where(has_price, weighted_value / line_total, 0.0),
+            1.0 / line_count[line_product],
+        )
+    
+    # Pair every listing with the lines of its product
+    known = [listing for listing in listings if listing[0] in product_index]
+    if not known:
+        return {}
+    listing_product = np.fromiter((product_index[listing[0]] for listing in known), dtype=np.int64, count=len(known))
+    listing_price = np.array([float(listing[2]) for listing in known], dtype=np.float64)
+    first_line = np.concatenate(([0], np.cumsum(line_count)[:-1]))
+    pair_counts = line_count[listing_product]
+    pair_listing = np.repeat(np.arange(len(known)), pair_counts)
+    pair_starts = np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+    pair_line = np.repeat(first_line[listing_product], pair_counts) + np.arange(pair_counts.sum()) - pair_starts
+    
+    # Effective price = listing price × weight / quantity
+    pair_quantity = quantity[pair_line]
+    pair_weight = weight[pair_line]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective = np.where(
+            (pair_quantity > 0) & (pair_weight > 0),
+            listing_price[pair_listing] * pair_weight / pair_quantity,
+            0.0,
+        )
+    cents = effective * 100
+    rounded_cents = np.floor(cents + 0.5).astype(np.int64)
+    near_half = np.abs(cents - np.floor(cents) - 0.5) < 1e-6
+    
+    result = {}
+    ambiguous_products = set()
+    for listing_position, line_position, value, ambiguous in zip(
+        pair_listing.tolist(), pair_line.tolist(), rounded_cents.tolist(), near_half.tolist()
+    ):
+        if ambiguous:
+            ambiguous_products.add(known[listing_position][0])
+            continue
+        result[(known[listing_position][1], lines[line_position][1])] = Decimal(value).scaleb(-2)
+    
+    if ambiguous_products:
+        # Settle half-cent ties exactly, only for the affected products
+        result.update(_bulk_prorate_decimal(
+            [line for line in lines if line[0] in ambiguous_products],
+            [listing for listing in known if listing[0] in ambiguous_products],
+        ))
+    return result
+
+
+def calculate_component_discounts(component, list_price, effective_price):
+    """
+    Calculate dollar and percentage discounts for a component.
+    
+    Args:
+        component: Components model instance
+        list_price: Decimal standalone price (list price)
+        effective_price: Decimal effective price from kit
+    
+    Returns:
+        dict: {
+            'dollar_discount': Decimal or None,
+            'percentage_discount': Decimal or None,
+            'has_discount': bool
+        }
+    """
+    if list_price is None or effective_price is None:
+        return {
+            'dollar_discount': None,
+            'percentage_discount': None,
+            'has_discount': False,
+        }
+    
+    if list_price <= Decimal('0') or effective_price <= Decimal('0'):
+        return {
+            'dollar_discount': None,
+            'percentage_discount': None,
+            'has_discount': False,
+        }
+    
+    dollar_discount = list_price - effective_price
+    
+    if dollar_discount > 0:
+        percentage_discount = (dollar_discount / list_price) * Decimal('100')
+        return {
+            'dollar_discount': dollar_discount,
+            'percentage_discount': percentage_discount,
+            'has_discount': True,
+        }
+    else:
+        return {
+            'dollar_discount': Decimal('0'),
+            'percentage_discount': Decimal('0'),
+            'has_discount': False,
+        }
@@ -0,0 +1,130 @@
+"""
+Signal receivers that keep toolanalysis' derived tables in sync.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .attribute_values import apply_attribute_fields, refresh_attribute_values
+from .catalog_sync import ITEM_FIELDS, refresh_catalog_entries, refresh_entries_for_related
+from .models import (
+    Attributes, Brands, Categories, ComponentAttributes, Components, ItemTypes, LatestPriceListings,
+    PriceListings, ProductComponents, Products, Subcategories
+)
+from .price_sync import refresh_kit_deals, refresh_kit_deals_for_components, refresh_latest_listings
+
+# M2M relations whose values are copied into CatalogEntries
+CATALOG_ENTRY_RELATIONS = ('categories', 'subcategories', 'itemtypes')
+
+CATALOG_ENTRY_THROUGH_MODELS = {
+    model_class._meta.get_field(relation).remote_field.through: model_class
+    for model_class in ITEM_FIELDS
+    for relation in CATALOG_ENTRY_RELATIONS
+}
+
+# Lookup tables whose name or sortorder is copied into CatalogEntries
+CATALOG_ENTRY_LOOKUPS = {
+    Brands: 'brand',
+    Categories: 'categories',
+    Subcategories: 'subcategories',
+    ItemTypes: 'itemtypes',
+}
+
+
+@receiver(post_save, sender=Products)
+@receiver(post_save, sender=Components)
+def refresh_catalog_entry_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_catalog_entries(sender, [instance.pk])
+
+
+def refresh_catalog_entries_on_lookup_save(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    refresh_entries_for_related(CATALOG_ENTRY_LOOKUPS[sender], [instance.pk])
+
+
+for lookup_model in CATALOG_ENTRY_LOOKUPS:
+    post_save.connect(refresh_catalog_entries_on_lookup_save, sender=lookup_model)
+
+
+@receiver(m2m_changed)
+def refresh_catalog_entries_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    model_class = CATALOG_ENTRY_THROUGH_MODELS.get(sender)
+    if model_class is None:
+        return
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_catalog_entries(model_class, [instance.pk])
+        return
+    # Reverse side (e.g. category.components_set): pk_set holds item ids
+    if action == 'pre_clear':
+        field = next(f for f in model_class._meta.many_to_many if f.remote_field.through is sender)
+        instance._catalog_entry_clear_ids = list(
+            model_class.objects.filter(**{field.name: instance}).values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        refresh_catalog_entries(model_class, getattr(instance, '_catalog_entry_clear_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        refresh_catalog_entries(model_class, pk_set or [])
+
+
+@receiver(post_save, sender=PriceListings)
+def refresh_latest_listing_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Include the pair the listing was previously latest for, in case it moved
+    previous = LatestPriceListings.objects.filter(pricelisting=instance).values_list('product_id', 'retailer_id')
+    refresh_latest_listings([(instance.product_id, instance.retailer_id), *previous])
+
+
+@receiver(post_delete, sender=PriceListings)
+def refresh_latest_listing_on_delete(sender, instance, **kwargs):
+    refresh_latest_listings([(instance.product_id, instance.retailer_id)])
+
+
+@receiver(pre_save, sender=Components)
+def remember_standalone_price(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._previous_standalone_price = (
+        Components.objects.filter(pk=instance.pk).values_list('standalone_price', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Components)
+def refresh_kit_deals_on_standalone_price_change(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    if getattr(instance, '_previous_standalone_price', None) != instance.standalone_price:
+        refresh_kit_deals_for_components([instance.pk])
+
+
+@receiver(post_save, sender=ProductComponents)
+@receiver(post_delete, sender=ProductComponents)
+def refresh_kit_deals_on_product_component_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_kit_deals([instance.product_id])
+
+
+@receiver(pre_save, sender=ComponentAttributes)
+def parse_component_attribute_value(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    apply_attribute_fields(instance, instance.attribute.unit)
+
+
+@receiver(pre_save, sender=Attributes)
+def remember_attribute_unit(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._previous_unit = Attributes.objects.filter(pk=instance.pk).values_list('unit', flat=True).first()
+
+
+@receiver(post_save, sender=Attributes)
+def refresh_attribute_values_on_unit_change(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    if getattr(instance, '_previous_unit', None) != instance.unit:
+        refresh_attribute_values(ComponentAttributes.objects.filter(attribute=instance))
@@ -0,0 +1,26 @@
+"""
+Signals sent after toolanalysis recomputes its derived tables.
+
+The sync code writes with bulk_create() and queryset delete(), which send no
+model signals, and sends one of these once per refresh or rebuild instead.
+Apps that cache data built from these tables connect to them rather than
+being called from toolanalysis.
+"""
+from django.dispatch import Signal
+
+# sender: Products or Components; item_ids: the refreshed items, None after a full rebuild
+catalog_entries_refreshed = Signal()
+
+# sender: LatestPriceListings; product_ids: the refreshed products, None after a full rebuild
+latest_listings_refreshed = Signal()
+
+# sender: ComponentKitDeals; product_ids, component_ids: the products recomputed and the
+# components whose deals were replaced, both None after a full rebuild
+kit_deals_refreshed = Signal()
+
+# sender: Components; component_ids: components whose standalone_price the pricing pipeline changed
+standalone_prices_updated = Signal()
+
+# sender: ComponentAttributes; component_ids: components with rows whose parsed or
+# display values changed
+attribute_values_refreshed = Signal()
@@ -79,6 +79,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'frontend.context_processors.site_settings',
             ],
         },
     },
@@ -107,6 +108,29 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The frontend caches and in-memory indexes keep their version tokens here
+# (frontend.cache_utils), so every gunicorn worker and management command
+# must share one backend: Redis from REDIS_URL, otherwise the database.
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    # Table created by the frontend migrations (createcachetable)
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -177,6 +201,15 @@ X_FRAME_OPTIONS = 'DENY'
 # If you're behind a proxy (like Railway), add this:
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
+# Serve catalog filters and facet counts from the in-memory bitmap index
+CATALOG_FACET_INDEX_ENABLED = True
+
+# Answer search suggestions from the in-memory n-gram index
+SEARCH_SUGGESTION_INDEX_ENABLED = True
+
+# Rank the search page and the catalog search filter with the in-memory search documents
+SEARCH_DOCUMENT_INDEX_ENABLED = True
+
 # Components Backoffice feature flag and defaults
 ENABLE_COMPONENTS_BACKOFFICE = True
 ENABLE_PRODUCT_MANAGEMENT_BACKOFFICE = ENABLE_COMPONENTS_BACKOFFICE